@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# Benchmark of the currency conversion of a synthetic Coinbase export against the local price server
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import contextlib
+import csv
+import functools
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+from unittest import mock
+
+from bittytax.config import config
+from bittytax.constants import TZ_UTC
+from bittytax.price.pricedata import PriceData
+from bittytax.version import __version__
+
+from .price_server import PriceModel, PriceServer, start_server
+from .prices import configure, fetch_stats, isolate_cache
+
+RESULTS_FORMAT = 1
+
+MODES = ("batched", "per-day")
+
+HEADER = [
+    "ID",
+    "Timestamp",
+    "Transaction Type",
+    "Asset",
+    "Quantity Transacted",
+    "Price Currency",
+    "Price at Transaction",
+    "Subtotal",
+    "Total (inclusive of fees and/or spread)",
+    "Fees and/or Spread",
+    "Notes",
+]
+
+
+def write_export(
+    csv_file: TextIO, rows: int, start: str, days: int, currency: str, seed: int
+) -> None:
+    """A Coinbase transaction history, buys and sells of BTC and ETH with prices in currency."""
+
+    rnd = random.Random(seed)
+    start_date = datetime.strptime(start, "%Y-%m-%d").replace(tzinfo=TZ_UTC)
+    seconds = [rnd.randrange(days * 86400) for _ in range(rows)]
+
+    writer = csv.writer(csv_file, lineterminator="\n")
+    writer.writerow(HEADER)
+    for n, second in enumerate(sorted(seconds)):
+        asset = rnd.choice(("BTC", "ETH"))
+        quantity = rnd.uniform(0.001, 0.5)
+        price = rnd.uniform(1000, 60000) if asset == "BTC" else rnd.uniform(100, 4000)
+        subtotal = quantity * price
+        fees = subtotal * 0.015
+        t_type = rnd.choice(("Buy", "Sell"))
+        total = subtotal + fees if t_type == "Buy" else subtotal - fees
+        writer.writerow(
+            [
+                f"{n:024x}",
+                f"{start_date + timedelta(seconds=second):%Y-%m-%d %H:%M:%S} UTC",
+                t_type,
+                asset,
+                f"{quantity:.8f}",
+                currency,
+                f"${price:,.2f}",
+                f"${subtotal:,.2f}",
+                f"${total:,.2f}",
+                f"${fees:,.2f}",
+                f"{'Bought' if t_type == 'Buy' else 'Sold'} {quantity:.8f} {asset} "
+                f"for ${total:,.2f} {currency}",
+            ]
+        )
+
+
+def run_mode(mode: str, csv_filename: str, server: PriceServer) -> Dict[str, Any]:
+    # DataParser creates its PriceData when it's first imported, so it's not imported until the
+    #  data sources have been routed to the local server
+    # pylint: disable=import-outside-toplevel
+    from bittytax.conv import datafile
+    from bittytax.conv.datafile import DataFile
+    from bittytax.conv.dataparser import DataParser, ParseBatch
+    from bittytax.conv.parsers import coinbase  # noqa: F401 # pylint: disable=unused-import
+
+    DataFile.data_files = {}
+    # A new PriceData, so every run starts with an empty price cache
+    with _quiet():
+        DataParser.price_data = PriceData(config.data_source_fiat)
+    fetch_stats(server)
+
+    # Per day, the rates aren't collected, so each is fetched as it's first looked up
+    parse_batch = ParseBatch if mode == "batched" else functools.partial(ParseBatch, collect=False)
+
+    start = time.perf_counter()
+    with _quiet(), mock.patch.object(datafile, "ParseBatch", parse_batch):
+        DataFile.read_csv(csv_filename, argparse.Namespace(unconfirmed=False, cryptoasset=""))
+    seconds = time.perf_counter() - start
+
+    data_file = list(DataFile.data_files.values())[0]
+    return {
+        "seconds": seconds,
+        "rows": len(data_file.data_rows),
+        "failures": len(data_file.failures),
+        "server": fetch_stats(server),
+        "values": [
+            [str(dr.t_record.buy_value), str(dr.t_record.sell_value), str(dr.t_record.fee_value)]
+            for dr in data_file.data_rows
+            if dr.t_record
+        ],
+    }
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            yield
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.conversion",
+        description="time the currency conversion of a synthetic Coinbase export against the "
+        "local price server",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--start", type=str, default="2020-04-06", help="YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--currency", type=str, default="USD")
+    parser.add_argument("--fiat", type=str, default="Frankfurter")
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency (seconds)")
+    parser.add_argument("--mode", choices=MODES, action="append", help="default: all modes")
+    parser.add_argument(
+        "-o", dest="output_filename", type=str, help="write the JSON results to a file"
+    )
+    args = parser.parse_args()
+
+    cache_dir = isolate_cache()
+    server = start_server(model=PriceModel(0, args.seed), latency=args.latency)
+    configure(server, args.fiat.split(","), config.data_source_crypto)
+
+    modes: Dict[str, Dict[str, Any]] = {}
+    values: Optional[List[List[str]]] = None
+    try:
+        csv_filename = os.path.join(cache_dir, "coinbase.csv")
+        with io.open(csv_filename, "w", newline="", encoding="utf-8") as csv_file:
+            write_export(csv_file, args.rows, args.start, args.days, args.currency, args.seed)
+
+        for mode in args.mode or MODES:
+            modes[mode] = run_mode(mode, csv_filename, server)
+            mode_values = modes[mode].pop("values")
+            if values is None:
+                values = mode_values
+            modes[mode]["identical"] = mode_values == values
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results: Dict[str, Any] = {
+        "format": RESULTS_FORMAT,
+        "benchmark": "conversion",
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "bittytax": __version__,
+        "python": platform.python_version(),
+        "system": platform.system(),
+        "export": {
+            "rows": args.rows,
+            "start": args.start,
+            "days": args.days,
+            "currency": args.currency,
+            "seed": args.seed,
+        },
+        "data_sources": {"fiat": config.data_source_fiat},
+        "server": {"latency": args.latency},
+        "modes": modes,
+    }
+    output = json.dumps(results, indent=2)
+
+    if args.output_filename:
+        with open(args.output_filename, "w", encoding="utf-8") as json_file:
+            json_file.write(output + "\n")
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# Benchmark of the matching loop, with debug logging off, to the terminal and to a file
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Union
+
+from bittytax.bt_types import DisposalType
+from bittytax.config import config
+from bittytax.constants import TAX_RULES_UK_INDIVIDUAL
+from bittytax.import_records import ImportRecords
+from bittytax.log import setup_logging
+from bittytax.tax import TaxCalculator
+from bittytax.transactions import Buy, Sell, TransactionHistory
+from bittytax.version import __version__
+
+from .pricestub import StubValueAsset
+from .workload import Workload, WorkloadSpec
+
+RESULTS_FORMAT = 1
+
+MODES = ("off", "debug", "debuglog")
+
+
+def load_transactions(csv_filename: str) -> List[Union[Buy, Sell]]:
+    with _quiet():
+        import_records = ImportRecords()
+        with io.open(csv_filename, newline="", encoding="utf-8") as csv_file:
+            import_records.import_csv(csv_file, csv_filename)
+        return TransactionHistory(import_records.get_records(), StubValueAsset()).transactions
+
+
+def time_matching(transactions: List[Union[Buy, Sell]]) -> float:
+    """Time the same day, bed and breakfast and section 104 matching of the transactions."""
+
+    tax = TaxCalculator(transactions, TAX_RULES_UK_INDIVIDUAL)
+    with _quiet():
+        tax.pool_same_day()
+        start = time.perf_counter()
+        tax.match_sell(DisposalType.SAME_DAY)
+        tax.match_buyback(DisposalType.BED_AND_BREAKFAST)
+        tax.process_section104(False)
+        return time.perf_counter() - start
+
+
+def run_mode(mode: str, csv_filename: str, log_filename: str, repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        # Splitting modifies the transactions, so they are reloaded for each run
+        transactions = load_transactions(csv_filename)
+        config.debug = mode != "off"
+        if mode == "debuglog":
+            setup_logging(True, log_filename)
+        else:
+            setup_logging(config.debug)
+        try:
+            samples.append(time_matching(transactions))
+        finally:
+            setup_logging(False)
+            config.debug = False
+
+    return {"min": min(samples), "median": statistics.median(samples), "max": max(samples)}
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.matching",
+        description="time the matching loop with debug logging off, to the terminal and to a file",
+    )
+    defaults = WorkloadSpec()
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--assets", type=int, default=defaults.assets)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--trades-per-day", type=float, default=defaults.trades_per_day)
+    parser.add_argument("--same-day-cluster", type=float, default=defaults.same_day_cluster)
+    parser.add_argument("--bnb-density", type=float, default=defaults.bnb_density)
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs")
+    parser.add_argument("--mode", choices=MODES, action="append", help="default: all modes")
+    parser.add_argument(
+        "-o", dest="output_filename", type=str, help="write the JSON results to a file"
+    )
+    args = parser.parse_args()
+
+    spec = WorkloadSpec(
+        seed=args.seed,
+        assets=args.assets,
+        days=args.days,
+        trades_per_day=args.trades_per_day,
+        same_day_cluster=args.same_day_cluster,
+        bnb_density=args.bnb_density,
+    )
+
+    modes: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_filename = os.path.join(tmp_dir, "records.csv")
+        log_filename = os.path.join(tmp_dir, "debug.log")
+        workload = Workload(spec)
+        workload.generate()
+        with io.open(csv_filename, "w", newline="", encoding="utf-8") as csv_file:
+            workload.write_csv(csv_file)
+
+        for mode in args.mode or MODES:
+            modes[mode] = run_mode(mode, csv_filename, log_filename, max(args.repeat, 1))
+
+    results: Dict[str, Any] = {
+        "format": RESULTS_FORMAT,
+        "benchmark": "matching",
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "bittytax": __version__,
+        "python": platform.python_version(),
+        "system": platform.system(),
+        "workload": spec.as_dict(),
+        "modes": modes,
+    }
+    output = json.dumps(results, indent=2)
+
+    if args.output_filename:
+        with open(args.output_filename, "w", encoding="utf-8") as json_file:
+            json_file.write(output + "\n")
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
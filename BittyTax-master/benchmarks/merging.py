@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# Benchmark of the Etherscan merger, using synthetic multi-leg transactions of a DeFi wallet
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import contextlib
+import csv
+import gc
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, TextIO
+
+from bittytax.config import config
+from bittytax.version import __version__
+
+from .price_server import PriceModel, start_server
+from .prices import configure, isolate_cache
+
+RESULTS_FORMAT = 1
+
+WALLET = "0x5a2d0c4b8e1f93a7d6c4e2b1a0f9e8d7c6b5a493"
+ROUTER = "0x7a250d5630b4cf539739df2c5dacb4c659f2488d"
+
+TXNS_HEADER = [
+    "Transaction Hash",
+    "Blockno",
+    "UnixTimestamp",
+    "DateTime (UTC)",
+    "From",
+    "To",
+    "ContractAddress",
+    "Value_IN(ETH)",
+    "Value_OUT(ETH)",
+    "CurrentValue @ $2000/Eth",
+    "TxnFee(ETH)",
+    "TxnFee(USD)",
+    "Historical $Price/Eth",
+    "Status",
+    "ErrCode",
+    "Method",
+]
+
+INTERNAL_HEADER = [
+    "Transaction Hash",
+    "Blockno",
+    "UnixTimestamp",
+    "DateTime (UTC)",
+    "ParentTxFrom",
+    "ParentTxTo",
+    "ParentTxETH_Value",
+    "From",
+    "TxTo",
+    "ContractAddress",
+    "Value_IN(ETH)",
+    "Value_OUT(ETH)",
+    "CurrentValue @ $2000/Eth",
+    "Historical $Price/Eth",
+    "Status",
+    "ErrCode",
+    "Type",
+]
+
+TOKENS_HEADER = [
+    "Transaction Hash",
+    "Blockno",
+    "UnixTimestamp",
+    "DateTime (UTC)",
+    "From",
+    "To",
+    "TokenValue",
+    "USDValueDayOfTx",
+    "ContractAddress",
+    "TokenName",
+    "TokenSymbol",
+]
+
+TOKENS = ("USDC", "DAI", "UNI", "LINK", "AAVE", "CRV", "SNX", "MKR", "COMP", "SUSHI")
+
+
+class ExportWriter:  # pylint: disable=too-few-public-methods
+    """The transactions, internal transactions and token transfers exports of one wallet."""
+
+    def __init__(self, txns: TextIO, internal: TextIO, tokens: TextIO, seed: int) -> None:
+        self.txns = csv.writer(txns, lineterminator="\n")
+        self.internal = csv.writer(internal, lineterminator="\n")
+        self.tokens = csv.writer(tokens, lineterminator="\n")
+        self.rnd = random.Random(seed)
+        self.tx_hash = ""
+        self.timestamp = 1609459200
+
+        self.txns.writerow(TXNS_HEADER)
+        self.internal.writerow(INTERNAL_HEADER)
+        self.tokens.writerow(TOKENS_HEADER)
+
+    def write(self, transactions: int, legs: int, batch: int) -> None:
+        for n in range(transactions):
+            self.tx_hash = f"0x{n:064x}"
+            self.timestamp += self.rnd.randrange(1, 3600)
+            kind = self.rnd.choice(("send", "buy", "sell", "liquidity", "claim"))
+
+            if kind == "send":
+                self._txn("Transfer", value_out=self._quantity())
+            elif kind == "buy":
+                # ETH for one or more tokens
+                self._txn("Swap Exact ETH For Tokens", value_out=self._quantity())
+                for _ in range(self.rnd.randint(1, legs)):
+                    self._token(self.rnd.choice(TOKENS), deposit=True)
+            elif kind == "sell":
+                # One or more tokens for ETH, paid by the router as an internal transaction
+                self._txn("Swap Exact Tokens For ETH")
+                for _ in range(self.rnd.randint(1, legs)):
+                    self._token(self.rnd.choice(TOKENS), deposit=False)
+                self._internal()
+            elif kind == "liquidity":
+                self._txn("Add Liquidity")
+                for token in self.rnd.sample(TOKENS, 2):
+                    self._token(token, deposit=False)
+                self._token("UNI-V2-LP", deposit=True)
+            else:
+                # Rewards paid out in many internal transactions
+                self._txn("Claim")
+                for _ in range(self.rnd.randint(1, batch)):
+                    self._internal()
+
+    def _quantity(self) -> str:
+        return f"{self.rnd.uniform(0.001, 5):.18f}"
+
+    def _datetime(self) -> str:
+        return f"{datetime.fromtimestamp(self.timestamp, timezone.utc):%Y-%m-%d %H:%M:%S}"
+
+    def _txn(self, method: str, value_out: str = "0") -> None:
+        fee = self.rnd.uniform(0.0005, 0.02)
+        self.txns.writerow(
+            [
+                self.tx_hash,
+                self.timestamp // 12,
+                self.timestamp,
+                self._datetime(),
+                WALLET,
+                ROUTER,
+                "",
+                "0",
+                value_out,
+                "0",
+                f"{fee:.18f}",
+                f"{fee * 2000:.2f}",
+                "2000.00",
+                "",
+                "",
+                method,
+            ]
+        )
+
+    def _internal(self) -> None:
+        self.internal.writerow(
+            [
+                self.tx_hash,
+                self.timestamp // 12,
+                self.timestamp,
+                self._datetime(),
+                WALLET,
+                ROUTER,
+                "0",
+                ROUTER,
+                WALLET,
+                "",
+                self._quantity(),
+                "0",
+                "0",
+                "2000.00",
+                "0",
+                "",
+                "call",
+            ]
+        )
+
+    def _token(self, token: str, deposit: bool) -> None:
+        self.tokens.writerow(
+            [
+                self.tx_hash,
+                self.timestamp // 12,
+                self.timestamp,
+                self._datetime(),
+                ROUTER if deposit else WALLET,
+                WALLET if deposit else ROUTER,
+                f"{self.rnd.uniform(1, 10000):,.6f}",
+                "",
+                f"0x{hashlib.sha1(token.encode()).hexdigest()}",
+                token,
+                token,
+            ]
+        )
+
+
+def run_merge(filenames: List[str]) -> Dict[str, Any]:
+    # DataParser creates its PriceData when it's first imported, so it's not imported until the
+    #  data sources have been routed to the local server
+    # pylint: disable=import-outside-toplevel
+    from bittytax.conv.datafile import DataFile
+    from bittytax.conv.datamerge import DataMerge
+    from bittytax.conv.mergers import etherscan  # noqa: F401 # pylint: disable=unused-import
+
+    args = argparse.Namespace(unconfirmed=False, cryptoasset="ETH")
+    with _quiet():
+        for filename in filenames:
+            DataFile.read_csv(filename, args)
+
+    data_files = list(DataFile.data_files)
+    # Start from a clean heap, so a full collection left over from the parsing isn't timed
+    gc.collect()
+    start = time.perf_counter()
+    with _quiet():
+        DataMerge.match_merge(DataFile.data_files)
+    seconds = time.perf_counter() - start
+
+    digest = hashlib.sha256()
+    for data_file in data_files:
+        for data_row in data_file.data_rows:
+            digest.update(f"{data_row.t_record}\n".encode())
+
+    return {
+        "seconds": seconds,
+        "rows": sum(len(data_file.data_rows) for data_file in data_files),
+        "merged": not DataFile.data_files,
+        "digest": digest.hexdigest(),
+    }
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            yield
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.merging",
+        description="time the Etherscan merger on synthetic multi-leg transactions",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--legs", type=int, default=4, help="maximum token transfers per swap")
+    parser.add_argument(
+        "--batch", type=int, default=200, help="maximum internal transactions per claim"
+    )
+    parser.add_argument(
+        "-o", dest="output_filename", type=str, help="write the JSON results to a file"
+    )
+    args = parser.parse_args()
+
+    # The conversion tool's price data is routed to the local server, it's not used by the merge
+    cache_dir = isolate_cache()
+    server = start_server(model=PriceModel(0, args.seed))
+    configure(server, config.data_source_fiat, config.data_source_crypto)
+
+    try:
+        filenames = [
+            os.path.join(cache_dir, f"{WALLET}-{name}.csv")
+            for name in ("txns", "internal", "tokens")
+        ]
+        with contextlib.ExitStack() as stack:
+            csv_files = [
+                stack.enter_context(io.open(filename, "w", newline="", encoding="utf-8"))
+                for filename in filenames
+            ]
+            txns, internal, tokens = csv_files
+            ExportWriter(txns, internal, tokens, args.seed).write(
+                args.transactions, args.legs, args.batch
+            )
+
+        merge = run_merge(filenames)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results: Dict[str, Any] = {
+        "format": RESULTS_FORMAT,
+        "benchmark": "merging",
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "bittytax": __version__,
+        "python": platform.python_version(),
+        "system": platform.system(),
+        "export": {
+            "transactions": args.transactions,
+            "legs": args.legs,
+            "batch": args.batch,
+            "seed": args.seed,
+        },
+        "merge": merge,
+    }
+    output = json.dumps(results, indent=2)
+
+    if args.output_filename:
+        with open(args.output_filename, "w", encoding="utf-8") as json_file:
+            json_file.write(output + "\n")
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
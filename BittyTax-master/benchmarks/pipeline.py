@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# Benchmark of the tax pipeline, stage by stage
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, TypeVar
+
+from bittytax.audit import AuditRecords
+from bittytax.bt_types import DisposalType
+from bittytax.config import config
+from bittytax.constants import TAX_RULES_UK_COMPANY, TAX_RULES_UK_INDIVIDUAL
+from bittytax.import_records import ImportRecords
+from bittytax.report import ReportLog, ReportPdf
+from bittytax.t_record import TransactionRecord
+from bittytax.tax import CalculateCapitalGains as CCG
+from bittytax.tax import TaxCalculator
+from bittytax.transactions import TransactionHistory
+from bittytax.version import __version__
+
+from .pricestub import StubValueAsset
+from .workload import Workload, WorkloadSpec
+
+T = TypeVar("T")
+
+RESULTS_FORMAT = 1
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def call(self, name: str, func: Callable[[], T]) -> T:
+        with self.stage(name):
+            return func()
+
+
+def run_pipeline(
+    csv_filename: str, tax_rules: str, pdf_filename: str, quiet: bool = True, stream: bool = False
+) -> Dict[str, float]:
+    """Run every stage of the bittytax command against a records file, with the price
+    source stubbed out, and return the elapsed time of each stage in seconds."""
+
+    timer = StageTimer()
+    TransactionRecord.cnt = 0
+    config.start_of_year_month = 4
+    config.start_of_year_day = 6
+    if tax_rules in TAX_RULES_UK_COMPANY:
+        config.start_of_year_month = TAX_RULES_UK_COMPANY.index(tax_rules) + 1
+        config.start_of_year_day = 1
+
+    args = argparse.Namespace(
+        filename=csv_filename,
+        debug=False,
+        tax_year=None,
+        tax_rules=tax_rules,
+        audit_only=False,
+        skip_integrity=False,
+        summary_only=False,
+        output_filename=pdf_filename,
+        nopdf=not pdf_filename,
+        export=False,
+    )
+
+    with _redirect_output(quiet):
+        with timer.stage("import"):
+            import_records = ImportRecords()
+            with io.open(csv_filename, newline="", encoding="utf-8") as csv_file:
+                import_records.import_csv(csv_file, csv_filename)
+            transaction_records = import_records.get_records()
+
+        audit = timer.call("audit", lambda: AuditRecords(transaction_records, keep_log=not stream))
+
+        value_asset = StubValueAsset()
+        transaction_history = timer.call(
+            "transaction_history", lambda: TransactionHistory(transaction_records, value_asset)
+        )
+
+        tax = TaxCalculator(transaction_history.transactions, tax_rules)
+        if stream:
+            timer.call("stream", lambda: tax.process_stream(False))
+        else:
+            timer.call("pool_same_day", tax.pool_same_day)
+            timer.call("match_same_day", lambda: tax.match_sell(DisposalType.SAME_DAY))
+            if tax_rules == TAX_RULES_UK_INDIVIDUAL:
+                timer.call(
+                    "match_buyback", lambda: tax.match_buyback(DisposalType.BED_AND_BREAKFAST)
+                )
+            else:
+                timer.call("match_ten_day", lambda: tax.match_sell(DisposalType.TEN_DAY))
+
+            timer.call("section104", lambda: tax.process_section104(False))
+        timer.call("integrity_check", lambda: audit.compare_pools(tax.holdings))
+
+        with timer.stage("income_margin"):
+            tax.process_income()
+            tax.process_margin_trades()
+
+        with timer.stage("tax_years"):
+            for year in sorted(tax.tax_events):
+                if year in CCG.CG_DATA_INDIVIDUAL:
+                    tax.tax_report[year] = {
+                        "CapitalGains": tax.calculate_capital_gains(year),
+                        "Income": tax.calculate_income(year),
+                        "MarginTrading": tax.calculate_margin_trading(year),
+                    }
+
+        timer.call("holdings", lambda: tax.calculate_holdings(value_asset))
+        timer.call(
+            "report_log",
+            lambda: ReportLog(
+                args, audit, tax.tax_report, value_asset.price_report, tax.holdings_report
+            ),
+        )
+
+        if pdf_filename:
+            timer.call(
+                "report_pdf",
+                lambda: ReportPdf(
+                    "bittytax",
+                    args,
+                    audit,
+                    tax.tax_report,
+                    value_asset.price_report,
+                    tax.holdings_report,
+                ),
+            )
+
+    return timer.timings
+
+
+@contextlib.contextmanager
+def _redirect_output(quiet: bool) -> Iterator[None]:
+    if not quiet:
+        yield
+        return
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def summarise(runs: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    stages: Dict[str, Dict[str, float]] = {}
+    for name in runs[0]:
+        samples = [run[name] for run in runs]
+        stages[name] = {
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "max": max(samples),
+        }
+    stages["total"] = {
+        "min": min(sum(run.values()) for run in runs),
+        "median": statistics.median([sum(run.values()) for run in runs]),
+        "max": max(sum(run.values()) for run in runs),
+    }
+    return stages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.pipeline",
+        description="time each stage of the tax pipeline against a synthetic portfolio",
+    )
+    defaults = WorkloadSpec()
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--assets", type=int, default=defaults.assets)
+    parser.add_argument("--start", type=str, default=defaults.start, help="YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--trades-per-day", type=float, default=defaults.trades_per_day)
+    parser.add_argument("--same-day-cluster", type=float, default=defaults.same_day_cluster)
+    parser.add_argument("--bnb-density", type=float, default=defaults.bnb_density)
+    parser.add_argument("--wallets", type=int, default=defaults.wallets)
+    parser.add_argument("--transfer-ratio", type=float, default=defaults.transfer_ratio)
+    parser.add_argument("--crypto-ratio", type=float, default=defaults.crypto_ratio)
+    parser.add_argument("--income-ratio", type=float, default=defaults.income_ratio)
+    parser.add_argument(
+        "--taxrules",
+        choices=[TAX_RULES_UK_INDIVIDUAL] + TAX_RULES_UK_COMPANY,
+        default=TAX_RULES_UK_INDIVIDUAL,
+        type=str.upper,
+        dest="tax_rules",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs")
+    parser.add_argument("--pdf", action="store_true", help="include the PDF report stage")
+    parser.add_argument(
+        "--stream", action="store_true", help="pool, match and section 104 one asset at a time"
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="trace the peak memory allocated by each run"
+    )
+    parser.add_argument("--verbose", action="store_true", help="don't suppress pipeline output")
+    parser.add_argument(
+        "-o", dest="output_filename", type=str, help="write the JSON results to a file"
+    )
+    args = parser.parse_args()
+
+    spec = WorkloadSpec(
+        seed=args.seed,
+        assets=args.assets,
+        start=args.start,
+        days=args.days,
+        trades_per_day=args.trades_per_day,
+        same_day_cluster=args.same_day_cluster,
+        bnb_density=args.bnb_density,
+        wallets=args.wallets,
+        transfer_ratio=args.transfer_ratio,
+        crypto_ratio=args.crypto_ratio,
+        income_ratio=args.income_ratio,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_filename = os.path.join(tmp_dir, "records.csv")
+        workload = Workload(spec)
+        rows = workload.generate()
+        with io.open(csv_filename, "w", newline="", encoding="utf-8") as csv_file:
+            workload.write_csv(csv_file)
+
+        runs = []
+        peaks = []
+        for _ in range(max(args.repeat, 1)):
+            pdf_filename = os.path.join(tmp_dir, "report.pdf") if args.pdf else ""
+            if args.memory:
+                tracemalloc.start()
+            runs.append(
+                run_pipeline(
+                    csv_filename, args.tax_rules, pdf_filename, not args.verbose, args.stream
+                )
+            )
+            if args.memory:
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+    results: Dict[str, Any] = {
+        "format": RESULTS_FORMAT,
+        "benchmark": "pipeline",
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "bittytax": __version__,
+        "python": platform.python_version(),
+        "system": platform.system(),
+        "tax_rules": args.tax_rules,
+        "workload": spec.as_dict(),
+        "records": len(rows),
+        "repeat": len(runs),
+        "stream": args.stream,
+        "stages": summarise(runs),
+    }
+    if peaks:
+        results["peak_memory"] = {"min": min(peaks), "max": max(peaks)}
+    output = json.dumps(results, indent=2)
+
+    if args.output_filename:
+        with open(args.output_filename, "w", encoding="utf-8") as json_file:
+            json_file.write(output + "\n")
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
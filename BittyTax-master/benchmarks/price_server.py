@@ -0,0 +1,545 @@
+# -*- coding: utf-8 -*-
+# Local stand-in for the price data source APIs
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from bittytax.config import config
+from bittytax.price.datasource import (
+    BittyTaxAPI,
+    CoinDesk,
+    CoinGecko,
+    CoinPaprika,
+    CryptoCompare,
+    DataSourceBase,
+    Frankfurter,
+)
+
+Query = Dict[str, str]
+Response = Tuple[int, Any]
+
+EPOCH = date(1970, 1, 1)
+FIRST_DATE = date(2013, 1, 1)
+FIAT_USD = {
+    "USD": 1.0,
+    "GBP": 1.3,
+    "EUR": 1.15,
+    "JPY": 0.008,
+    "AUD": 0.7,
+    "NZD": 0.65,
+    "CAD": 0.75,
+    "PLN": 0.25,
+    "CHF": 1.1,
+    "DKK": 0.15,
+    "NOK": 0.1,
+    "SEK": 0.1,
+}
+
+DATA_SOURCES = (BittyTaxAPI, Frankfurter, CoinDesk, CryptoCompare, CoinGecko, CoinPaprika)
+
+
+def upstream_roots() -> Dict[str, str]:
+    return {ds.__name__.lower(): ds.API_ROOT for ds in DataSourceBase.__subclasses__()}
+
+
+class PriceModel:
+    """Deterministic synthetic daily prices, every price is in USD and then crossed."""
+
+    def __init__(self, assets: int, seed: int = 1, missing: float = 0.0) -> None:
+        self.seed = seed
+        self.missing = missing
+        self.crypto = {"BTC": "Bitcoin", "ETH": "Ethereum"}
+        self.crypto.update({f"SYN{n}": f"Synthetic {n}" for n in range(assets)})
+        self.fiat = sorted(FIAT_USD)
+
+    def usd(self, asset: str, day: date) -> Optional[float]:
+        if asset in FIAT_USD:
+            wave = 1 + 0.05 * math.sin((day - EPOCH).days / 90 + zlib.crc32(asset.encode()) % 7)
+            return FIAT_USD[asset] * wave
+
+        if asset not in self.crypto:
+            return None
+
+        key = zlib.crc32(f"{self.seed}:{asset}".encode())
+        if self.missing and zlib.crc32(f"{key}:{day}".encode()) % 10000 < self.missing * 10000:
+            return None
+
+        base = 100000.0 if asset == "BTC" else 1 + key % 5000
+        return base * (1.5 + math.sin((day - EPOCH).days / (20 + key % 40)))
+
+    def price(self, asset: str, quote: str, day: date) -> Optional[float]:
+        asset_usd = self.usd(asset.upper(), day)
+        quote_usd = self.usd(quote.upper(), day)
+        if asset_usd is None or not quote_usd:
+            return None
+        return float(f"{asset_usd / quote_usd:.10g}")
+
+    def symbols(self) -> Dict[str, str]:
+        symbols = {f: f"Fiat {f}" for f in self.fiat}
+        symbols.update(self.crypto)
+        return symbols
+
+    def coin_id(self, asset: str) -> str:
+        return f"{asset.lower()}-{self.crypto[asset].lower().replace(' ', '-')}"
+
+    def asset_from_id(self, asset_id: str) -> str:
+        return asset_id.split("-")[0].upper()
+
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value[:10], "%Y-%m-%d").date()
+
+
+def epoch(day: date) -> int:
+    return (day - EPOCH).days * 86400
+
+
+def day_range(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=n) for n in range(max((end - start).days + 1, 0))]
+
+
+class SyntheticApi:
+    """Mimics the responses of each data source from the model, keyed by the first path
+    segment, which is the lower case data source name."""
+
+    def __init__(self, model: PriceModel) -> None:
+        self.model = model
+        self.routes: Dict[str, Callable[[List[str], Query], Response]] = {
+            "bittytaxapi": self.bittytaxapi,
+            "frankfurter": self.frankfurter,
+            "coindesk": self.coindesk,
+            "cryptocompare": self.cryptocompare,
+            "coingecko": self.coingecko,
+            "coinpaprika": self.coinpaprika,
+        }
+
+    def handle(self, data_source: str, path: List[str], query: Query) -> Response:
+        if data_source not in self.routes:
+            return 404, {"error": "unknown data source"}
+        try:
+            return self.routes[data_source](path, query)
+        except (KeyError, ValueError, IndexError) as e:
+            return 400, {"error": f"bad request: {e}"}
+
+    def _rates(self, base: str, quotes: str, day: date) -> Response:
+        rates = {}
+        for quote in quotes.split(","):
+            price = self.model.price(base, quote, day)
+            if price is not None:
+                rates[quote] = price
+        return 200, {"base": base, "date": f"{day:%Y-%m-%d}", "rates": rates}
+
+    def bittytaxapi(self, path: List[str], query: Query) -> Response:
+        if path == ["symbols"]:
+            return 200, {"symbols": self.model.symbols()}
+        if path == ["latest"]:
+            return self._rates(query["base"], query["symbols"], today())
+        return self._rates(query["base"], query["symbols"], parse_date(path[0]))
+
+    def frankfurter(self, path: List[str], query: Query) -> Response:
+        if path == ["latest"]:
+            return self._rates(query["from"], query["to"], today())
+        if ".." in path[0]:
+            start, _, end = path[0].partition("..")
+            end_date = parse_date(end) if end else today()
+            rates = {}
+            for day in day_range(parse_date(start), min(end_date, today())):
+                # Weekends have no reference rate
+                if day.weekday() < 5:
+                    rates[f"{day:%Y-%m-%d}"] = self._rates(query["from"], query["to"], day)[1][
+                        "rates"
+                    ]
+            return 200, {"base": query["from"], "rates": rates}
+
+        # A weekend returns the previous working day's rate
+        day = parse_date(path[0])
+        return self._rates(
+            query["from"], query["to"], day - timedelta(days=max(day.weekday() - 4, 0))
+        )
+
+    def coindesk(self, path: List[str], query: Query) -> Response:
+        if path == ["currentprice.json"]:
+            return 200, {
+                "bpi": {
+                    q: {"rate_float": self.model.price("BTC", q, today())}
+                    for q in ("USD", "GBP", "EUR")
+                }
+            }
+        days = day_range(parse_date(query["start"]), parse_date(query["end"]))
+        quote = query.get("currency", "USD")
+        return 200, {"bpi": {f"{d:%Y-%m-%d}": self.model.price("BTC", quote, d) for d in days}}
+
+    def cryptocompare(self, path: List[str], query: Query) -> Response:
+        if path == ["data", "all", "coinlist"]:
+            return 200, {
+                "Response": "Success",
+                "Data": {s: {"Symbol": s, "CoinName": n} for s, n in self.model.crypto.items()},
+            }
+        if path == ["data", "price"]:
+            return 200, {
+                q: p
+                for q in query["tsyms"].split(",")
+                for p in [self.model.price(query["fsym"], q, today())]
+                if p is not None
+            }
+        if path == ["data", "pricemulti"]:
+            return 200, {
+                f.upper(): {
+                    q: p
+                    for q in query["tsyms"].split(",")
+                    for p in [self.model.price(f, q, today())]
+                    if p is not None
+                }
+                for f in query["fsyms"].split(",")
+                if f.upper() in self.model.crypto
+            }
+        if path == ["data", "histoday"]:
+            if query["fsym"].upper() not in self.model.crypto:
+                return 200, {"Response": "Error", "Type": 2, "Message": "market does not exist"}
+            end = min(EPOCH + timedelta(seconds=int(query["toTs"])), today())
+            start = end - timedelta(days=int(query["limit"]))
+            data = []
+            for day in day_range(start, end):
+                price = self.model.price(query["fsym"], query["tsym"], day)
+                data.append({"time": epoch(day), "close": price or 0})
+            return 200, {"Response": "Success", "Type": 100, "Data": data}
+        return 404, {"Response": "Error", "Message": "path does not exist"}
+
+    def coingecko(self, path: List[str], query: Query) -> Response:
+        if path == ["coins", "list"]:
+            return 200, [
+                {"id": self.model.coin_id(s), "symbol": s.lower(), "name": n}
+                for s, n in self.model.crypto.items()
+            ]
+        if path == ["simple", "price"]:
+            return 200, {
+                i: {
+                    q: p
+                    for q in query["vs_currencies"].split(",")
+                    for p in [self.model.price(self.model.asset_from_id(i), q, today())]
+                    if p is not None
+                }
+                for i in query["ids"].split(",")
+            }
+
+        asset = self.model.asset_from_id(path[1])
+        if len(path) == 2:
+            return 200, {
+                "market_data": {
+                    "current_price": {
+                        q.lower(): p
+                        for q in ["BTC"] + self.model.fiat
+                        for p in [self.model.price(asset, q, today())]
+                        if p is not None
+                    }
+                }
+            }
+        if path[2:] == ["market_chart", "range"]:
+            start = EPOCH + timedelta(seconds=int(query["from"]))
+            end = EPOCH + timedelta(seconds=int(query["to"]))
+        else:
+            end = today()
+            if query["days"] == "max":
+                start = FIRST_DATE
+            else:
+                start = end - timedelta(days=int(query["days"]))
+
+        prices = []
+        for day in day_range(start, min(end, today())):
+            price = self.model.price(asset, query["vs_currency"], day)
+            if price is not None:
+                prices.append([epoch(day) * 1000, price])
+        return 200, {"prices": prices}
+
+    def coinpaprika(self, path: List[str], query: Query) -> Response:
+        if path == ["coins"]:
+            return 200, [
+                {"id": self.model.coin_id(s), "symbol": s, "name": n}
+                for s, n in self.model.crypto.items()
+            ]
+
+        asset = self.model.asset_from_id(path[1])
+        if len(path) == 2:
+            quote = query.get("quotes", "USD")
+            return 200, {"quotes": {quote: {"price": self.model.price(asset, quote, today())}}}
+
+        start = parse_date(query["start"])
+        end = min(start + timedelta(days=int(query["limit"]) - 1), today())
+        return 200, [
+            {
+                "timestamp": f"{d:%Y-%m-%d}T00:00:00Z",
+                "price": self.model.price(asset, query["quote"], d),
+            }
+            for d in day_range(start, end)
+        ]
+
+
+class Recordings:
+    """Responses recorded from the real APIs, one JSON file per request."""
+
+    # Query parameters which vary between installs and don't affect the response
+    IGNORE_PARAMS = ("extraParams",)
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def filename(self, data_source: str, path: List[str], query: Query) -> str:
+        params = "&".join(
+            f"{k}={v}" for k, v in sorted(query.items()) if k not in self.IGNORE_PARAMS
+        )
+        key = hashlib.sha1(f"{'/'.join(path)}?{params}".encode()).hexdigest()
+        return os.path.join(self.directory, data_source, f"{key}.json")
+
+    def load(self, data_source: str, path: List[str], query: Query) -> Optional[Response]:
+        filename = self.filename(data_source, path, query)
+        if not os.path.exists(filename):
+            return None
+
+        with open(filename, "r", encoding="utf-8") as recording:
+            data = json.load(recording)
+        return data["status"], data["body"]
+
+    def save(self, data_source: str, path: List[str], query: Query, response: Response) -> None:
+        filename = self.filename(data_source, path, query)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as recording:
+            json.dump(
+                {
+                    "path": "/".join(path),
+                    "query": query,
+                    "status": response[0],
+                    "body": response[1],
+                },
+                recording,
+            )
+
+
+class PriceServer(ThreadingHTTPServer):  # pylint: disable=too-many-instance-attributes
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        model: PriceModel,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: float = 0.0,
+        error_rate: float = 0.0,
+        recordings: Optional[Recordings] = None,
+        record: bool = False,
+        strict: bool = False,
+    ) -> None:
+        super().__init__(address, PriceRequestHandler)
+        self.api = SyntheticApi(model)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.recordings = recordings
+        self.record = record
+        self.strict = strict
+        self.upstream = upstream_roots()
+        self.lock = threading.Lock()
+        self.rnd = random.Random(model.seed)
+        self.windows: Dict[str, List[float]] = {}
+        self.stats: Dict[str, Any] = {}
+        self.reset_stats()
+
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def api_roots(self) -> Dict[str, str]:
+        """Value for the data_source_api_root config, routing every data source here."""
+        return {ds.__name__: f"{self.url()}/{ds.__name__.lower()}" for ds in DATA_SOURCES}
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.stats = {"requests": {}, "bytes": {}, "throttled": 0, "errors": 0, "replayed": 0}
+
+    def count(self, data_source: str, size: int) -> None:
+        with self.lock:
+            self.stats["requests"][data_source] = self.stats["requests"].get(data_source, 0) + 1
+            self.stats["bytes"][data_source] = self.stats["bytes"].get(data_source, 0) + size
+
+    def throttle(self, data_source: str) -> Optional[int]:
+        """Status code to fail the request with, if it's rate limited or a random error."""
+        with self.lock:
+            if self.error_rate and self.rnd.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 429
+
+            if self.rate_limit:
+                now = time.monotonic()
+                window = [t for t in self.windows.get(data_source, []) if now - t < 1.0]
+                if len(window) >= self.rate_limit:
+                    self.windows[data_source] = window
+                    self.stats["throttled"] += 1
+                    return 429
+                window.append(now)
+                self.windows[data_source] = window
+
+            return None
+
+    def delay(self) -> None:
+        if self.latency or self.jitter:
+            with self.lock:
+                extra = self.rnd.uniform(0, self.jitter)
+            time.sleep(self.latency + extra)
+
+    def respond(self, data_source: str, path: List[str], query: Query) -> Response:
+        if self.recordings:
+            if self.record:
+                response = self.fetch_upstream(data_source, path, query)
+                self.recordings.save(data_source, path, query, response)
+                return response
+
+            recorded = self.recordings.load(data_source, path, query)
+            if recorded is not None:
+                with self.lock:
+                    self.stats["replayed"] += 1
+                return recorded
+            if self.strict:
+                return 404, {"error": "no recording"}
+
+        return self.api.handle(data_source, path, query)
+
+    def fetch_upstream(self, data_source: str, path: List[str], query: Query) -> Response:
+        url = f"{self.upstream[data_source]}/{'/'.join(path)}"
+        response = requests.get(
+            url, params=query, headers={"User-Agent": DataSourceBase.USER_AGENT}, timeout=30
+        )
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {}
+
+
+class PriceRequestHandler(BaseHTTPRequestHandler):
+    server: PriceServer
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        url = urlsplit(self.path)
+        segments = [s for s in url.path.split("/") if s]
+        query = dict(parse_qsl(url.query))
+
+        if segments == ["_stats"]:
+            self.send_json(200, self.server.stats)
+            if "reset" in query:
+                self.server.reset_stats()
+            return
+
+        if not segments:
+            self.send_json(404, {"error": "no data source"})
+            return
+
+        data_source = segments[0].lower()
+        self.server.delay()
+        status = self.server.throttle(data_source)
+        if status:
+            self.send_json(status, {"error": "Too Many Requests"})
+            return
+
+        status, body = self.server.respond(data_source, segments[1:], query)
+        size = self.send_json(status, body)
+        self.server.count(data_source, size)
+
+    def send_json(self, status: int, body: Any) -> int:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        return len(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        if config.debug:
+            super().log_message(format, *args)
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **kwargs: Any) -> PriceServer:
+    """Start the server in a background thread, port 0 picks a free port."""
+    server = PriceServer((host, port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.price_server",
+        description="local stand-in for the price data source APIs",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8421)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--assets", type=int, default=10, help="number of synthetic assets")
+    parser.add_argument(
+        "--missing", type=float, default=0.0, help="ratio of days with no price data"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="requests per second, per data source"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="ratio of requests failed with 429"
+    )
+    parser.add_argument("--replay", type=str, help="directory of recorded responses")
+    parser.add_argument("--record", action="store_true", help="record responses from the real APIs")
+    parser.add_argument(
+        "--strict", action="store_true", help="don't fall back to synthetic data when replaying"
+    )
+    args = parser.parse_args()
+
+    if args.record and not args.replay:
+        parser.error("--record requires --replay DIR")
+
+    server = PriceServer(
+        (args.host, args.port),
+        PriceModel(args.assets, args.seed, args.missing),
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        recordings=Recordings(args.replay) if args.replay else None,
+        record=args.record,
+        strict=args.strict,
+    )
+
+    sys.stdout.write("data_source_api_root: {\n")
+    for data_source, api_root in server.api_roots().items():
+        sys.stdout.write(f"    '{data_source}': '{api_root}',\n")
+    sys.stdout.write("    }\n")
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
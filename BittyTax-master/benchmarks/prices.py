@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Benchmark of the price data path against the local price server
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Tuple
+
+import dateutil.parser
+import requests
+
+from bittytax.bt_types import AssetSymbol, Timestamp
+from bittytax.config import config
+from bittytax.price import datasource, pricedata
+from bittytax.price.valueasset import ValueAsset
+from bittytax.version import __version__
+
+from .price_server import PriceModel, PriceServer, start_server
+from .workload import Workload, WorkloadSpec
+
+RESULTS_FORMAT = 1
+
+Lookup = Tuple[AssetSymbol, Timestamp]
+
+
+def isolate_cache() -> str:
+    """Point the price cache at a scratch directory, so the user's cache is never read or
+    written. The directory is removed after the data sources have saved their caches."""
+    cache_dir = tempfile.mkdtemp(prefix="bittytax-bench-")
+    # Registered first so that it runs after every data source's exit handler
+    atexit.register(shutil.rmtree, cache_dir, True)
+    datasource.CACHE_DIR = cache_dir
+    pricedata.CACHE_DIR = cache_dir
+    return cache_dir
+
+
+def configure(server: PriceServer, fiat: List[str], crypto: List[str]) -> None:
+    config.config["data_source_api_root"] = server.api_roots()
+    config.config["data_source_fiat"] = fiat
+    config.config["data_source_crypto"] = crypto
+    config.config["data_source_select"] = {}
+
+
+def workload_lookups(spec: WorkloadSpec) -> List[Lookup]:
+    """Every asset valued by the records of the synthetic portfolio, in record order."""
+    lookups = []
+    for row in Workload(spec).generate():
+        timestamp = Timestamp(dateutil.parser.parse(row[11]))
+        for asset in (row[2], row[5], row[8]):
+            if asset and asset != config.ccy:
+                lookups.append((AssetSymbol(asset), timestamp))
+    return lookups
+
+
+def fetch_stats(server: PriceServer, reset: bool = True) -> Dict[str, Any]:
+    url = f"{server.url()}/_stats{'?reset=1' if reset else ''}"
+    stats: Dict[str, Any] = requests.get(url, timeout=10).json()
+    return stats
+
+
+def run_lookups(value_asset: ValueAsset, lookups: List[Lookup]) -> Dict[str, Any]:
+    errors = missing = 0
+    start = time.perf_counter()
+    for asset, timestamp in lookups:
+        try:
+            price, _, _ = value_asset.get_historical_price(asset, timestamp)
+        except requests.exceptions.RequestException:
+            errors += 1
+        else:
+            if price is None:
+                missing += 1
+    return {
+        "seconds": time.perf_counter() - start,
+        "lookups": len(lookups),
+        "missing": missing,
+        "errors": errors,
+    }
+
+
+def run_latest(value_asset: ValueAsset, assets: List[AssetSymbol]) -> Dict[str, Any]:
+    """Value every asset at its latest price, the same as the holdings report."""
+    errors = missing = 0
+    start = time.perf_counter()
+    value_asset.prefetch_latest_prices(assets)
+    for asset in assets:
+        try:
+            value, _, _ = value_asset.get_current_value(asset, Decimal(1))
+        except requests.exceptions.RequestException:
+            errors += 1
+        else:
+            if value is None:
+                missing += 1
+    return {
+        "seconds": time.perf_counter() - start,
+        "lookups": len(assets),
+        "missing": missing,
+        "errors": errors,
+    }
+
+
+def save_caches(value_asset: ValueAsset) -> None:
+    for data_source in value_asset.price_data.data_sources.values():
+        data_source._cache_prices()  # pylint: disable=protected-access
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def run(spec: WorkloadSpec, server: PriceServer) -> Dict[str, Dict[str, Any]]:
+    lookups = workload_lookups(spec)
+    phases: Dict[str, Dict[str, Any]] = {}
+
+    with _quiet():
+        fetch_stats(server)
+        start = time.perf_counter()
+        value_asset = ValueAsset()
+        phases["init"] = {"seconds": time.perf_counter() - start, "server": fetch_stats(server)}
+
+        phases["cold"] = run_lookups(value_asset, lookups)
+        phases["cold"]["server"] = fetch_stats(server)
+
+        phases["warm"] = run_lookups(value_asset, lookups)
+        phases["warm"]["server"] = fetch_stats(server)
+
+        # A new process reloads the cache from disk
+        save_caches(value_asset)
+        value_asset = ValueAsset()
+        fetch_stats(server)
+        phases["reload"] = run_lookups(value_asset, lookups)
+        phases["reload"]["server"] = fetch_stats(server)
+
+        phases["latest"] = run_latest(value_asset, sorted({asset for asset, _ in lookups}))
+        phases["latest"]["server"] = fetch_stats(server)
+
+    return phases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.prices",
+        description="time price lookups for a synthetic portfolio against the local price server",
+    )
+    defaults = WorkloadSpec()
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--assets", type=int, default=defaults.assets)
+    parser.add_argument("--start", type=str, default=defaults.start, help="YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--trades-per-day", type=float, default=defaults.trades_per_day)
+    parser.add_argument("--crypto-ratio", type=float, default=0.5)
+    parser.add_argument("--income-ratio", type=float, default=0.2)
+    parser.add_argument("--fiat", type=str, default="BittyTaxAPI")
+    parser.add_argument("--crypto", type=str, default="CryptoCompare,CoinGecko")
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="requests per second, per data source"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="ratio of requests failed with 429"
+    )
+    parser.add_argument(
+        "--missing", type=float, default=0.0, help="ratio of days with no price data"
+    )
+    parser.add_argument(
+        "-o", dest="output_filename", type=str, help="write the JSON results to a file"
+    )
+    args = parser.parse_args()
+
+    spec = WorkloadSpec(
+        seed=args.seed,
+        assets=args.assets,
+        start=args.start,
+        days=args.days,
+        trades_per_day=args.trades_per_day,
+        crypto_ratio=args.crypto_ratio,
+        income_ratio=args.income_ratio,
+    )
+
+    isolate_cache()
+    server = start_server(
+        model=PriceModel(args.assets, args.seed, args.missing),
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+    )
+    configure(server, args.fiat.split(","), args.crypto.split(","))
+
+    try:
+        phases = run(spec, server)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results: Dict[str, Any] = {
+        "format": RESULTS_FORMAT,
+        "benchmark": "prices",
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "bittytax": __version__,
+        "python": platform.python_version(),
+        "system": platform.system(),
+        "workload": spec.as_dict(),
+        "data_sources": {"fiat": config.data_source_fiat, "crypto": config.data_source_crypto},
+        "server": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "rate_limit": args.rate_limit,
+            "error_rate": args.error_rate,
+            "missing": args.missing,
+        },
+        "phases": phases,
+    }
+    output = json.dumps(results, indent=2)
+
+    if args.output_filename:
+        with open(args.output_filename, "w", encoding="utf-8") as json_file:
+            json_file.write(output + "\n")
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
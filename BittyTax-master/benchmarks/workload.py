@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# Synthetic portfolio generator for benchmarking
+# (c) Nano Nano Ltd 2026
+
+import csv
+import heapq
+import itertools
+import math
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from bittytax.bt_types import TrType
+from bittytax.config import config
+from bittytax.constants import TZ_UTC
+from bittytax.t_row import TransactionRow
+
+Row = List[str]
+Part = Optional[Tuple[Decimal, str]]
+
+
+@dataclass
+class WorkloadSpec:  # pylint: disable=too-many-instance-attributes
+    seed: int = 1
+    assets: int = 10
+    days: int = 3 * 365
+    trades_per_day: float = 2.0
+    same_day_cluster: float = 0.3
+    bnb_density: float = 0.1
+    wallets: int = 3
+    transfer_ratio: float = 0.1
+    crypto_ratio: float = 0.2
+    income_ratio: float = 0.05
+    start: str = "2020-04-06"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class Workload:
+    """Seeded generator of transaction records in the BittyTax import format.
+
+    The portfolio is kept consistent (no asset is ever sold or sent beyond what the wallet
+    holds) so that the audit and the section 104 pools balance, and every stage of the
+    pipeline does the same work on each run of the same spec.
+    """
+
+    def __init__(self, spec: WorkloadSpec) -> None:
+        self.spec = spec
+        self.rnd = random.Random(spec.seed)
+        self.assets = [f"SYN{n}" for n in range(spec.assets)]
+        self.wallets = [f"Wallet {n}" for n in range(max(spec.wallets, 1))]
+        self.balances: Dict[str, Dict[str, Decimal]] = {w: {} for w in self.wallets}
+        self.rows: List[Row] = []
+        self.pending: List[Tuple[datetime, int, TrType, str, Part]] = []
+        self.seq = itertools.count()
+
+    def generate(self) -> List[Row]:
+        start = datetime.strptime(self.spec.start, "%Y-%m-%d").replace(tzinfo=TZ_UTC)
+        for wallet in self.wallets:
+            self._row(TrType.DEPOSIT, buy=(Decimal(10**9), config.ccy), wallet=wallet, ts=start)
+
+        for day in range(self.spec.days):
+            date = start + timedelta(days=day)
+            trades = self._poisson(self.spec.trades_per_day)
+            if trades and self.rnd.random() < self.spec.same_day_cluster:
+                trades += self.rnd.randint(2, 8)
+
+            for secs in sorted(self.rnd.randrange(86400) for _ in range(trades)):
+                ts = date + timedelta(seconds=secs)
+                self._flush_pending(ts)
+                self._event(ts)
+
+        self._flush_pending(None)
+        return self.rows
+
+    def write_csv(self, csv_file: TextIO) -> None:
+        writer = csv.writer(csv_file, lineterminator="\n")
+        writer.writerow(TransactionRow.HEADER)
+        writer.writerows(self.rows)
+
+    def _event(self, ts: datetime) -> None:
+        wallet = self.rnd.choice(self.wallets)
+        asset = self.rnd.choice(self.assets)
+        roll = self.rnd.random()
+
+        if roll < self.spec.transfer_ratio:
+            self._transfer(asset, wallet, ts)
+        elif roll < self.spec.transfer_ratio + self.spec.income_ratio:
+            self._row(TrType.STAKING, buy=(self._quantity(), asset), wallet=wallet, ts=ts)
+        elif roll < self.spec.transfer_ratio + self.spec.income_ratio + self.spec.crypto_ratio:
+            other = self.rnd.choice(self.assets)
+            held = self._held(wallet, asset)
+            if other != asset and held:
+                sell_quantity = self._fraction(held)
+                self._row(
+                    TrType.TRADE,
+                    buy=(self._quantity(), other),
+                    sell=(sell_quantity, asset),
+                    wallet=wallet,
+                    ts=ts,
+                )
+            else:
+                self._buy(asset, wallet, ts)
+        elif self.rnd.random() < 0.5 or not self._held(wallet, asset):
+            self._buy(asset, wallet, ts)
+        else:
+            self._sell(asset, wallet, ts)
+
+    def _buy(self, asset: str, wallet: str, ts: datetime) -> None:
+        quantity = self._quantity()
+        self._row(
+            TrType.TRADE,
+            buy=(quantity, asset),
+            sell=(self._gbp(), config.ccy),
+            fee=(self._fee(), config.ccy),
+            wallet=wallet,
+            ts=ts,
+        )
+
+    def _sell(self, asset: str, wallet: str, ts: datetime) -> None:
+        quantity = self._fraction(self._held(wallet, asset))
+        self._row(
+            TrType.TRADE,
+            buy=(self._gbp(), config.ccy),
+            sell=(quantity, asset),
+            fee=(self._fee(), config.ccy),
+            wallet=wallet,
+            ts=ts,
+        )
+
+        if self.rnd.random() < self.spec.bnb_density:
+            # Buy back within the 30 day bed & breakfast window
+            buyback = ts + timedelta(days=self.rnd.randint(1, 30), seconds=self.rnd.randrange(60))
+            self._schedule(buyback, TrType.TRADE, wallet, (quantity, asset))
+
+    def _transfer(self, asset: str, wallet: str, ts: datetime) -> None:
+        held = self._held(wallet, asset)
+        dest = self.rnd.choice(self.wallets)
+        if not held or dest == wallet:
+            self._buy(asset, wallet, ts)
+            return
+
+        quantity = self._fraction(held)
+        self._row(TrType.WITHDRAWAL, sell=(quantity, asset), wallet=wallet, ts=ts)
+        self._schedule(ts + timedelta(minutes=10), TrType.DEPOSIT, dest, (quantity, asset))
+
+    def _schedule(self, ts: datetime, t_type: TrType, wallet: str, buy: Part) -> None:
+        # Future acquisitions only count towards the balance once their time is reached
+        heapq.heappush(self.pending, (ts, next(self.seq), t_type, wallet, buy))
+
+    def _flush_pending(self, until: Optional[datetime]) -> None:
+        while self.pending and (until is None or self.pending[0][0] <= until):
+            ts, _, t_type, wallet, buy = heapq.heappop(self.pending)
+            if t_type is TrType.TRADE and buy:
+                self._row(t_type, wallet, ts, buy=buy, sell=(self._gbp(), config.ccy))
+            else:
+                self._row(t_type, wallet, ts, buy=buy)
+
+    def _row(
+        self,
+        t_type: TrType,
+        wallet: str,
+        ts: datetime,
+        buy: Part = None,
+        sell: Part = None,
+        fee: Part = None,
+    ) -> None:
+        row = [t_type.value]
+        for part, sign in ((buy, 1), (sell, -1), (fee, -1)):
+            if part:
+                quantity, asset = part
+                balances = self.balances[wallet]
+                balances[asset] = balances.get(asset, Decimal(0)) + sign * quantity
+                row.extend([f"{quantity}", asset, ""])
+            else:
+                row.extend(["", "", ""])
+
+        row.extend([wallet, f"{ts:%Y-%m-%dT%H:%M:%S} UTC", ""])
+        self.rows.append(row)
+
+    def _held(self, wallet: str, asset: str) -> Decimal:
+        return self.balances[wallet].get(asset, Decimal(0))
+
+    def _poisson(self, lam: float) -> int:
+        # Knuth's method, adequate for the small rates used here
+        limit = math.exp(-lam)
+        k = 0
+        p = self.rnd.random()
+        while p > limit:
+            k += 1
+            p *= self.rnd.random()
+        return k
+
+    def _quantity(self) -> Decimal:
+        return Decimal(self.rnd.randint(1, 10**6)).scaleb(-4)
+
+    def _fraction(self, held: Decimal) -> Decimal:
+        quantity = (held * Decimal(self.rnd.randint(1, 100)) / 100).quantize(Decimal("0.0001"))
+        return min(max(quantity, Decimal("0.0001")), held)
+
+    def _gbp(self) -> Decimal:
+        return Decimal(self.rnd.randint(100, 10**6)).scaleb(-2)
+
+    def _fee(self) -> Decimal:
+        return Decimal(self.rnd.randint(1, 500)).scaleb(-2)
@@ -14,6 +14,7 @@ from .bt_types import AssetSymbol, TrRecordPart, TrType, Wallet
 from .config import config
 from .constants import WARNING
 from .holdings import Holdings
+from .log import is_debug, logger
 from .t_record import TransactionRecord
 from .transactions import Buy, Sell
 
@@ -42,14 +43,14 @@ class ComparePoolFail(TypedDict):  # pylint: disable=too-few-public-methods
 
 
 class AuditRecords:
-    def __init__(self, transaction_records: List[TransactionRecord]) -> None:
+    def __init__(self, transaction_records: List[TransactionRecord], keep_log: bool = True) -> None:
+        self.keep_log = keep_log
         self.wallets: Dict[Wallet, Dict[AssetSymbol, Decimal]] = {}
         self.totals: Dict[AssetSymbol, AuditTotals] = {}
         self.audit_log: Dict[AssetSymbol, List[AuditLogEntry]] = {}
         self.failures: List[ComparePoolFail] = []
 
-        if config.debug:
-            print(f"{Fore.CYAN}audit transaction records")
+        logger.debug("%saudit transaction records", Fore.CYAN)
 
         for tr in tqdm(
             transaction_records,
@@ -57,8 +58,7 @@ class AuditRecords:
             desc=f"{Fore.CYAN}audit transaction records{Fore.GREEN}",
             disable=bool(config.debug or not sys.stdout.isatty()),
         ):
-            if config.debug:
-                print(f"{Fore.MAGENTA}audit: TR {tr}")
+            logger.debug("%saudit: TR %s", Fore.MAGENTA, tr)
 
             if tr.buy:
                 self._add_tokens(tr.wallet, tr.buy)
@@ -77,20 +77,29 @@ class AuditRecords:
                     tr.fee.asset, tr.wallet, None, -abs(tr.fee.quantity), TrRecordPart.FEE, tr
                 )
 
-        if config.debug:
-            print(f"{Fore.CYAN}audit: final balances by wallet")
+        if is_debug():
+            logger.debug("%saudit: final balances by wallet", Fore.CYAN)
             for wallet in sorted(self.wallets, key=str.lower):
                 for asset in sorted(self.wallets[wallet]):
-                    print(
-                        f"{Fore.YELLOW}audit: {wallet}:{asset}={Style.BRIGHT}"
-                        f"{self.wallets[wallet][asset].normalize():0,f}{Style.NORMAL}"
+                    logger.debug(
+                        "%saudit: %s:%s=%s%s%s",
+                        Fore.YELLOW,
+                        wallet,
+                        asset,
+                        Style.BRIGHT,
+                        format(self.wallets[wallet][asset].normalize(), "0,f"),
+                        Style.NORMAL,
                     )
 
-            print(f"{Fore.CYAN}audit: final balances by asset")
+            logger.debug("%saudit: final balances by asset", Fore.CYAN)
             for asset in sorted(self.totals):
-                print(
-                    f"{Fore.YELLOW}audit: {asset}={Style.BRIGHT}"
-                    f"{self.totals[asset].total.normalize():0,f}{Style.NORMAL}"
+                logger.debug(
+                    "%saudit: %s=%s%s%s",
+                    Fore.YELLOW,
+                    asset,
+                    Style.BRIGHT,
+                    format(self.totals[asset].total.normalize(), "0,f"),
+                    Style.NORMAL,
                 )
 
         for asset in sorted(self.totals):
@@ -120,11 +129,14 @@ class AuditRecords:
         if buy.t_type == TrType.DEPOSIT and buy.is_crypto():
             self.totals[buy.asset].transfers_mismatch += buy.quantity
 
-        if config.debug:
-            print(
-                f"{Fore.GREEN}audit:   {wallet}:{buy.asset}="
-                f"{self.wallets[wallet][buy.asset].normalize():0,f} "
-                f"(+{buy.quantity.normalize():0,f})"
+        if is_debug():
+            logger.debug(
+                "%saudit:   %s:%s=%s (+%s)",
+                Fore.GREEN,
+                wallet,
+                buy.asset,
+                format(self.wallets[wallet][buy.asset].normalize(), "0,f"),
+                format(buy.quantity.normalize(), "0,f"),
             )
 
     def _subtract_tokens(self, wallet: Wallet, sell: Sell) -> None:
@@ -144,11 +156,14 @@ class AuditRecords:
         if sell.t_type == TrType.WITHDRAWAL and sell.is_crypto():
             self.totals[sell.asset].transfers_mismatch -= sell.quantity
 
-        if config.debug:
-            print(
-                f"{Fore.GREEN}audit:   {wallet}:{sell.asset}="
-                f"{self.wallets[wallet][sell.asset].normalize():0,f} "
-                f"(-{sell.quantity.normalize():0,f})"
+        if is_debug():
+            logger.debug(
+                "%saudit:   %s:%s=%s (-%s)",
+                Fore.GREEN,
+                wallet,
+                sell.asset,
+                format(self.wallets[wallet][sell.asset].normalize(), "0,f"),
+                format(sell.quantity.normalize(), "0,f"),
             )
         if self.wallets[wallet][sell.asset] < 0 and sell.is_crypto():
             tqdm.write(
@@ -165,6 +180,9 @@ class AuditRecords:
         tr_part: TrRecordPart,
         tr: TransactionRecord,
     ) -> None:
+        if not self.keep_log:
+            return
+
         audit_log_entry = AuditLogEntry(
             quantity,
             fee,
@@ -197,20 +215,20 @@ class AuditRecords:
             if asset in holdings:
                 difference = holdings[asset].quantity - self.totals[asset].total
                 if not difference:
-                    if config.debug:
-                        print(f"{Fore.GREEN}check pool: {asset} (ok)")
+                    logger.debug("%scheck pool: %s (ok)", Fore.GREEN, asset)
                 else:
-                    if config.debug:
-                        print(
-                            f"{Fore.RED}check pool: {asset} "
-                            f"{difference.normalize():+0,f} (mismatch)"
+                    if is_debug():
+                        logger.debug(
+                            "%scheck pool: %s %s (mismatch)",
+                            Fore.RED,
+                            asset,
+                            format(difference.normalize(), "+0,f"),
                         )
 
                     self._log_failure(asset, self.totals[asset].total, holdings[asset].quantity)
                     passed = False
             else:
-                if config.debug:
-                    print(f"{Fore.RED}check pool: {asset} (missing)")
+                logger.debug("%scheck pool: %s (missing)", Fore.RED, asset)
 
                 self._log_failure(asset, self.totals[asset].total, None)
                 passed = False
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+# Batch processing of many clients' transaction records
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, TextIO
+
+import colorama
+from colorama import Fore
+
+from .audit import AuditRecords
+from .bittytax import (
+    _do_each_tax_year,
+    _do_import,
+    _do_integrity_check,
+    _do_tax,
+    _validate_year,
+)
+from .bt_types import Year
+from .config import config
+from .constants import ERROR, TAX_RULES_UK_COMPANY, TAX_RULES_UK_INDIVIDUAL
+from .exceptions import ImportFailureError, RecordsFormatError
+from .log import PlainFormatter, setup_logging
+from .price.exceptions import DataSourceError
+from .price.pricedata import PriceData
+from .price.valueasset import ValueAsset
+from .report import ReportPdf
+from .version import __version__
+
+RESULTS_FILENAME = "BittyTax_Batch_Results.csv"
+RECORDS_EXTENSIONS = (".xlsx", ".xls", ".csv", ".btr")
+
+MANIFEST_FILENAME = "filename"
+MANIFEST_TAX_RULES = "taxrules"
+MANIFEST_TAX_YEAR = "taxyear"
+MANIFEST_OUTPUT = "output"
+
+STAGES = ("Import", "Audit", "Tax", "Report")
+
+
+@dataclass
+class Client:
+    filename: str
+    tax_rules: str
+    tax_year: Optional[Year]
+    output_filename: str
+
+
+@dataclass
+class ClientResult:
+    client: Client
+    status: str = "passed"
+    error: str = ""
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class ClientStdout(io.TextIOBase):
+    """Stands in for sys.stdout, so the output of each worker thread goes to the log file of the
+    client it's processing. It's not a terminal, so progress bars and spinners are disabled."""
+
+    def __init__(self, stdout: TextIO) -> None:
+        super().__init__()
+        self.stdout = stdout
+        self.local = threading.local()
+
+    def write(self, text: str) -> int:
+        log_file: Optional[TextIO] = getattr(self.local, "log_file", None)
+        if log_file is None:
+            return self.stdout.write(text)
+        return log_file.write(PlainFormatter.ANSI_ESCAPE.sub("", text))
+
+    def flush(self) -> None:
+        log_file: Optional[TextIO] = getattr(self.local, "log_file", None)
+        if log_file is None:
+            self.stdout.flush()
+        else:
+            log_file.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    @contextlib.contextmanager
+    def redirect(self, log_file: TextIO) -> Iterator[None]:
+        self.local.log_file = log_file
+        try:
+            yield
+        finally:
+            self.local.log_file = None
+
+
+class Batch:  # pylint: disable=too-few-public-methods
+    def __init__(self, clients: List[Client], skip_integrity: bool, summary_only: bool) -> None:
+        self.clients = clients
+        self.skip_integrity = skip_integrity
+        self.summary_only = summary_only
+        self.stdout = ClientStdout(sys.stdout)
+        self.report_lock = threading.Lock()
+
+        # The price data, and the asset lists of its data sources, are shared by every client
+        self.price_data = PriceData(ValueAsset.data_sources_required())
+
+    def run(self, jobs: int) -> List[ClientResult]:
+        results: Dict[int, ClientResult] = {}
+
+        sys.stdout = self.stdout
+        try:
+            # The tax year start date is global, so clients are processed in groups by tax rules
+            for tax_rules in dict.fromkeys(client.tax_rules for client in self.clients):
+                self._set_tax_rules(tax_rules)
+                indexes = [i for i, c in enumerate(self.clients) if c.tax_rules == tax_rules]
+
+                with ThreadPoolExecutor(max_workers=jobs) as executor:
+                    for i, result in zip(
+                        indexes, executor.map(self._process_client, indexes, chunksize=1)
+                    ):
+                        results[i] = result
+        finally:
+            sys.stdout = self.stdout.stdout
+
+        return [results[i] for i in sorted(results)]
+
+    @staticmethod
+    def _set_tax_rules(tax_rules: str) -> None:
+        if tax_rules in TAX_RULES_UK_COMPANY:
+            config.start_of_year_month = TAX_RULES_UK_COMPANY.index(tax_rules) + 1
+            config.start_of_year_day = 1
+        else:
+            config.start_of_year_month = 4
+            config.start_of_year_day = 6
+
+    def _process_client(self, index: int) -> ClientResult:
+        client = self.clients[index]
+        result = ClientResult(client)
+        start = time.perf_counter()
+
+        log_filename = os.path.splitext(client.output_filename)[0] + ".log"
+        with open(log_filename, "w", encoding="utf-8") as log_file:
+            with self.stdout.redirect(log_file):
+                try:
+                    self._process(client, result)
+                except ImportFailureError as e:
+                    result.status, result.error = "failed", str(e)
+                except (IOError, RecordsFormatError, DataSourceError) as e:
+                    result.status, result.error = "failed", str(e)
+                    print(f"{ERROR} {e}")
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # One client's records shouldn't stop the batch, the traceback is logged
+                    result.status, result.error = "failed", repr(e)
+                    traceback.print_exc(file=log_file)
+
+        result.timings["Total"] = time.perf_counter() - start
+        print(
+            f"{Fore.WHITE}{client.filename}: "
+            f"{Fore.YELLOW if result.status == 'passed' else Fore.RED}{result.status} "
+            f"{Fore.WHITE}({result.timings['Total']:.2f}s)",
+            file=self.stdout.stdout,
+        )
+        return result
+
+    def _process(self, client: Client, result: ClientResult) -> None:
+        stage_start = time.perf_counter()
+
+        def end_stage(stage: str) -> None:
+            nonlocal stage_start
+            result.timings[stage] = time.perf_counter() - stage_start
+            stage_start = time.perf_counter()
+
+        transaction_records = _do_import(client.filename)
+        end_stage("Import")
+
+        audit = AuditRecords(transaction_records)
+        end_stage("Audit")
+
+        tax, value_asset = _do_tax(
+            transaction_records,
+            client.tax_rules,
+            self.skip_integrity,
+            price_data=self.price_data,
+        )
+        if not self.skip_integrity and not _do_integrity_check(audit, tax.holdings):
+            result.status, result.error = "failed", "Integrity check failed"
+            return
+
+        if not self.summary_only:
+            tax.process_income()
+            tax.process_margin_trades()
+
+        _do_each_tax_year(tax, client.tax_year, self.summary_only, value_asset)
+        end_stage("Tax")
+
+        # The PDF library keeps global state, so reports are generated one at a time
+        with self.report_lock:
+            ReportPdf(
+                "bittytax",
+                argparse.Namespace(
+                    filename=client.filename,
+                    tax_rules=client.tax_rules,
+                    tax_year=client.tax_year,
+                    output_filename=client.output_filename,
+                    audit_only=False,
+                    summary_only=self.summary_only,
+                ),
+                audit,
+                tax.tax_report,
+                value_asset.price_report,
+                tax.holdings_report,
+            )
+        end_stage("Report")
+
+
+def main() -> None:
+    colorama.init()
+    parser = argparse.ArgumentParser(
+        description="process the transaction records of many clients, sharing the price data"
+    )
+    parser.add_argument(
+        "source",
+        type=str,
+        help="directory of transaction records files, or a CSV manifest with the columns "
+        f"{MANIFEST_FILENAME}, {MANIFEST_TAX_RULES}, {MANIFEST_TAX_YEAR} and {MANIFEST_OUTPUT}",
+    )
+    parser.add_argument(
+        "-v",
+        "--version",
+        action="version",
+        version=f"{parser.prog} v{__version__}",
+    )
+    parser.add_argument(
+        "-ty",
+        "--taxyear",
+        type=_validate_year,
+        dest="tax_year",
+        help="default tax year for clients which don't specify one",
+    )
+    parser.add_argument(
+        "--taxrules",
+        choices=[TAX_RULES_UK_INDIVIDUAL] + TAX_RULES_UK_COMPANY,
+        metavar="{UK_INDIVIDUAL, UK_COMPANY_XXX}",
+        default=TAX_RULES_UK_INDIVIDUAL,
+        type=str.upper,
+        dest="tax_rules",
+        help="default tax rules for clients which don't specify them, default: UK_INDIVIDUAL",
+    )
+    parser.add_argument(
+        "--skipint",
+        dest="skip_integrity",
+        action="store_true",
+        help="skip integrity check",
+    )
+    parser.add_argument(
+        "--summary",
+        dest="summary_only",
+        action="store_true",
+        help="only output the capital gains summary in the tax reports",
+    )
+    parser.add_argument(
+        "-o",
+        dest="output_dir",
+        type=str,
+        default=".",
+        help="directory for the reports of clients which don't specify an output filename, "
+        "and the results file, default: current directory",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of clients processed at the same time, default: 1",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use prices from the cache, no network access",
+    )
+
+    args = parser.parse_args()
+    setup_logging(False)
+    if args.offline:
+        config.config["data_source_offline"] = True
+
+    if not os.path.isdir(args.output_dir):
+        parser.exit(message=f"{ERROR} Output directory does not exist: {args.output_dir}\n")
+
+    results_filename = os.path.join(args.output_dir, RESULTS_FILENAME)
+    try:
+        if os.path.isdir(args.source):
+            clients = _read_directory(args, results_filename)
+        else:
+            clients = _read_manifest(args, parser)
+    except IOError:
+        parser.exit(message=f"{ERROR} File could not be read: {args.source}\n")
+
+    print(f"{Fore.WHITE}batch: {Fore.YELLOW}{len(clients)} client(s)")
+    results = Batch(clients, args.skip_integrity, args.summary_only).run(max(1, args.jobs))
+    _write_results(results_filename, results)
+
+    failures = len([result for result in results if result.status != "passed"])
+    print(
+        f"{Fore.WHITE}batch {'successful' if not failures else 'failure'} "
+        f"(passed={len(results) - failures}, failed={failures})"
+    )
+    print(f"{Fore.WHITE}results file created: {Fore.YELLOW}{os.path.abspath(results_filename)}")
+
+
+def _read_directory(args: argparse.Namespace, results_filename: str) -> List[Client]:
+    filenames = sorted(
+        os.path.join(args.source, filename)
+        for filename in os.listdir(args.source)
+        if os.path.splitext(filename)[1].lower() in RECORDS_EXTENSIONS
+        and not filename.startswith(".")
+    )
+
+    clients = []
+    output_filenames: Dict[str, int] = {}
+    for filename in filenames:
+        if os.path.abspath(filename) == os.path.abspath(results_filename):
+            continue
+
+        clients.append(
+            Client(
+                filename,
+                args.tax_rules,
+                args.tax_year,
+                _output_filename(args.output_dir, filename, output_filenames),
+            )
+        )
+    return clients
+
+
+def _read_manifest(args: argparse.Namespace, parser: argparse.ArgumentParser) -> List[Client]:
+    manifest_dir = os.path.dirname(args.source)
+    clients = []
+    output_filenames: Dict[str, int] = {}
+
+    with open(args.source, newline="", encoding="utf-8-sig") as manifest_file:
+        reader = csv.DictReader(manifest_file)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        if MANIFEST_FILENAME not in reader.fieldnames:
+            parser.exit(
+                message=f"{ERROR} Manifest has no '{MANIFEST_FILENAME}' column: {args.source}\n"
+            )
+
+        for row in reader:
+            if not row[MANIFEST_FILENAME]:
+                continue
+
+            filename = os.path.join(manifest_dir, row[MANIFEST_FILENAME].strip())
+            tax_rules = (row.get(MANIFEST_TAX_RULES) or args.tax_rules).strip().upper()
+            if tax_rules not in [TAX_RULES_UK_INDIVIDUAL] + TAX_RULES_UK_COMPANY:
+                parser.exit(
+                    message=f"{ERROR} Manifest line {reader.line_num} has invalid tax rules: "
+                    f"{tax_rules}\n"
+                )
+
+            tax_year = args.tax_year
+            if row.get(MANIFEST_TAX_YEAR):
+                try:
+                    tax_year = Year(_validate_year(row[MANIFEST_TAX_YEAR].strip()))
+                except (ValueError, argparse.ArgumentTypeError):
+                    parser.exit(
+                        message=f"{ERROR} Manifest line {reader.line_num} has invalid tax year: "
+                        f"{row[MANIFEST_TAX_YEAR]}\n"
+                    )
+
+            if row.get(MANIFEST_OUTPUT):
+                output_filename = os.path.join(manifest_dir, row[MANIFEST_OUTPUT].strip())
+            else:
+                output_filename = _output_filename(args.output_dir, filename, output_filenames)
+
+            clients.append(Client(filename, tax_rules, tax_year, output_filename))
+    return clients
+
+
+def _output_filename(output_dir: str, filename: str, output_filenames: Dict[str, int]) -> str:
+    # Records files of different formats can have the same name
+    name = os.path.splitext(os.path.basename(filename))[0]
+    if name.lower() in output_filenames:
+        output_filenames[name.lower()] += 1
+        name = f"{name}-{output_filenames[name.lower()]}"
+    else:
+        output_filenames[name.lower()] = 1
+    return os.path.join(output_dir, f"{name}.{ReportPdf.FILE_EXTENSION}")
+
+
+def _write_results(results_filename: str, results: List[ClientResult]) -> None:
+    with open(results_filename, "w", newline="", encoding="utf-8") as results_file:
+        writer = csv.writer(results_file, lineterminator="\n")
+        writer.writerow(
+            ["Filename", "Tax Rules", "Tax Year", "Output", "Status", "Error"]
+            + [f"{stage} (s)" for stage in STAGES + ("Total",)]
+        )
+        for result in results:
+            writer.writerow(
+                [
+                    result.client.filename,
+                    result.client.tax_rules,
+                    result.client.tax_year or "",
+                    result.client.output_filename,
+                    result.status,
+                    result.error,
+                ]
+                + [
+                    (f"{result.timings[stage]:.3f}" if stage in result.timings else "")
+                    for stage in STAGES + ("Total",)
+                ]
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+import itertools
+import struct
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .constants import TZ_UTC
+from .exceptions import RecordsFormatError
+
+MAGIC = b"BTXR"
+FORMAT_VERSION = 1
+
+EPOCH = datetime(1970, 1, 1, tzinfo=TZ_UTC)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+U8 = struct.Struct(">B")
+U32 = struct.Struct(">I")
+
+SYMBOL_FIELDS = ("t_type", "buy_asset", "sell_asset", "fee_asset", "wallet")
+DECIMAL_FIELDS = (
+    "buy_quantity",
+    "buy_value",
+    "sell_quantity",
+    "sell_value",
+    "fee_quantity",
+    "fee_value",
+)
+
+
+class BinaryRecord(NamedTuple):
+    t_type: str
+    buy_quantity: Optional[Decimal]
+    buy_asset: str
+    buy_value: Optional[Decimal]
+    sell_quantity: Optional[Decimal]
+    sell_asset: str
+    sell_value: Optional[Decimal]
+    fee_quantity: Optional[Decimal]
+    fee_asset: str
+    fee_value: Optional[Decimal]
+    wallet: str
+    timestamp: datetime
+    note: str
+    tx_hash: str = ""
+    tx_src: str = ""
+    tx_dest: str = ""
+
+
+class BinaryRecordWriter:  # pylint: disable=too-few-public-methods
+    """Transaction records written as a versioned binary stream.
+
+    The stream starts with MAGIC, the format version and the currency of the values. Each
+    worksheet follows, its name and number of records, and then the records column by column, so
+    a whole column is packed or unpacked at once. Decimals are kept exact as their canonical
+    strings, timestamps are microseconds since the epoch in UTC, and symbols (types, assets and
+    wallets) are indexes into a table of the column's distinct strings.
+    """
+
+    def __init__(self, binary_file: BinaryIO, ccy: str) -> None:
+        self.binary_file = binary_file
+        self.binary_file.write(MAGIC + U8.pack(FORMAT_VERSION))
+        self._write_strs([ccy])
+
+    def write_worksheet(self, worksheet_name: str, records: List[BinaryRecord]) -> None:
+        self._write_strs([worksheet_name])
+        self.binary_file.write(U32.pack(len(records)))
+
+        columns = zip(*records) if records else [()] * len(BinaryRecord._fields)
+        for field, column in zip(BinaryRecord._fields, columns):
+            if field in SYMBOL_FIELDS:
+                self._write_symbols(column)
+            elif field in DECIMAL_FIELDS:
+                self._write_strs(["" if decimal is None else str(decimal) for decimal in column])
+            elif field == "timestamp":
+                self.binary_file.write(
+                    struct.pack(
+                        f">{len(column)}q",
+                        *((timestamp - EPOCH) // ONE_MICROSECOND for timestamp in column),
+                    )
+                )
+            else:
+                self._write_strs(column)
+
+    def _write_strs(self, strings: Sequence[str]) -> None:
+        # The lengths are in characters, so the strings can be sliced once they are decoded
+        encoded = "".join(strings).encode("utf-8")
+        self.binary_file.write(struct.pack(f">{len(strings)}I", *map(len, strings)))
+        self.binary_file.write(U32.pack(len(encoded)) + encoded)
+
+    def _write_symbols(self, symbols: Sequence[str]) -> None:
+        table: Dict[str, int] = {}
+        indexes = [table.setdefault(symbol, len(table)) for symbol in symbols]
+        self.binary_file.write(U32.pack(len(table)))
+        self._write_strs(list(table))
+        self.binary_file.write(struct.pack(f">{len(indexes)}I", *indexes))
+
+
+class BinaryRecordReader:  # pylint: disable=too-few-public-methods
+    def __init__(self, binary_file: BinaryIO) -> None:
+        self.data = binary_file.read()
+        self.pos = len(MAGIC)
+
+        if self.data[: len(MAGIC)] != MAGIC:
+            raise RecordsFormatError("Not a BittyTax records file")
+
+        try:
+            version = self._unpack(U8)[0]
+            if version != FORMAT_VERSION:
+                raise RecordsFormatError(f"Unsupported records format version: {version}")
+
+            self.ccy = self._read_strs(1)[0]
+        except (struct.error, UnicodeDecodeError) as e:
+            raise RecordsFormatError("Records file is truncated or corrupt") from e
+
+    def worksheets(self) -> Iterator[Tuple[str, List[BinaryRecord]]]:
+        try:
+            while self.pos < len(self.data):
+                worksheet_name = self._read_strs(1)[0]
+                count = self._unpack(U32)[0]
+                columns = [self._read_column(field, count) for field in BinaryRecord._fields]
+                yield worksheet_name, list(map(BinaryRecord._make, zip(*columns)))
+        except (struct.error, IndexError, UnicodeDecodeError, InvalidOperation) as e:
+            raise RecordsFormatError("Records file is truncated or corrupt") from e
+
+    def _read_column(self, field: str, count: int) -> List[Any]:
+        if field in SYMBOL_FIELDS:
+            table = self._read_strs(self._unpack(U32)[0])
+            return [table[index] for index in self._unpack(struct.Struct(f">{count}I"))]
+        if field in DECIMAL_FIELDS:
+            return [Decimal(string) if string else None for string in self._read_strs(count)]
+        if field == "timestamp":
+            return [
+                EPOCH + ONE_MICROSECOND * microseconds
+                for microseconds in self._unpack(struct.Struct(f">{count}q"))
+            ]
+        return self._read_strs(count)
+
+    def _unpack(self, fmt: struct.Struct) -> Tuple[int, ...]:
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def _read_strs(self, count: int) -> List[str]:
+        lengths = self._unpack(struct.Struct(f">{count}I"))
+        size = self._unpack(U32)[0]
+        if self.pos + size > len(self.data):
+            raise struct.error("unpack requires more data")
+
+        text = self.data[self.pos : self.pos + size].decode("utf-8")
+        self.pos += size
+
+        ends = list(itertools.accumulate(lengths))
+        if ends and ends[-1] != len(text):
+            raise struct.error("string lengths do not match")
+        return [text[end - length : end] for length, end in zip(lengths, ends)]
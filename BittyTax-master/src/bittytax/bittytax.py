@@ -3,11 +3,12 @@
 # (c) Nano Nano Ltd 2019
 
 import argparse
+import atexit
 import io
 import os
 import platform
 import sys
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import colorama
 from colorama import Fore
@@ -17,12 +18,15 @@ from .audit_excel import AuditLogExcel
 from .bt_types import AssetSymbol, DisposalType, Year
 from .config import config
 from .constants import ERROR, TAX_RULES_UK_COMPANY, TAX_RULES_UK_INDIVIDUAL, WARNING
-from .exceptions import ImportFailureError
+from .exceptions import ImportFailureError, RecordsFormatError
 from .export_records import ExportRecords
 from .holdings import Holdings
 from .import_records import ImportRecords
+from .log import setup_logging
 from .price.exceptions import DataSourceError
+from .price.pricedata import PriceData
 from .price.valueasset import ValueAsset
+from .profiler import profiler
 from .report import ReportLog, ReportPdf
 from .t_record import TransactionRecord
 from .tax import CalculateCapitalGains as CCG
@@ -104,9 +108,53 @@ def main() -> None:
         action="store_true",
         help="export your transaction records populated with price data",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="calculate one asset at a time, only holding the transactions within the "
+        "matching window in memory",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes used to read the worksheets of an Excel file, and to calculate "
+        "assets with --stream, default: 1",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="output a profile of the time spent in each stage",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        dest="profile_trace",
+        type=str,
+        metavar="FILENAME",
+        help="write the profile as a Chrome trace file, which can be viewed in speedscope",
+    )
+    parser.add_argument(
+        "--debuglog",
+        type=str,
+        metavar="FILENAME",
+        help="write the debug log of the tax calculation to a file, as plain text",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use prices from the cache, no network access",
+    )
 
     args = parser.parse_args()
     config.debug = args.debug
+    if args.offline:
+        config.config["data_source_offline"] = True
+    setup_logging(config.debug or bool(args.debuglog), args.debuglog)
+
+    if args.profile or args.profile_trace:
+        profiler.enable()
+        atexit.register(_do_profile_report, args.profile_trace)
 
     if config.debug:
         print(f"{Fore.YELLOW}{parser.prog} v{__version__}")
@@ -121,9 +169,12 @@ def main() -> None:
         config.start_of_year_day = 1
 
     try:
-        transaction_records = _do_import(args.filename)
+        with profiler.span("import"):
+            transaction_records = _do_import(args.filename, args.jobs)
     except IOError:
         parser.exit(message=f"{ERROR} File could not be read: {args.filename}\n")
+    except RecordsFormatError as e:
+        parser.exit(message=f"{ERROR} {e}: {args.filename}\n")
     except ImportFailureError:
         parser.exit()
 
@@ -131,45 +182,55 @@ def main() -> None:
         _do_export(transaction_records)
         parser.exit()
 
-    audit = AuditRecords(transaction_records)
+    with profiler.span("audit"):
+        audit = AuditRecords(transaction_records, keep_log=args.audit_only or not args.stream)
 
     if args.audit_only:
         if audit.audit_log:
             audit_log_excel = AuditLogExcel(parser.prog, audit.audit_log)
             audit_log_excel.write_excel()
 
-        if args.nopdf:
-            ReportLog(args, audit)
-        else:
-            ReportPdf(parser.prog, args, audit)
+        with profiler.span("report"):
+            if args.nopdf:
+                ReportLog(args, audit)
+            else:
+                ReportPdf(parser.prog, args, audit)
     else:
         try:
-            tax, value_asset = _do_tax(transaction_records, args.tax_rules, args.skip_integrity)
+            tax, value_asset = _do_tax(
+                transaction_records, args.tax_rules, args.skip_integrity, args.stream, args.jobs
+            )
             if not args.skip_integrity:
-                int_passed = _do_integrity_check(audit, tax.holdings)
+                with profiler.span("integrity"):
+                    int_passed = _do_integrity_check(audit, tax.holdings)
                 if not int_passed:
                     parser.exit()
 
             if not args.summary_only:
-                tax.process_income()
-                tax.process_margin_trades()
+                with profiler.span("income"):
+                    tax.process_income()
+                with profiler.span("margin"):
+                    tax.process_margin_trades()
 
             _do_each_tax_year(tax, args.tax_year, args.summary_only, value_asset)
 
         except DataSourceError as e:
             parser.exit(message=f"{ERROR} {e}\n")
 
-        if args.nopdf:
-            ReportLog(args, audit, tax.tax_report, value_asset.price_report, tax.holdings_report)
-        else:
-            ReportPdf(
-                parser.prog,
-                args,
-                audit,
-                tax.tax_report,
-                value_asset.price_report,
-                tax.holdings_report,
-            )
+        with profiler.span("report"):
+            if args.nopdf:
+                ReportLog(
+                    args, audit, tax.tax_report, value_asset.price_report, tax.holdings_report
+                )
+            else:
+                ReportPdf(
+                    parser.prog,
+                    args,
+                    audit,
+                    tax.tax_report,
+                    value_asset.price_report,
+                    tax.holdings_report,
+                )
 
 
 def _validate_year(value: str) -> int:
@@ -183,15 +244,18 @@ def _validate_year(value: str) -> int:
     return year
 
 
-def _do_import(filename: str) -> List[TransactionRecord]:
+def _do_import(filename: str, jobs: int = 1) -> List[TransactionRecord]:
     import_records = ImportRecords()
 
     if filename:
         _, file_extension = os.path.splitext(filename)
         if file_extension == ".xlsx":
-            import_records.import_excel_xlsx(filename)
+            import_records.import_excel_xlsx(filename, jobs)
         elif file_extension == ".xls":
-            import_records.import_excel_xls(filename)
+            import_records.import_excel_xls(filename, jobs)
+        elif file_extension == ".btr":
+            with open(filename, "rb") as binary_file:
+                import_records.import_binary(binary_file, filename)
         else:
             with io.open(filename, newline="", encoding="utf-8") as csv_file:
                 import_records.import_csv(csv_file, filename)
@@ -210,21 +274,36 @@ def _do_import(filename: str) -> List[TransactionRecord]:
 
 
 def _do_tax(
-    transaction_records: List[TransactionRecord], tax_rules: str, skip_integrity_check: bool
+    transaction_records: List[TransactionRecord],
+    tax_rules: str,
+    skip_integrity_check: bool,
+    stream: bool = False,
+    jobs: int = 1,
+    price_data: Optional[PriceData] = None,
 ) -> Tuple[TaxCalculator, ValueAsset]:
-    value_asset = ValueAsset()
-    transaction_history = TransactionHistory(transaction_records, value_asset)
+    with profiler.span("valuation"):
+        value_asset = ValueAsset(price_data=price_data)
+        transaction_history = TransactionHistory(transaction_records, value_asset)
 
     tax = TaxCalculator(transaction_history.transactions, tax_rules)
-    tax.pool_same_day()
-    tax.match_sell(DisposalType.SAME_DAY)
+    if stream:
+        with profiler.span("stream"):
+            tax.process_stream(skip_integrity_check, jobs)
+        return tax, value_asset
+
+    with profiler.span("pool"):
+        tax.pool_same_day()
 
-    if tax_rules == TAX_RULES_UK_INDIVIDUAL:
-        tax.match_buyback(DisposalType.BED_AND_BREAKFAST)
-    elif tax_rules in TAX_RULES_UK_COMPANY:
-        tax.match_sell(DisposalType.TEN_DAY)
+    with profiler.span("match"):
+        tax.match_sell(DisposalType.SAME_DAY)
 
-    tax.process_section104(skip_integrity_check)
+        if tax_rules == TAX_RULES_UK_INDIVIDUAL:
+            tax.match_buyback(DisposalType.BED_AND_BREAKFAST)
+        elif tax_rules in TAX_RULES_UK_COMPANY:
+            tax.match_sell(DisposalType.TEN_DAY)
+
+    with profiler.span("section104"):
+        tax.process_section104(skip_integrity_check)
     return tax, value_asset
 
 
@@ -265,44 +344,55 @@ def _transfer_mismatches(holdings: Dict[AssetSymbol, Holdings]) -> bool:
 
 
 def _do_each_tax_year(
-    tax: TaxCalculator, tax_year: Year, summary_only: bool, value_asset: ValueAsset
+    tax: TaxCalculator, tax_year: Optional[Year], summary_only: bool, value_asset: ValueAsset
 ) -> None:
     if tax_year:
         print(f"{Fore.CYAN}calculating tax year {config.format_tax_year(tax_year)}")
 
-        calc_cgt = tax.calculate_capital_gains(tax_year)
-        if summary_only:
-            tax.tax_report[tax_year] = {"CapitalGains": calc_cgt}
-        else:
-            calc_income = tax.calculate_income(tax_year)
-            calc_margin_trading = tax.calculate_margin_trading(tax_year)
-            tax.tax_report[tax_year] = {
-                "CapitalGains": calc_cgt,
-                "Income": calc_income,
-                "MarginTrading": calc_margin_trading,
-            }
+        with profiler.span("tax year"):
+            calc_cgt = tax.calculate_capital_gains(tax_year)
+            if summary_only:
+                tax.tax_report[tax_year] = {"CapitalGains": calc_cgt}
+            else:
+                calc_income = tax.calculate_income(tax_year)
+                calc_margin_trading = tax.calculate_margin_trading(tax_year)
+                tax.tax_report[tax_year] = {
+                    "CapitalGains": calc_cgt,
+                    "Income": calc_income,
+                    "MarginTrading": calc_margin_trading,
+                }
     else:
         # Calculate for all years
         for year in sorted(tax.tax_events):
             print(f"{Fore.CYAN}calculating tax year {config.format_tax_year(year)}")
 
             if year in CCG.CG_DATA_INDIVIDUAL:
-                calc_cgt = tax.calculate_capital_gains(year)
-                if summary_only:
-                    tax.tax_report[year] = {"CapitalGains": calc_cgt}
-                else:
-                    calc_income = tax.calculate_income(year)
-                    calc_margin_trading = tax.calculate_margin_trading(year)
-                    tax.tax_report[year] = {
-                        "CapitalGains": calc_cgt,
-                        "Income": calc_income,
-                        "MarginTrading": calc_margin_trading,
-                    }
+                with profiler.span("tax year"):
+                    calc_cgt = tax.calculate_capital_gains(year)
+                    if summary_only:
+                        tax.tax_report[year] = {"CapitalGains": calc_cgt}
+                    else:
+                        calc_income = tax.calculate_income(year)
+                        calc_margin_trading = tax.calculate_margin_trading(year)
+                        tax.tax_report[year] = {
+                            "CapitalGains": calc_cgt,
+                            "Income": calc_income,
+                            "MarginTrading": calc_margin_trading,
+                        }
             else:
                 print(f"{WARNING} Tax year {year} is not supported")
 
         if not summary_only:
-            tax.calculate_holdings(value_asset)
+            with profiler.span("holdings"):
+                tax.calculate_holdings(value_asset)
+
+
+def _do_profile_report(trace_filename: str) -> None:
+    profiler.output_report(sys.stdout)
+
+    if trace_filename:
+        profiler.write_trace(trace_filename)
+        print(f"{Fore.WHITE}profile trace written: {Fore.YELLOW}{trace_filename}")
 
 
 def _do_export(transaction_records: List[TransactionRecord]) -> None:
@@ -51,6 +51,8 @@ class Config:
         "data_source_select": {},
         "data_source_fiat": DATA_SOURCE_FIAT,
         "data_source_crypto": DATA_SOURCE_CRYPTO,
+        "data_source_api_root": {},
+        "data_source_offline": False,
         "usernames": [],
         "coinbase_zero_fees_are_gifts": False,
         "binance_multi_bnb_split_even": False,
@@ -66,6 +68,8 @@ class Config:
 
     def __init__(self) -> None:
         self.debug = False
+        # Cached asset lists younger than this (in seconds) are used instead of fetching them
+        self.asset_list_max_age = 0
         self.start_of_year_month = 4
         self.start_of_year_day = 6
 
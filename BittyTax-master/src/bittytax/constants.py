@@ -16,6 +16,7 @@ CACHE_DIR = os.path.join(BITTYTAX_PATH, "cache")
 CONV_FORMAT_CSV = "CSV"
 CONV_FORMAT_EXCEL = "EXCEL"
 CONV_FORMAT_RECAP = "RECAP"
+CONV_FORMAT_BINARY = "BINARY"
 
 TAX_RULES_UK_INDIVIDUAL = "UK_INDIVIDUAL"
 TAX_RULES_UK_COMPANY = [
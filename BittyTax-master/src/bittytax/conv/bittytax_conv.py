@@ -14,8 +14,14 @@ import colorama
 from colorama import Fore
 
 from ..config import config
-from ..constants import CONV_FORMAT_CSV, CONV_FORMAT_EXCEL, CONV_FORMAT_RECAP
+from ..constants import (
+    CONV_FORMAT_BINARY,
+    CONV_FORMAT_CSV,
+    CONV_FORMAT_EXCEL,
+    CONV_FORMAT_RECAP,
+)
 from ..version import __version__
+from .datacache import DataCache
 from .datafile import DataFile
 from .datamerge import DataMerge
 from .dataparser import DataParser
@@ -27,6 +33,7 @@ from .exceptions import (
     UnknownUsernameError,
 )
 from .mergers import *  # pylint: disable=wildcard-import, unused-wildcard-import
+from .output_binary import OutputBinary
 from .output_csv import OutputCsv
 from .output_excel import OutputExcel
 from .parsers import *  # type: ignore[no-redef] # pylint: disable=wildcard-import, unused-wildcard-import # noqa: E501
@@ -81,7 +88,7 @@ def main() -> None:
     )
     parser.add_argument(
         "--format",
-        choices=[CONV_FORMAT_EXCEL, CONV_FORMAT_CSV, CONV_FORMAT_RECAP],
+        choices=[CONV_FORMAT_EXCEL, CONV_FORMAT_CSV, CONV_FORMAT_RECAP, CONV_FORMAT_BINARY],
         default=CONV_FORMAT_EXCEL,
         type=str.upper,
         help="specify the output format, default: EXCEL",
@@ -96,6 +103,18 @@ def main() -> None:
         help="append original data as extra columns in the CSV output",
     )
     parser.add_argument("-s", "--sort", action="store_true", help="sort CSV output by timestamp")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes used to read the worksheets of an Excel file, default: 1",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="cache the parsed data files, so unchanged files are not parsed again",
+    )
     parser.add_argument("-o", dest="output_filename", type=str, help="specify the output filename")
 
     args = parser.parse_args()
@@ -137,7 +156,10 @@ def main() -> None:
                     sys.stderr.write(_file_msg(pathname, None, msg="skipping duplicate"))
                 else:
                     file_hashes.add(file_hash)
-                    _do_read_file(file_type, pathname, args)
+                    if args.cache:
+                        _do_read_file_cached(file_type, pathname, file_hash, args)
+                    else:
+                        _do_read_file(file_type, pathname, args)
 
             except UnknownCryptoassetError as e:
                 sys.stderr.write(Fore.RESET)
@@ -167,6 +189,9 @@ def main() -> None:
         if args.format == CONV_FORMAT_EXCEL:
             output_excel = OutputExcel(parser.prog, DataFile.data_files_ordered, args)
             output_excel.write_excel()
+        elif args.format == CONV_FORMAT_BINARY:
+            output_binary = OutputBinary(DataFile.data_files_ordered, args)
+            output_binary.write_binary()
         else:
             output_csv = OutputCsv(DataFile.data_files_ordered, args)
             sys.stderr.write(Fore.RESET)
@@ -178,7 +203,17 @@ def main() -> None:
 
 
 def _do_read_file(file_type: str, pathname: str, args: argparse.Namespace) -> None:
-    if file_type == "zip":
+    if file_type in ("zip", "xls") and args.jobs > 1:
+        for worksheet_name, reader in DataFile.read_excel_parallel(pathname, file_type, args.jobs):
+            try:
+                DataFile.read_worksheet(reader, worksheet_name, pathname, args)
+            except DataFormatUnrecognised:
+                sys.stderr.write(_file_msg(pathname, worksheet_name, msg="unrecognised"))
+            except ValueError:
+                if file_type != "xls":
+                    raise
+                sys.stderr.write(_file_msg(pathname, worksheet_name, msg="unrecognised"))
+    elif file_type == "zip":
         for worksheet in DataFile.read_excel_xlsx(pathname):
             try:
                 DataFile.read_worksheet_xlsx(worksheet, pathname, args)
@@ -194,6 +229,32 @@ def _do_read_file(file_type: str, pathname: str, args: argparse.Namespace) -> No
         DataFile.read_csv(pathname, args)
 
 
+def _do_read_file_cached(
+    file_type: str, pathname: str, file_hash: str, args: argparse.Namespace
+) -> None:
+    data_cache = DataCache(file_hash, args)
+    data_files = data_cache.load()
+
+    if data_files is not None:
+        for data_file in data_files:
+            sys.stderr.write(
+                _file_msg(
+                    pathname,
+                    None,
+                    msg=f'matched as {Fore.CYAN}"{data_file.parser.name}" (cached)',
+                )
+            )
+            DataFile.consolidate_datafiles(data_file)
+        return
+
+    DataFile.data_files_read = []
+    try:
+        _do_read_file(file_type, pathname, args)
+        data_cache.save(DataFile.data_files_read)
+    finally:
+        DataFile.data_files_read = None
+
+
 def _get_file_info(filename: str) -> Tuple[str, str]:
     file_type = ""
 
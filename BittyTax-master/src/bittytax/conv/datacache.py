@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from ..bt_types import TrType, UnmappedType
+from ..config import config
+from ..constants import CACHE_DIR, TZ_UTC, WARNING
+from ..version import __version__
+from .datafile import DataFile
+from .dataparser import DataParser
+from .datarow import DEFAULT_TIMESTAMP, DataRow, RowDict, TxRawPos
+from .out_record import TransactionOutRecord
+
+CONV_CACHE_DIR = os.path.join(CACHE_DIR, "conv")
+
+# Options which change how a data file is parsed, or the values it's converted to
+CONFIG_OPTIONS = (
+    "ccy",
+    "fiat_list",
+    "local_timezone",
+    "date_is_day_first",
+    "usernames",
+    "coinbase_zero_fees_are_gifts",
+    "binance_statements_only",
+    "binance_multi_bnb_split_even",
+    "data_source_fiat",
+)
+
+
+class DataCache:
+    """The data files parsed from an input file, cached by the file's hash."""
+
+    CACHE_FORMAT = 1
+
+    def __init__(self, file_hash: str, args: argparse.Namespace) -> None:
+        options = {
+            "format": self.CACHE_FORMAT,
+            "version": __version__,
+            "unconfirmed": args.unconfirmed,
+            "cryptoasset": args.cryptoasset,
+            **{option: getattr(config, option) for option in CONFIG_OPTIONS},
+        }
+        key = hashlib.sha1(
+            f"{file_hash}{json.dumps(options, sort_keys=True, default=str)}".encode()
+        ).hexdigest()
+        self.filename = os.path.join(CONV_CACHE_DIR, key + ".json")
+
+    def load(self) -> Optional[List[DataFile]]:
+        if not os.path.exists(self.filename):
+            return None
+
+        try:
+            with open(self.filename, "r", encoding="utf-8") as data_cache:
+                return [self._load_data_file(json_file) for json_file in json.load(data_cache)]
+        except (IOError, ValueError, LookupError, TypeError):
+            sys.stderr.write(f"{WARNING} Data cached for {self.filename} could not be loaded\n")
+            return None
+
+    def save(self, data_files: List[DataFile]) -> bool:
+        if not data_files or not self._cacheable(data_files):
+            return False
+
+        try:
+            if not os.path.exists(CONV_CACHE_DIR):
+                os.makedirs(CONV_CACHE_DIR)
+
+            with open(self.filename, "w", encoding="utf-8") as data_cache:
+                json.dump([self._save_data_file(data_file) for data_file in data_files], data_cache)
+        except IOError:
+            sys.stderr.write(f"{WARNING} Data could not be cached to {self.filename}\n")
+            return False
+        return True
+
+    @staticmethod
+    def _cacheable(data_files: List[DataFile]) -> bool:
+        # Failures are reported again on every run, and values converted at the latest rate
+        #  could still change
+        today = datetime.now(TZ_UTC).date()
+        for data_file in data_files:
+            if data_file.failures:
+                return False
+
+            for data_row in data_file.data_rows:
+                if data_row.timestamp.tzinfo is not TZ_UTC:
+                    return False
+
+                if data_row.t_record and (
+                    data_row.t_record.timestamp.tzinfo is not TZ_UTC
+                    or data_row.t_record.timestamp.date() >= today
+                ):
+                    return False
+        return True
+
+    @staticmethod
+    def _save_data_file(data_file: DataFile) -> Dict[str, Any]:
+        parser = data_file.parser
+        in_header = parser.in_header
+
+        json_rows = []
+        for data_row in data_file.data_rows:
+            row_dict = dict(data_row.row_dict)
+            json_rows.append(
+                {
+                    "line_num": data_row.line_num,
+                    "row": data_row.row,
+                    # Only kept if it no longer matches the row, i.e. it was changed by a parser
+                    #  or merger, or it still has columns the parser removed from the row
+                    "row_dict": (
+                        row_dict if row_dict != dict(zip(in_header, data_row.row)) else None
+                    ),
+                    "timestamp": (
+                        data_row.timestamp.isoformat()
+                        if data_row.timestamp != DEFAULT_TIMESTAMP
+                        else None
+                    ),
+                    "t_record": DataCache._save_t_record(data_row.t_record),
+                    "tx_raw": (
+                        [
+                            data_row.tx_raw.tx_hash_pos,
+                            data_row.tx_raw.tx_src_pos,
+                            data_row.tx_raw.tx_dest_pos,
+                        ]
+                        if data_row.tx_raw
+                        else None
+                    ),
+                    "parsed": data_row.parsed,
+                }
+            )
+
+        return {
+            # Parsers can share a name, so the header identifies which one it is
+            "parser": next(
+                i for i, p in enumerate(DataParser.parsers) if p.header is parser.header
+            ),
+            "name": parser.name,
+            "worksheet_name": parser.worksheet_name,
+            "in_header": in_header,
+            "in_header_row_num": parser.in_header_row_num,
+            "data_rows": json_rows,
+        }
+
+    @staticmethod
+    def _save_t_record(t_record: Optional[TransactionOutRecord]) -> Optional[Dict[str, Any]]:
+        if t_record is None:
+            return None
+
+        return {
+            "t_type": t_record.t_type.value if isinstance(t_record.t_type, TrType) else None,
+            "unmapped_type": (t_record.t_type if not isinstance(t_record.t_type, TrType) else None),
+            "timestamp": t_record.timestamp.isoformat(),
+            "buy_quantity": DataCache._decimal_to_str(t_record.buy_quantity),
+            "buy_asset": t_record.buy_asset,
+            "buy_value": DataCache._decimal_to_str(t_record.buy_value),
+            "sell_quantity": DataCache._decimal_to_str(t_record.sell_quantity),
+            "sell_asset": t_record.sell_asset,
+            "sell_value": DataCache._decimal_to_str(t_record.sell_value),
+            "fee_quantity": DataCache._decimal_to_str(t_record.fee_quantity),
+            "fee_asset": t_record.fee_asset,
+            "fee_value": DataCache._decimal_to_str(t_record.fee_value),
+            "wallet": t_record.wallet,
+            "note": t_record.note,
+        }
+
+    @staticmethod
+    def _load_data_file(json_file: Dict[str, Any]) -> DataFile:
+        parser = DataParser.parsers[json_file["parser"]]
+        if parser.name != json_file["name"]:
+            raise ValueError(f"Parser mismatch: {json_file['name']}")
+
+        parser = copy.copy(parser)
+        parser.args = []
+        parser.worksheet_name = json_file["worksheet_name"]
+        parser.in_header = json_file["in_header"]
+        parser.in_header_map = {col: i for i, col in enumerate(parser.in_header)}
+        parser.in_header_row_num = json_file["in_header_row_num"]
+
+        data_file = DataFile(parser, iter([]))
+        column_maps = {len(parser.in_header): parser.in_header_map}
+        for json_row in json_file["data_rows"]:
+            row = json_row["row"]
+            columns = min(len(row), len(parser.in_header))
+            if columns not in column_maps:
+                column_maps[columns] = {col: i for i, col in enumerate(parser.in_header[:columns])}
+
+            data_row = DataRow(json_row["line_num"], row, column_maps[columns])
+            if json_row["row_dict"] is not None:
+                data_row.row_dict = RowDict(
+                    tuple(json_row["row_dict"].values()),
+                    {col: i for i, col in enumerate(json_row["row_dict"])},
+                )
+            if json_row["timestamp"] is not None:
+                data_row.timestamp = DataCache._str_to_timestamp(json_row["timestamp"])
+            data_row.t_record = DataCache._load_t_record(json_row["t_record"])
+            if json_row["tx_raw"] is not None:
+                data_row.tx_raw = TxRawPos(*json_row["tx_raw"])
+            data_row.parsed = json_row["parsed"]
+            data_file.data_rows.append(data_row)
+
+        return data_file
+
+    @staticmethod
+    def _load_t_record(json_record: Optional[Dict[str, Any]]) -> Optional[TransactionOutRecord]:
+        if json_record is None:
+            return None
+
+        return TransactionOutRecord(
+            (
+                TrType(json_record["t_type"])
+                if json_record["t_type"] is not None
+                else UnmappedType(json_record["unmapped_type"])
+            ),
+            DataCache._str_to_timestamp(json_record["timestamp"]),
+            buy_quantity=DataCache._str_to_decimal(json_record["buy_quantity"]),
+            buy_asset=json_record["buy_asset"],
+            buy_value=DataCache._str_to_decimal(json_record["buy_value"]),
+            sell_quantity=DataCache._str_to_decimal(json_record["sell_quantity"]),
+            sell_asset=json_record["sell_asset"],
+            sell_value=DataCache._str_to_decimal(json_record["sell_value"]),
+            fee_quantity=DataCache._str_to_decimal(json_record["fee_quantity"]),
+            fee_asset=json_record["fee_asset"],
+            fee_value=DataCache._str_to_decimal(json_record["fee_value"]),
+            wallet=json_record["wallet"],
+            note=json_record["note"],
+        )
+
+    @staticmethod
+    def _str_to_timestamp(timestamp: str) -> datetime:
+        # Only UTC timestamps are cached
+        return datetime.fromisoformat(timestamp).replace(tzinfo=TZ_UTC)
+
+    @staticmethod
+    def _decimal_to_str(decimal: Optional[Decimal]) -> Optional[str]:
+        if decimal is None:
+            return None
+        return str(decimal)
+
+    @staticmethod
+    def _str_to_decimal(decimal: Optional[str]) -> Optional[Decimal]:
+        if decimal is None:
+            return None
+        return Decimal(decimal)
@@ -4,11 +4,13 @@
 import argparse
 import copy
 import csv
+import functools
 import io
+import itertools
 import os
 import sys
 import warnings
-from typing import Dict, Iterator, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
 
 import openpyxl
 import xlrd
@@ -17,23 +19,33 @@ from typing_extensions import Unpack
 
 from ..config import config
 from ..constants import ERROR, WARNING
-from .dataparser import ConsolidateType, DataParser, ParserArgs
+from ..worksheet_pool import WorksheetPool
+from .dataparser import ConsolidateType, DataParser, ParseBatch, ParserArgs
 from .datarow import DataRow
 from .exceptions import DataFormatUnrecognised, DataRowError
 
 
 class DataFile:
     CSV_DELIMITERS = (",", ";")
+    # Header might not be on first line
+    HEADER_ROWS = 14
 
     remove_duplicates = False
     data_files: Dict["DataFile", "DataFile"] = {}
     data_files_ordered: List["DataFile"] = []
+    data_files_read: Optional[List["DataFile"]] = None
 
     def __init__(self, parser: DataParser, reader: Iterator[List[str]]) -> None:
         self.parser = copy.copy(parser)
-        self.data_rows = [
-            DataRow(line_num + 1, row, parser.in_header) for line_num, row in enumerate(reader)
-        ]
+        self.data_rows = []
+
+        column_maps = {len(parser.in_header): parser.in_header_map}
+        for line_num, row in enumerate(reader):
+            columns = min(len(row), len(parser.in_header))
+            if columns not in column_maps:
+                # A short row only has the leading columns
+                column_maps[columns] = {col: i for i, col in enumerate(parser.in_header[:columns])}
+            self.data_rows.append(DataRow(line_num + 1, row, column_maps[columns]))
         self.failures: List[DataRow] = []
 
     def __eq__(self, other: object) -> bool:
@@ -80,21 +92,20 @@ class DataFile:
         return self
 
     def parse(self, **kwargs: Unpack[ParserArgs]) -> None:
-        if self.parser.row_handler:
-            for data_row in self.data_rows:
-                if config.debug:
-                    if self.parser.in_header_row_num is None:
-                        raise RuntimeError("Missing in_header_row_num")
+        # Exchange rates which aren't cached are collected during the first pass, and fetched
+        #  together, then only the rows which used them are parsed again
+        DataParser.batch = batch = ParseBatch()
+        try:
+            data_rows = self._parse(self.data_rows, **kwargs)
+            if batch.rates_needed:
+                DataParser.fetch_rates(batch.rates_needed)
+                batch.collect = False
 
-                    sys.stderr.write(
-                        f"{Fore.YELLOW}conv: "
-                        f"row[{self.parser.in_header_row_num + data_row.line_num}] {data_row}\n"
-                    )
-
-                data_row.parse(self.parser, **kwargs)
-        else:
-            # All rows handled together
-            DataRow.parse_all(self.data_rows, self.parser, **kwargs)
+                for data_row in data_rows:
+                    data_row.reset()
+                self._parse(data_rows, **kwargs)
+        finally:
+            DataParser.batch = None
 
         self.failures = [dr for dr in self.data_rows if dr.failure is not None]
 
@@ -114,6 +125,33 @@ class DataFile:
                 else:
                     sys.stderr.write(f'{ERROR} Unexpected error: "{data_row.failure}"\n')
 
+    def _parse(self, data_rows: List[DataRow], **kwargs: Unpack[ParserArgs]) -> List[DataRow]:
+        batch = DataParser.batch
+        provisional_rows = []
+
+        if self.parser.row_handler:
+            for data_row in data_rows:
+                if config.debug:
+                    if self.parser.in_header_row_num is None:
+                        raise RuntimeError("Missing in_header_row_num")
+
+                    sys.stderr.write(
+                        f"{Fore.YELLOW}conv: "
+                        f"row[{self.parser.in_header_row_num + data_row.line_num}] {data_row}\n"
+                    )
+
+                provisional = batch.provisional if batch else 0
+                data_row.parse(self.parser, **kwargs)
+                if batch and batch.provisional > provisional:
+                    provisional_rows.append(data_row)
+        else:
+            # All rows handled together
+            DataRow.parse_all(data_rows, self.parser, **kwargs)
+            if batch and batch.provisional:
+                provisional_rows = data_rows
+
+        return provisional_rows
+
     @classmethod
     def read_excel_xlsx(cls, filename: str) -> Iterator[xlrd.sheet.Sheet]:
         warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
@@ -147,31 +185,8 @@ class DataFile:
         filename: str,
         args: argparse.Namespace,
     ) -> None:
-        reader = cls.get_cell_values_xlsx(worksheet.rows)
-        parser = cls.get_parser(reader)
-
-        if parser is None:
-            raise DataFormatUnrecognised(filename, worksheet.title)
-
-        sys.stderr.write(
-            f"{Fore.WHITE}file: {Fore.YELLOW}{filename} '{worksheet.title}' "
-            f'{Fore.WHITE}matched as {Fore.CYAN}"{parser.name}"\n'
-        )
-
-        if parser.deprecated:
-            sys.stderr.write(
-                f'{WARNING} This parser is deprecated, please use "{parser.deprecated.name}"\n'
-            )
-
-        data_file = DataFile(parser, reader)
-        data_file.parse(
-            filename=filename,
-            worksheet=worksheet.title,
-            unconfirmed=args.unconfirmed,
-            cryptoasset=args.cryptoasset,
-        )
-
-        cls.consolidate_datafiles(data_file)
+        reader = cls.get_cell_values_xlsx(worksheet.iter_rows(values_only=True))
+        cls.read_worksheet(reader, worksheet.title, filename, args)
 
     @classmethod
     def read_excel_xls(cls, filename: str) -> Iterator[Tuple[xlrd.sheet.Sheet, int]]:
@@ -192,13 +207,47 @@ class DataFile:
         cls, worksheet: xlrd.sheet.Sheet, datemode: int, filename: str, args: argparse.Namespace
     ) -> None:
         reader = cls.get_cell_values_xls(worksheet.get_rows(), datemode)
+        cls.read_worksheet(reader, worksheet.name, filename, args)
+
+    @classmethod
+    def read_excel_parallel(
+        cls, filename: str, file_type: str, jobs: int
+    ) -> Iterator[Tuple[str, Iterator[List[str]]]]:
+        with WorksheetPool(filename, jobs) as pool:
+            try:
+                sheet_names = pool.sheet_names()
+                if file_type == "xls":
+                    convert_row: Callable[[Sequence[Any]], List[str]] = functools.partial(
+                        cls.get_row_values_xls, datemode=pool.datemode()
+                    )
+                else:
+                    convert_row = cls.get_row_values_xlsx
+            except (IOError, KeyError, xlrd.XLRDError, xlrd.compdoc.CompDocError) as e:
+                raise DataFormatUnrecognised(filename) from e
+
+            if config.debug:
+                sys.stderr.write(f"{Fore.CYAN}conv: EXCEL\n")
+
+            # Worksheets are read in parallel, but parsed in order
+            worksheets = pool.read(sheet_names, convert_row, values_only=True)
+            for sheet_name, rows in zip(sheet_names, worksheets):
+                yield sheet_name, iter(rows)
+
+    @classmethod
+    def read_worksheet(
+        cls,
+        reader: Iterator[List[str]],
+        worksheet_name: str,
+        filename: str,
+        args: argparse.Namespace,
+    ) -> None:
         parser = cls.get_parser(reader)
 
         if parser is None:
-            raise DataFormatUnrecognised(filename, worksheet.name)
+            raise DataFormatUnrecognised(filename, worksheet_name)
 
         sys.stderr.write(
-            f"{Fore.WHITE}file: {Fore.YELLOW}{filename} '{worksheet.name}' "
+            f"{Fore.WHITE}file: {Fore.YELLOW}{filename} '{worksheet_name}' "
             f'{Fore.WHITE}matched as {Fore.CYAN}"{parser.name}"\n'
         )
 
@@ -210,7 +259,7 @@ class DataFile:
         data_file = DataFile(parser, reader)
         data_file.parse(
             filename=filename,
-            worksheet=worksheet.name,
+            worksheet=worksheet_name,
             unconfirmed=args.unconfirmed,
             cryptoasset=args.cryptoasset,
         )
@@ -218,22 +267,30 @@ class DataFile:
         cls.consolidate_datafiles(data_file)
 
     @staticmethod
-    def get_cell_values_xlsx(rows: List[openpyxl.cell.cell.Cell]) -> Iterator[List[str]]:
+    def get_cell_values_xlsx(rows: Iterator[Tuple[Any, ...]]) -> Iterator[List[str]]:
         for row in rows:
-            yield [DataFile.convert_cell_xlsx(cell) for cell in row]
+            yield DataFile.get_row_values_xlsx(row)
+
+    @staticmethod
+    def get_row_values_xlsx(row: Sequence[Any]) -> List[str]:
+        return [DataFile.convert_cell_xlsx(value) for value in row]
 
     @staticmethod
-    def convert_cell_xlsx(cell: openpyxl.cell.cell.Cell) -> str:
-        if cell.value is None:
+    def convert_cell_xlsx(value: Any) -> str:
+        if value is None:
             return ""
-        return str(cell.value)
+        return str(value)
 
     @staticmethod
     def get_cell_values_xls(
         rows: Iterator[List[xlrd.sheet.Cell]], datemode: int
     ) -> Iterator[List[str]]:
         for row in rows:
-            yield [DataFile.convert_cell_xls(cell, datemode) for cell in row]
+            yield DataFile.get_row_values_xls(row, datemode)
+
+    @staticmethod
+    def get_row_values_xls(row: Sequence[xlrd.sheet.Cell], datemode: int) -> List[str]:
+        return [DataFile.convert_cell_xls(cell, datemode) for cell in row]
 
     @staticmethod
     def convert_cell_xls(cell: xlrd.sheet.Cell, datemode: int) -> str:
@@ -286,15 +343,37 @@ class DataFile:
     @classmethod
     def read_csv_with_delimiter(cls, filename: str) -> Iterator[Iterator[List[str]]]:
         with io.open(filename, newline="", encoding="utf-8-sig") as csv_file:
+            # The lines which can contain the header are read once, and matched with each
+            #  delimiter, the rest of the file is then read on from where they end
+            header_lines = cls._read_header_lines(csv_file, filename)
+
             for delimiter in cls.CSV_DELIMITERS:
                 if config.debug:
                     sys.stderr.write(f"{Fore.CYAN}conv: CSV delimiter='{delimiter}'\n")
 
-                yield csv.reader(csv_file, delimiter=delimiter)
-                csv_file.seek(0)
+                reader = csv.reader(itertools.chain(header_lines, csv_file), delimiter=delimiter)
+                yield reader
+
+                if reader.line_num > len(header_lines):
+                    # Header rows spanning multiple lines were read past the buffer
+                    csv_file.seek(0)
+                    header_lines = cls._read_header_lines(csv_file, filename)
+
+    @classmethod
+    def _read_header_lines(cls, csv_file: TextIO, filename: str) -> List[str]:
+        try:
+            return list(itertools.islice(csv_file, cls.HEADER_ROWS))
+        except UnicodeDecodeError as e:
+            raise DataFormatUnrecognised(filename) from e
 
     @classmethod
     def consolidate_datafiles(cls, data_file: "DataFile") -> None:
+        if cls.data_files_read is not None:
+            # As it was read, before any other data files are consolidated into it
+            data_file_read = copy.copy(data_file)
+            data_file_read.data_rows = list(data_file.data_rows)
+            cls.data_files_read.append(data_file_read)
+
         if (
             data_file.parser.consolidate_type is not ConsolidateType.NEVER
             and data_file in cls.data_files
@@ -307,8 +386,7 @@ class DataFile:
     @staticmethod
     def get_parser(reader: Iterator[List[str]]) -> Optional[DataParser]:
         parser = None
-        # Header might not be on first line
-        for row in range(14):
+        for row in range(DataFile.HEADER_ROWS):
             try:
                 parser = DataParser.match_header(next(reader), row)
             except KeyError:
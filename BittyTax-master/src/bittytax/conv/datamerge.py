@@ -106,6 +106,8 @@ class DataMerge:  # pylint: disable=too-few-public-methods
 
 
 class MergeDataRow:  # pylint: disable=too-few-public-methods
+    __slots__ = ("data_row", "data_file", "data_file_id", "quantity")
+
     def __init__(self, data_row: "DataRow", data_file: "DataFile", data_file_id: str):
         self.data_row = data_row
         self.data_file = data_file
@@ -2,17 +2,18 @@
 # (c) Nano Nano Ltd 2019
 
 import sys
+from dataclasses import dataclass, field
 from datetime import datetime, tzinfo
 from decimal import Decimal
 from enum import Enum, auto
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import dateutil.parser
 import dateutil.tz
 from colorama import Fore, Style
 from typing_extensions import NotRequired, Protocol, TypedDict, Unpack
 
-from ..bt_types import AssetSymbol, Timestamp
+from ..bt_types import AssetSymbol, Date, Timestamp
 from ..config import config
 from ..constants import TZ_UTC
 from ..price.pricedata import PriceData
@@ -77,6 +78,20 @@ class ParserArgs(TypedDict):  # pylint: disable=too-few-public-methods, too-many
     cryptoasset: str
 
 
+@dataclass
+class ParseBatch:
+    """State shared by the passes of a file's parse, the first pass collects the exchange rates
+    which aren't cached, and values converted with them are provisional until they're fetched."""
+
+    collect: bool = True
+    rates_needed: Set[Tuple[AssetSymbol, Date]] = field(default_factory=set)
+    provisional: int = 0
+    rates: Dict[Tuple[str, Date], Decimal] = field(default_factory=dict)
+    timestamps: Dict[Tuple[Union[str, int, float], Optional[str], bool, bool], datetime] = field(
+        default_factory=dict
+    )
+
+
 class DataParser:  # pylint: disable=too-many-instance-attributes
     LIST_ORDER = (
         ParserType.WALLET,
@@ -89,6 +104,7 @@ class DataParser:  # pylint: disable=too-many-instance-attributes
 
     price_data = PriceData(config.data_source_fiat)
     parsers: List["DataParser"] = []
+    batch: Optional[ParseBatch] = None
 
     def __init__(
         self,
@@ -115,6 +131,7 @@ class DataParser:  # pylint: disable=too-many-instance-attributes
         self.consolidate_type = consolidate_type
         self.args: List[Any] = []
         self.in_header: List[str] = []
+        self.in_header_map: Dict[str, int] = {}
         self.in_header_row_num: Optional[int] = None
 
         self.parsers.append(self)
@@ -150,6 +167,24 @@ class DataParser:  # pylint: disable=too-many-instance-attributes
         tz: Optional[str] = None,
         dayfirst: bool = False,
         fuzzy: bool = False,
+    ) -> datetime:
+        if cls.batch is None or tzinfos is not None:
+            return cls._parse_timestamp(timestamp_str, tzinfos, tz, dayfirst, fuzzy)
+
+        key = (timestamp_str, tz, dayfirst, fuzzy)
+        if key not in cls.batch.timestamps:
+            cls.batch.timestamps[key] = cls._parse_timestamp(
+                timestamp_str, tzinfos, tz, dayfirst, fuzzy
+            )
+        return cls.batch.timestamps[key]
+
+    @staticmethod
+    def _parse_timestamp(
+        timestamp_str: Union[str, int, float],
+        tzinfos: Optional[Dict[str, Optional[tzinfo]]],
+        tz: Optional[str],
+        dayfirst: bool,
+        fuzzy: bool,
     ) -> datetime:
         if isinstance(timestamp_str, (int, float)):
             timestamp = datetime.utcfromtimestamp(timestamp_str)
@@ -179,27 +214,48 @@ class DataParser:  # pylint: disable=too-many-instance-attributes
         if not value or value is None:
             return None
 
-        if not Decimal(value):
+        amount = Decimal(value)
+        if not amount:
             return Decimal(0)
 
         if config.ccy == from_currency:
-            return Decimal(value)
+            return amount
 
-        if timestamp.date() >= datetime.now().date():
+        date = Date(timestamp.date())
+        if cls.batch and (from_currency, date) in cls.batch.rates:
+            rate_ccy: Optional[Decimal] = cls.batch.rates[(from_currency, date)]
+        elif date >= datetime.now().date():
             rate_ccy, _, _ = cls.price_data.get_latest(AssetSymbol(from_currency), config.ccy)
+        elif (
+            cls.batch
+            and cls.batch.collect
+            and (
+                (from_currency, date) in cls.batch.rates_needed
+                or not cls.price_data.is_historical_cached(
+                    AssetSymbol(from_currency), config.ccy, date
+                )
+            )
+        ):
+            # Value is provisional, the row is parsed again once the rate has been fetched
+            cls.batch.rates_needed.add((AssetSymbol(from_currency), date))
+            cls.batch.provisional += 1
+            return amount
         else:
             rate_ccy, _, _, _ = cls.price_data.get_historical(
                 AssetSymbol(from_currency), config.ccy, Timestamp(timestamp)
             )
 
         if rate_ccy is not None:
-            value_in_ccy = Decimal(value) * rate_ccy
+            if cls.batch:
+                cls.batch.rates[(from_currency, date)] = rate_ccy
+
+            value_in_ccy = amount * rate_ccy
 
             if config.debug:
                 sys.stderr.write(
                     f"{Fore.YELLOW}price: {timestamp:%Y-%m-%d}, 1 {from_currency}="
                     f"{config.sym()}{rate_ccy:0,.2f} {config.ccy}, "
-                    f"{Decimal(value).normalize():0,f} {from_currency}="
+                    f"{amount.normalize():0,f} {from_currency}="
                     f"{Style.BRIGHT}{config.sym()}{value_in_ccy:0,.2f} "
                     f"{config.ccy}{Style.NORMAL}\n"
                 )
@@ -207,6 +263,17 @@ class DataParser:  # pylint: disable=too-many-instance-attributes
             return value_in_ccy
         raise CurrencyConversionError(from_currency, config.ccy, timestamp)
 
+    @classmethod
+    def fetch_rates(cls, rates_needed: Set[Tuple[AssetSymbol, Date]]) -> None:
+        dates: Dict[AssetSymbol, Set[Date]] = {}
+        for currency, date in rates_needed:
+            if currency not in dates:
+                dates[currency] = set()
+            dates[currency].add(date)
+
+        for currency in sorted(dates):
+            cls.price_data.prefetch_historical(currency, config.ccy, dates[currency])
+
     @classmethod
     def match_header(cls, row: List[str], row_num: int) -> "DataParser":
         row = [col.strip() for col in row]
@@ -248,6 +315,7 @@ class DataParser:  # pylint: disable=too-many-instance-attributes
 
             if match:
                 parser.in_header = row
+                parser.in_header_map = {col: i for i, col in enumerate(row)}
                 parser.in_header_row_num = row_num + 1
                 return parser
 
@@ -289,6 +357,7 @@ class DataParser:  # pylint: disable=too-many-instance-attributes
 
             if match:
                 parser.in_header = row
+                parser.in_header_map = {col: i for i, col in enumerate(row)}
                 parser.in_header_row_num = row_num + 1
                 return parser
 
@@ -3,7 +3,7 @@
 
 import datetime
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, Iterator, List, MutableMapping, Optional, Tuple, Union
 
 from colorama import Back, Fore
 from typing_extensions import Unpack
@@ -24,17 +24,68 @@ class TxRawPos:
     tx_dest_pos: Optional[int] = None
 
 
+class RowDict(MutableMapping[str, str]):
+    """The row's values by column name, looked up through the column map shared by every row of
+    the file, rather than a dict per row."""
+
+    __slots__ = ("_values", "_columns")
+
+    def __init__(self, values: Tuple[str, ...], columns: Dict[str, int]) -> None:
+        self._values: Union[Tuple[str, ...], List[str]] = values
+        self._columns = columns
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[self._columns[key]]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __setitem__(self, key: str, value: str) -> None:
+        values = self._copy_on_write()
+        if key in self._columns:
+            values[self._columns[key]] = value
+        else:
+            self._columns[key] = len(values)
+            values.append(value)
+
+    def __delitem__(self, key: str) -> None:
+        self._copy_on_write()
+        del self._columns[key]
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def _copy_on_write(self) -> List[str]:
+        if not isinstance(self._values, list):
+            self._values = list(self._values)
+            self._columns = dict(self._columns)
+        return self._values
+
+
 class DataRow:
-    def __init__(self, line_num: int, row: List[str], in_header: List[str]) -> None:
+    def __init__(self, line_num: int, row: List[str], columns: Dict[str, int]) -> None:
         self.line_num = line_num
         self.row = row
-        self.row_dict = dict(zip(in_header, row))
+        self.row_dict = RowDict(tuple(row), columns)
         self.timestamp = DEFAULT_TIMESTAMP
         self.t_record: Optional[TransactionOutRecord] = None
         self.tx_raw: Optional[TxRawPos] = None
         self.parsed = False
         self.failure: Optional[Exception] = None
 
+    def reset(self) -> None:
+        self.timestamp = DEFAULT_TIMESTAMP
+        self.t_record = None
+        self.tx_raw = None
+        self.parsed = False
+        self.failure = None
+
     def parse(self, parser: DataParser, **kwargs: Unpack["ParserArgs"]) -> None:
         if not parser.row_handler:
             raise RuntimeError("Missing row_handler")
@@ -2,9 +2,10 @@
 # (c) Nano Nano Ltd 2021
 
 import copy
+import itertools
 import sys
 from decimal import Decimal
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
 from colorama import Fore
 
@@ -59,38 +60,34 @@ def _do_merge_etherscan(
                 tx_ids[wallet] = {}
 
             if "Txhash" in dr.row_dict:
-                dr.row_dict["Transaction Hash"] = dr.row_dict["Txhash"]
+                tx_hash = dr.row_dict["Txhash"]
+            else:
+                tx_hash = dr.row_dict["Transaction Hash"]
 
-            if dr.row_dict["Transaction Hash"] not in tx_ids[wallet]:
-                tx_ids[wallet][dr.row_dict["Transaction Hash"]] = []
+            if tx_hash not in tx_ids[wallet]:
+                tx_ids[wallet][tx_hash] = []
 
-            tx_ids[wallet][dr.row_dict["Transaction Hash"]].append(
-                MergeDataRow(dr, data_files[file_id], file_id)
-            )
+            tx_ids[wallet][tx_hash].append(MergeDataRow(dr, data_files[file_id], file_id))
 
-    for _, wallet_tx_ids in tx_ids.items():
-        for txn in wallet_tx_ids:
-            if len(wallet_tx_ids[txn]) == 1:
+    for wallet_tx_ids in tx_ids.values():
+        for txn, t_group in wallet_tx_ids.items():
+            if len(t_group) == 1:
                 if config.debug:
                     sys.stderr.write(
-                        f"{Fore.BLUE}merge: {wallet_tx_ids[txn][0].data_file_id:<5}:"
-                        f"{wallet_tx_ids[txn][0].data_row}\n"
+                        f"{Fore.BLUE}merge: {t_group[0].data_file_id:<5}:{t_group[0].data_row}\n"
                     )
                 continue
 
-            for t in wallet_tx_ids[txn]:
-                if config.debug:
+            if config.debug:
+                for t in t_group:
                     sys.stderr.write(f"{Fore.GREEN}merge: {t.data_file_id:<5}:{t.data_row}\n")
 
-            t_ins, t_outs, t_fee = _get_ins_outs(wallet_tx_ids[txn])
-
-            if config.debug:
-                _output_records(t_ins, t_outs, t_fee)
+                _output_records(*_get_ins_outs(t_group))
                 sys.stderr.write(f"{Fore.YELLOW}merge:     consolidate:\n")
 
-            _consolidate(wallet_tx_ids[txn], [TXNS, INTERNAL_TXNS])
+            t_group = _consolidate(t_group, (TXNS, INTERNAL_TXNS))
 
-            t_ins, t_outs, t_fee = _get_ins_outs(wallet_tx_ids[txn])
+            t_ins, t_outs, t_fee = _get_ins_outs(t_group)
 
             if config.debug:
                 _output_records(t_ins, t_outs, t_fee)
@@ -116,7 +113,7 @@ def _do_merge_etherscan(
                 # Multi-sell to multi-buy trade not supported
                 sys.stderr.write(f"{WARNING} Merge failure for Transaction Hash: {txn}\n")
 
-                for mdr in wallet_tx_ids[txn]:
+                for mdr in t_group:
                     if "Txhash" in mdr.data_row.row_dict:
                         mdr.data_row.failure = UnexpectedContentError(
                             mdr.data_file.parser.in_header.index("Txhash"),
@@ -145,7 +142,7 @@ def _do_merge_etherscan(
                     raise RuntimeError("Missing fee_quantity")
 
                 # Split fees
-                t_all = [t for t in t_ins_orig + t_outs if t.t_record]
+                t_all = [t for t in itertools.chain(t_ins_orig, t_outs) if t.t_record]
                 _do_fee_split(t_all, t_fee, fee_quantity, fee_asset)
 
             merge = True
@@ -159,50 +156,58 @@ def _do_merge_etherscan(
 def _get_ins_outs(
     tx_ids: List[MergeDataRow],
 ) -> Tuple[List["DataRow"], List["DataRow"], Optional["DataRow"]]:
-    t_ins = [
-        t.data_row
-        for t in tx_ids
-        if t.data_row.t_record and t.data_row.t_record.t_type is TrType.DEPOSIT
-    ]
-    t_outs = [
-        t.data_row
-        for t in tx_ids
-        if t.data_row.t_record and t.data_row.t_record.t_type is TrType.WITHDRAWAL
-    ]
-    t_fees = [
-        t.data_row for t in tx_ids if t.data_row.t_record and t.data_row.t_record.fee_quantity
-    ]
-
-    if not t_fees:
-        t_fee = None
-    elif len(t_fees) == 1:
-        t_fee = t_fees[0]
-    else:
-        raise ValueError("Multiple fees")
+    t_ins: List["DataRow"] = []
+    t_outs: List["DataRow"] = []
+    t_fee: Optional["DataRow"] = None
+
+    for t in tx_ids:
+        t_record = t.data_row.t_record
+        if not t_record:
+            continue
+
+        if t_record.t_type is TrType.DEPOSIT:
+            t_ins.append(t.data_row)
+        elif t_record.t_type is TrType.WITHDRAWAL:
+            t_outs.append(t.data_row)
+
+        if t_record.fee_quantity:
+            if t_fee:
+                raise ValueError("Multiple fees")
+            t_fee = t.data_row
 
     return t_ins, t_outs, t_fee
 
 
-def _consolidate(tx_ids: List[MergeDataRow], file_ids: List[str]) -> None:
-    tx_assets = {}
+def _consolidate(tx_ids: List[MergeDataRow], file_ids: Tuple[str, ...]) -> List[MergeDataRow]:
+    tx_assets: Dict[str, MergeDataRow] = {}
+    consolidated: Set[MergeDataRow] = set()
+    fees = 0
 
-    for txn in list(tx_ids):
-        if txn.data_file_id not in file_ids:
+    for txn in tx_ids:
+        if not txn.data_row.t_record:
             continue
 
-        if not txn.data_row.t_record:
+        if txn.data_row.t_record.fee_quantity:
+            fees += 1
+
+        if txn.data_file_id not in file_ids:
             continue
 
         asset = txn.data_row.t_record.get_asset()
         if asset not in tx_assets:
             tx_assets[asset] = txn
-            tx_assets[asset].quantity += txn.data_row.t_record.get_quantity()
         else:
-            tx_assets[asset].quantity += txn.data_row.t_record.get_quantity()
-            txn.data_row.t_record = None
-            tx_ids.remove(txn)
+            consolidated.add(txn)
+        tx_assets[asset].quantity += txn.data_row.t_record.get_quantity()
+
+    # More than one fee cannot be split, so this is checked before any records are changed
+    if fees > 1:
+        raise ValueError("Multiple fees")
 
-    for _, txn in tx_assets.items():
+    for txn in consolidated:
+        txn.data_row.t_record = None
+
+    for asset, txn in tx_assets.items():
         if not txn.data_row.t_record:
             continue
 
@@ -226,7 +231,11 @@ def _consolidate(tx_ids: List[MergeDataRow], file_ids: List[str]) -> None:
                 txn.data_row.t_record.sell_asset = asset
                 txn.data_row.t_record.sell_quantity = Decimal(0)
             else:
-                tx_ids.remove(txn)
+                consolidated.add(txn)
+
+    if not consolidated:
+        return tx_ids
+    return [txn for txn in tx_ids if txn not in consolidated]
 
 
 def _output_records(
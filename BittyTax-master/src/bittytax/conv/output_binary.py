@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+import argparse
+import os
+import sys
+from typing import Dict, List
+
+from colorama import Fore
+
+from ..binary_records import BinaryRecord, BinaryRecordWriter
+from ..bt_types import TrType
+from ..config import config
+from .datafile import DataFile
+from .datarow import DataRow
+from .output_csv import OutputBase
+
+
+class OutputBinary(OutputBase):
+    FILE_EXTENSION = "btr"
+
+    def __init__(self, data_files: List[DataFile], args: argparse.Namespace) -> None:
+        super().__init__(data_files)
+        self.filename = self.get_output_filename(args.output_filename, self.FILE_EXTENSION)
+        self.worksheet_names: Dict[str, int] = {}
+
+    def write_binary(self) -> None:
+        with open(self.filename, "wb") as binary_file:
+            writer = BinaryRecordWriter(binary_file, config.ccy)
+
+            # Worksheets and rows are in the same order as the Excel output
+            data_files = sorted(self.data_files, key=lambda df: df.parser.worksheet_name)
+            for data_file in data_files:
+                data_rows = sorted(data_file.data_rows, key=lambda dr: dr.timestamp)
+                writer.write_worksheet(
+                    self._worksheet_name(data_file.parser.worksheet_name),
+                    [self._to_binary(data_row) for data_row in data_rows if data_row.t_record],
+                )
+
+        sys.stderr.write(
+            f"{Fore.WHITE}output BINARY file created: "
+            f"{Fore.YELLOW}{os.path.abspath(self.filename)}\n"
+        )
+
+    def _worksheet_name(self, name: str) -> str:
+        if name.lower() not in self.worksheet_names:
+            self.worksheet_names[name.lower()] = 1
+            return name
+
+        self.worksheet_names[name.lower()] += 1
+        return f"{name}({self.worksheet_names[name.lower()]})"
+
+    @staticmethod
+    def _to_binary(data_row: DataRow) -> BinaryRecord:
+        tr = data_row.t_record
+        if tr is None:
+            raise RuntimeError("Missing t_record")
+
+        tx_hash = tx_src = tx_dest = ""
+        if data_row.tx_raw:
+            if data_row.tx_raw.tx_hash_pos is not None:
+                tx_hash = data_row.row[data_row.tx_raw.tx_hash_pos]
+            if data_row.tx_raw.tx_src_pos is not None:
+                tx_src = data_row.row[data_row.tx_raw.tx_src_pos]
+            if data_row.tx_raw.tx_dest_pos is not None:
+                tx_dest = data_row.row[data_row.tx_raw.tx_dest_pos]
+
+        return BinaryRecord(
+            t_type=tr.t_type.value if isinstance(tr.t_type, TrType) else tr.t_type,
+            buy_quantity=tr.buy_quantity,
+            buy_asset=tr.buy_asset,
+            buy_value=tr.buy_value,
+            sell_quantity=tr.sell_quantity,
+            sell_asset=tr.sell_asset,
+            sell_value=tr.sell_value,
+            fee_quantity=tr.fee_quantity,
+            fee_asset=tr.fee_asset,
+            fee_value=tr.fee_value,
+            wallet=tr.wallet,
+            timestamp=tr.timestamp,
+            note=tr.note,
+            tx_hash=tx_hash,
+            tx_src=tx_src,
+            tx_dest=tx_dest,
+        )
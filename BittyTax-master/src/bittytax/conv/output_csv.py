@@ -3,11 +3,13 @@
 
 import argparse
 import csv
+import heapq
+import itertools
 import os
 import sys
 from datetime import datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING, List, Optional, Union
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Union
 
 import _csv
 from colorama import Fore
@@ -19,6 +21,7 @@ from .out_record import TransactionOutRecord
 
 if TYPE_CHECKING:
     from .datafile import DataFile
+    from .datarow import DataRow
 
 
 class OutputBase:  # pylint: disable=too-few-public-methods
@@ -144,13 +147,6 @@ class OutputCsv(OutputBase):
             self.write_rows(writer)
 
     def write_rows(self, writer: "_csv._writer") -> None:
-        data_rows = []
-        for data_file in self.data_files:
-            data_rows.extend(data_file.data_rows)
-
-        if self.sort:
-            data_rows = sorted(data_rows, key=lambda dr: dr.timestamp, reverse=False)
-
         if not self.no_header:
             if self.append_raw_data:
                 writer.writerow(
@@ -159,15 +155,33 @@ class OutputCsv(OutputBase):
             else:
                 writer.writerow(self.out_header())
 
+        writer.writerows(self._csv_rows(self._data_rows()))
+
+    def _data_rows(self) -> Iterator["DataRow"]:
+        if self.sort:
+            # Each data file is sorted on its own and then merged, instead of sorting a copy of
+            #  every row, ties keep the order of the data files, as a stable sort would
+            return heapq.merge(
+                *(
+                    sorted(data_file.data_rows, key=lambda dr: dr.timestamp)
+                    for data_file in self.data_files
+                ),
+                key=lambda dr: dr.timestamp,
+            )
+        return itertools.chain.from_iterable(data_file.data_rows for data_file in self.data_files)
+
+    def _csv_rows(self, data_rows: Iterable["DataRow"]) -> Iterator[List[str]]:
+        empty_record = [""] * len(self.out_header())
+
         for data_row in data_rows:
             if self.append_raw_data:
                 if data_row.t_record:
-                    writer.writerow(self._to_csv(data_row.t_record) + data_row.row)
+                    yield self._to_csv(data_row.t_record) + data_row.row
                 else:
-                    writer.writerow([None] * len(self.out_header()) + data_row.row)
+                    yield empty_record + data_row.row
             else:
                 if data_row.t_record:
-                    writer.writerow(self._to_csv(data_row.t_record))
+                    yield self._to_csv(data_row.t_record)
 
     def _to_csv(self, t_record: TransactionOutRecord) -> List[str]:
         if self.csv_format == CONV_FORMAT_RECAP:
@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 # (c) Nano Nano Ltd 2019
 
+import heapq
 import re
 import sys
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from colorama import Fore
 from typing_extensions import Unpack
@@ -297,13 +298,18 @@ def parse_binance_deposits_withdrawals_cash(
 def parse_binance_statements(
     data_rows: List["DataRow"], parser: DataParser, **_kwargs: Unpack[ParserArgs]
 ) -> None:
-    tx_times: Dict[datetime, List["DataRow"]] = {}
+    tx_ops: Dict[Tuple[datetime, str], List["DataRow"]] = {}
     for dr in data_rows:
         dr.timestamp = DataParser.parse_timestamp(dr.row_dict["UTC_Time"])
-        if dr.timestamp in tx_times:
-            tx_times[dr.timestamp].append(dr)
+        tx_op = (dr.timestamp, dr.row_dict["Operation"])
+        if tx_op in tx_ops:
+            tx_ops[tx_op].append(dr)
         else:
-            tx_times[dr.timestamp] = [dr]
+            tx_ops[tx_op] = [dr]
+
+    # Reversed, so that rows at the start which have been parsed can be popped off the end
+    for op_rows in tx_ops.values():
+        op_rows.reverse()
 
     for data_row in data_rows:
         if config.debug:
@@ -319,7 +325,7 @@ def parse_binance_statements(
             continue
 
         try:
-            _parse_binance_statements_row(tx_times, parser, data_row)
+            _parse_binance_statements_row(tx_ops, parser, data_row)
         except DataRowError as e:
             data_row.failure = e
         except (ValueError, ArithmeticError) as e:
@@ -330,16 +336,16 @@ def parse_binance_statements(
 
 
 def _parse_binance_statements_row(
-    tx_times: Dict[datetime, List["DataRow"]], parser: DataParser, data_row: "DataRow"
+    tx_ops: Dict[Tuple[datetime, str], List["DataRow"]], parser: DataParser, data_row: "DataRow"
 ) -> None:
     row_dict = data_row.row_dict
 
     if row_dict["Account"] in ("USDT-Futures", "USD-MFutures", "USD-M Futures", "Coin-M Futures"):
-        _parse_binance_statements_futures_row(tx_times, parser, data_row)
+        _parse_binance_statements_futures_row(tx_ops, parser, data_row)
         return
 
     if row_dict["Account"] in ("Isolated Margin", "CrossMargin", "Cross Margin"):
-        _parse_binance_statements_margin_row(tx_times, parser, data_row)
+        _parse_binance_statements_margin_row(tx_ops, parser, data_row)
         return
 
     if row_dict["Account"].lower() not in ("spot", "earn", "pool"):
@@ -446,11 +452,11 @@ def _parse_binance_statements_row(
     elif row_dict["Operation"] in ("Small assets exchange BNB", "Small Assets Exchange BNB"):
         if config.binance_multi_bnb_split_even:
             _make_bnb_trade(
-                _get_op_rows(tx_times, data_row.timestamp, (row_dict["Operation"],)),
+                list(_get_op_rows(tx_ops, data_row.timestamp, (row_dict["Operation"],))),
             )
         else:
             _make_trade(
-                _get_op_rows(tx_times, data_row.timestamp, (row_dict["Operation"],)),
+                _get_op_rows(tx_ops, data_row.timestamp, (row_dict["Operation"],)),
             )
     elif row_dict["Operation"] in (
         "ETH 2.0 Staking",
@@ -458,7 +464,7 @@ def _parse_binance_statements_row(
         "Stablecoins Auto-Conversion",
     ):
         _make_trade(
-            _get_op_rows(tx_times, data_row.timestamp, (row_dict["Operation"],)),
+            _get_op_rows(tx_ops, data_row.timestamp, (row_dict["Operation"],)),
         )
     elif row_dict["Operation"] in (
         "transfer_out",
@@ -508,7 +514,7 @@ def _parse_binance_statements_row(
     elif row_dict["Operation"] in ("Binance Convert", "Large OTC trading"):
         if config.binance_statements_only:
             _make_trade(
-                _get_op_rows(tx_times, data_row.timestamp, (row_dict["Operation"],)),
+                _get_op_rows(tx_ops, data_row.timestamp, (row_dict["Operation"],)),
             )
         else:
             # Skip duplicate operations
@@ -527,7 +533,7 @@ def _parse_binance_statements_row(
         if config.binance_statements_only:
             _make_trade_with_fee(
                 _get_op_rows(
-                    tx_times,
+                    tx_ops,
                     data_row.timestamp,
                     (
                         "Buy",
@@ -552,7 +558,7 @@ def _parse_binance_statements_row(
 
 
 def _parse_binance_statements_futures_row(
-    tx_times: Dict[datetime, List["DataRow"]], parser: DataParser, data_row: "DataRow"
+    tx_ops: Dict[Tuple[datetime, str], List["DataRow"]], parser: DataParser, data_row: "DataRow"
 ) -> None:
     row_dict = data_row.row_dict
 
@@ -608,7 +614,7 @@ def _parse_binance_statements_futures_row(
         )
     elif row_dict["Operation"] in ("Asset Conversion Transfer", "Futures Convert"):
         _make_trade(
-            _get_op_rows(tx_times, data_row.timestamp, (row_dict["Operation"],)),
+            _get_op_rows(tx_ops, data_row.timestamp, (row_dict["Operation"],)),
         )
     elif row_dict["Operation"] in (
         "transfer_out",
@@ -626,7 +632,7 @@ def _parse_binance_statements_futures_row(
 
 
 def _parse_binance_statements_margin_row(
-    tx_times: Dict[datetime, List["DataRow"]], parser: DataParser, data_row: "DataRow"
+    tx_ops: Dict[Tuple[datetime, str], List["DataRow"]], parser: DataParser, data_row: "DataRow"
 ) -> None:
     row_dict = data_row.row_dict
 
@@ -658,7 +664,7 @@ def _parse_binance_statements_margin_row(
     ):
         _make_trade_with_fee(
             _get_op_rows(
-                tx_times,
+                tx_ops,
                 data_row.timestamp,
                 (
                     "Buy",
@@ -784,18 +790,30 @@ def _parse_binance_futures_row(
 
 
 def _get_op_rows(
-    tx_times: Dict[datetime, List["DataRow"]],
+    tx_ops: Dict[Tuple[datetime, str], List["DataRow"]],
     timestamp: datetime,
     operations: Tuple[str, ...],
-) -> List["DataRow"]:
-    timestamp_next_second = timestamp + timedelta(seconds=1)
+) -> Iterator["DataRow"]:
+    for tx_time in (timestamp, timestamp + timedelta(seconds=1)):
+        tx_period = []
+        for operation in operations:
+            op_rows = tx_ops.get((tx_time, operation))
+            if not op_rows:
+                continue
 
-    if timestamp_next_second in tx_times:
-        tx_period = tx_times[timestamp] + tx_times[timestamp_next_second]
-    else:
-        tx_period = tx_times[timestamp]
+            while op_rows and op_rows[-1].parsed:
+                op_rows.pop()
 
-    return [dr for dr in tx_period if dr.row_dict["Operation"] in operations and not dr.parsed]
+            if op_rows:
+                tx_period.append(reversed(op_rows))
+
+        # Rows are yielded in file order, only as they are needed
+        if len(tx_period) == 1:
+            yield from (dr for dr in tx_period[0] if not dr.parsed)
+        elif tx_period:
+            yield from (
+                dr for dr in heapq.merge(*tx_period, key=lambda dr: dr.line_num) if not dr.parsed
+            )
 
 
 def _make_bnb_trade(op_rows: List["DataRow"]) -> None:
@@ -847,7 +865,7 @@ def _get_bnb_quantity(op_rows: List["DataRow"]) -> Optional[Decimal]:
     return buy_quantity
 
 
-def _make_trade(op_rows: List["DataRow"]) -> None:
+def _make_trade(op_rows: Iterable["DataRow"]) -> None:
     buy_quantity = sell_quantity = None
     buy_asset = sell_asset = ""
     trade_row = None
@@ -885,7 +903,7 @@ def _make_trade(op_rows: List["DataRow"]) -> None:
         )
 
 
-def _make_trade_with_fee(op_rows: List["DataRow"]) -> None:
+def _make_trade_with_fee(op_rows: Iterable["DataRow"]) -> None:
     buy_quantity = sell_quantity = fee_quantity = None
     buy_asset = sell_asset = fee_asset = ""
     trade_row = None
@@ -2,7 +2,7 @@
 # (c) Nano Nano Ltd 2024
 
 from decimal import Decimal
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, MutableMapping
 
 from typing_extensions import Unpack
 
@@ -175,7 +175,7 @@ def parse_binance_us(
         )
 
 
-def _map_legacy_fields(row_dict: Dict[str, str]) -> None:
+def _map_legacy_fields(row_dict: MutableMapping[str, str]) -> None:
     if "Primary_Asset" in row_dict:
         row_dict["Primary Asset"] = row_dict["Primary_Asset"]
 
@@ -3,7 +3,7 @@
 
 import sys
 from decimal import Decimal
-from typing import TYPE_CHECKING, Dict, List
+from typing import TYPE_CHECKING, List, Mapping
 
 from colorama import Fore
 from typing_extensions import Unpack
@@ -134,7 +134,7 @@ def _get_wallet(address: str) -> str:
     return f"{WALLET}-{address.lower()[0 : TransactionOutRecord.WALLET_ADDR_LEN]}"
 
 
-def _get_note(row_dict: Dict[str, str]) -> str:
+def _get_note(row_dict: Mapping[str, str]) -> str:
     if row_dict["Status"] != "ok":
         return "Failure"
     return ""
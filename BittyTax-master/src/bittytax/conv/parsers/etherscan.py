@@ -4,7 +4,7 @@
 import re
 import sys
 from decimal import Decimal
-from typing import TYPE_CHECKING, Dict, List
+from typing import TYPE_CHECKING, List, Mapping
 
 from colorama import Fore
 from typing_extensions import Unpack
@@ -87,7 +87,7 @@ def _get_wallet(chain: str, address: str) -> str:
     return f"{chain}-{address.lower()[0 : TransactionOutRecord.WALLET_ADDR_LEN]}"
 
 
-def _get_note(row_dict: Dict[str, str]) -> str:
+def _get_note(row_dict: Mapping[str, str]) -> str:
     if row_dict["Status"] != "":
         if row_dict.get("Method"):
             return f'Failure ({row_dict["Method"]})'
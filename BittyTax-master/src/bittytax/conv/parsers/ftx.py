@@ -4,7 +4,7 @@
 import copy
 import sys
 from decimal import Decimal
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, List, MutableMapping, Optional, Tuple
 
 from colorama import Fore
 from typing_extensions import Unpack
@@ -234,7 +234,7 @@ def parse_ftx_staking(
     )
 
 
-def _normalise_ftx_dict(row_dict: Dict[str, str]) -> None:
+def _normalise_ftx_dict(row_dict: MutableMapping[str, str]) -> None:
     if "time" in row_dict:
         row_dict["Time"] = row_dict["time"]
 
@@ -2,6 +2,7 @@
 # (c) Nano Nano Ltd 2020
 
 import copy
+import heapq
 import sys
 from decimal import Decimal
 from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
@@ -104,13 +105,14 @@ TRADINGPAIR_TO_QUOTE_ASSET = {
 def parse_kraken_ledgers(
     data_rows: List["DataRow"], parser: DataParser, **_kwargs: Unpack[ParserArgs]
 ) -> None:
-    ref_ids: Dict[str, List["DataRow"]] = {}
+    ref_ids: Dict[Tuple[str, str], List["DataRow"]] = {}
 
     for dr in data_rows:
-        if dr.row_dict["refid"] in ref_ids:
-            ref_ids[dr.row_dict["refid"]].append(dr)
+        ref_id = (dr.row_dict["refid"], dr.row_dict["type"])
+        if ref_id in ref_ids:
+            ref_ids[ref_id].append(dr)
         else:
-            ref_ids[dr.row_dict["refid"]] = [dr]
+            ref_ids[ref_id] = [dr]
 
     for row_index, data_row in enumerate(data_rows):
         if config.debug:
@@ -137,7 +139,7 @@ def parse_kraken_ledgers(
 
 
 def _parse_kraken_ledgers_row(
-    ref_ids: Dict[str, List["DataRow"]],
+    ref_ids: Dict[Tuple[str, str], List["DataRow"]],
     data_rows: List["DataRow"],
     parser: DataParser,
     data_row: "DataRow",
@@ -360,9 +362,14 @@ def _parse_kraken_ledgers_row(
 
 
 def _get_ref_ids(
-    ref_ids: Dict[str, List["DataRow"]], ref_id: str, k_type: Tuple[str, ...]
+    ref_ids: Dict[Tuple[str, str], List["DataRow"]], ref_id: str, k_type: Tuple[str, ...]
 ) -> List["DataRow"]:
-    return [dr for dr in ref_ids[ref_id] if dr.row_dict["type"] in k_type]
+    type_rows = [ref_ids[(ref_id, t)] for t in k_type if (ref_id, t) in ref_ids]
+    if len(type_rows) == 1:
+        return type_rows[0]
+
+    # Rows of more than one type are kept in file order
+    return list(heapq.merge(*type_rows, key=lambda dr: dr.line_num))
 
 
 def _make_trade(ref_ids: List["DataRow"]) -> None:
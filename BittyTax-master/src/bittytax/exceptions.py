@@ -45,3 +45,12 @@ class MissingDataError(TransactionParserError):
 class ImportFailureError(Exception):
     def __str__(self) -> str:
         return "Import failure"
+
+
+class RecordsFormatError(Exception):
+    def __init__(self, msg: str) -> None:
+        super().__init__()
+        self.msg = msg
+
+    def __str__(self) -> str:
+        return self.msg
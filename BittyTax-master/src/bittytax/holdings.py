@@ -9,6 +9,7 @@ from tqdm import tqdm
 from .bt_types import AssetSymbol
 from .config import config
 from .constants import WARNING
+from .log import is_debug, logger
 
 
 class Holdings:
@@ -29,14 +30,25 @@ class Holdings:
         if is_deposit:
             self.deposits += 1
 
-        if config.debug:
-            print(
-                f"{Fore.YELLOW}section104:   "
-                f"{self.asset}={self.quantity.normalize():0,f} (+{quantity.normalize():0,f}) "
-                f"cost={config.sym()}{self.cost:0,.2f} {config.ccy} "
-                f"(+{config.sym()}{cost:0,.2f} {config.ccy}) "
-                f"fees={config.sym()}{self.fees:0,.2f} {config.ccy} "
-                f"(+{config.sym()}{fees:0,.2f} {config.ccy})"
+        if is_debug():
+            logger.debug(
+                "%ssection104:   %s=%s (+%s) cost=%s%s %s (+%s%s %s) fees=%s%s %s (+%s%s %s)",
+                Fore.YELLOW,
+                self.asset,
+                format(self.quantity.normalize(), "0,f"),
+                format(quantity.normalize(), "0,f"),
+                config.sym(),
+                format(self.cost, "0,.2f"),
+                config.ccy,
+                config.sym(),
+                format(cost, "0,.2f"),
+                config.ccy,
+                config.sym(),
+                format(self.fees, "0,.2f"),
+                config.ccy,
+                config.sym(),
+                format(fees, "0,.2f"),
+                config.ccy,
             )
 
     def subtract_tokens(
@@ -49,14 +61,25 @@ class Holdings:
         if is_withdrawal:
             self.withdrawals += 1
 
-        if config.debug:
-            print(
-                f"{Fore.YELLOW}section104:   "
-                f"{self.asset}={self.quantity.normalize():0,f} (-{quantity.normalize():0,f}) "
-                f"cost={config.sym()}{self.cost:0,.2f} {config.ccy} "
-                f"(-{config.sym()}{cost:0,.2f} {config.ccy}) "
-                f"fees={config.sym()}{self.fees:0,.2f} {config.ccy} "
-                f"(-{config.sym()}{fees:0,.2f} {config.ccy})"
+        if is_debug():
+            logger.debug(
+                "%ssection104:   %s=%s (-%s) cost=%s%s %s (-%s%s %s) fees=%s%s %s (-%s%s %s)",
+                Fore.YELLOW,
+                self.asset,
+                format(self.quantity.normalize(), "0,f"),
+                format(quantity.normalize(), "0,f"),
+                config.sym(),
+                format(self.cost, "0,.2f"),
+                config.ccy,
+                config.sym(),
+                format(cost, "0,.2f"),
+                config.ccy,
+                config.sym(),
+                format(self.fees, "0,.2f"),
+                config.ccy,
+                config.sym(),
+                format(fees, "0,.2f"),
+                config.ccy,
             )
 
     def check_transfer_mismatch(self) -> None:
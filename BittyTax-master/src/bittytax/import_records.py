@@ -2,30 +2,59 @@
 # (c) Nano Nano Ltd 2019
 
 import csv
+import functools
 import re
 import sys
 import warnings
-from typing import List, Optional, TextIO
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
 
 import openpyxl
 import xlrd
 from colorama import Fore
-from tqdm import tqdm, trange
+from tqdm import tqdm
 
+from .binary_records import BinaryRecord, BinaryRecordReader
 from .config import config
 from .constants import ERROR, FONT_COLOR_TX_DEST, FONT_COLOR_TX_HASH, FONT_COLOR_TX_SRC
-from .exceptions import TransactionParserError
+from .exceptions import RecordsFormatError, TransactionParserError
 from .t_record import TransactionRecord
-from .t_row import TransactionRow, TxRaw
+from .t_row import TransactionRow, TxRaw, TypedTransactionRow
+from .worksheet_pool import WorksheetPool
 
 
 class ImportRecords:
+    TX_FONT_COLORS = {
+        f"FF{FONT_COLOR_TX_HASH}": "tx_hash",
+        f"FF{FONT_COLOR_TX_SRC}": "tx_src",
+        f"FF{FONT_COLOR_TX_DEST}": "tx_dest",
+    }
+
     def __init__(self) -> None:
         self.t_rows: List["TransactionRow"] = []
         self.success_cnt = 0
         self.failure_cnt = 0
 
-    def import_excel_xlsx(self, filename: str) -> None:
+    def import_excel_xlsx(self, filename: str, jobs: int = 1) -> None:
+        # Font ids are only unique within a workbook
+        convert_row = functools.partial(self.convert_row_xlsx, tx_fonts={})
+
+        if jobs > 1:
+            print(f"{Fore.WHITE}Excel file: {Fore.YELLOW}{filename}")
+            with WorksheetPool(filename, jobs) as pool:
+                self._import_worksheets(pool, pool.sheet_names(), convert_row, filename)
+            return
+
         warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
         workbook = openpyxl.load_workbook(filename=filename, read_only=True, data_only=True)
         print(f"{Fore.WHITE}Excel file: {Fore.YELLOW}{filename}")
@@ -44,48 +73,21 @@ class ImportRecords:
                 print(f"{Fore.GREEN}skipping '{worksheet.title}' worksheet")
                 continue
 
-            if config.debug:
-                print(f"{Fore.CYAN}importing '{worksheet.title}' rows")
-
-            for row_num, worksheet_row in enumerate(
-                tqdm(
-                    worksheet.rows,
-                    total=worksheet.max_row,
-                    unit=" row",
-                    desc=f"{Fore.CYAN}importing '{worksheet.title}' rows{Fore.GREEN}",
-                    disable=bool(config.debug or not sys.stdout.isatty()),
-                )
-            ):
-                if row_num == 0:
-                    # Skip headers
-                    continue
-
-                row = [self.convert_cell_xlsx(cell) for cell in worksheet_row]
-
-                t_row = TransactionRow(
-                    row[: len(TransactionRow.HEADER)], row_num + 1, filename, worksheet.title
-                )
-
-                try:
-                    t_row.parse()
-                except TransactionParserError as e:
-                    t_row.failure = e
-                else:
-                    t_row.tx_raw = self.get_tx_raw_xlsx(worksheet_row)
-
-                if config.debug or t_row.failure:
-                    tqdm.write(f"{Fore.YELLOW}import: {t_row}")
-
-                if t_row.failure:
-                    tqdm.write(f"{ERROR} {t_row.failure}")
-
-                self.t_rows.append(t_row)
-                self.update_cnts(t_row)
+            self._import_rows(
+                map(convert_row, worksheet.rows), worksheet.max_row, filename, worksheet.title
+            )
 
         workbook.close()
         del workbook
 
-    def import_excel_xls(self, filename: str) -> None:
+    def import_excel_xls(self, filename: str, jobs: int = 1) -> None:
+        if jobs > 1:
+            print(f"{Fore.WHITE}Excel file: {Fore.YELLOW}{filename}")
+            with WorksheetPool(filename, jobs) as pool:
+                convert_row = functools.partial(self.convert_row_xls, datemode=pool.datemode())
+                self._import_worksheets(pool, pool.sheet_names(), convert_row, filename)
+            return
+
         workbook = xlrd.open_workbook(filename)
         print(f"{Fore.WHITE}Excel file: {Fore.YELLOW}{filename}")
 
@@ -94,45 +96,88 @@ class ImportRecords:
                 print(f"{Fore.GREEN}skipping '{worksheet.name}' worksheet")
                 continue
 
-            if config.debug:
-                print(f"{Fore.CYAN}importing '{worksheet.name}' rows")
-
-            for row_num in trange(
-                0,
+            self._import_rows(
+                (self.convert_row_xls(row, workbook.datemode) for row in worksheet.get_rows()),
                 worksheet.nrows,
+                filename,
+                worksheet.name,
+            )
+
+        workbook.release_resources()
+        del workbook
+
+    def _import_worksheets(
+        self,
+        pool: WorksheetPool,
+        sheet_names: List[str],
+        convert_row: Callable[[Sequence[Any]], Tuple[List[str], Optional[TxRaw]]],
+        filename: str,
+    ) -> None:
+        # Worksheets are read in parallel, but imported in order, so rows and TIDs are the same
+        worksheets = pool.read(
+            [sheet_name for sheet_name in sheet_names if not sheet_name.startswith("--")],
+            convert_row,
+        )
+
+        for sheet_name in sheet_names:
+            if sheet_name.startswith("--"):
+                print(f"{Fore.GREEN}skipping '{sheet_name}' worksheet")
+                continue
+
+            rows = next(worksheets)
+            self._import_rows(iter(rows), len(rows), filename, sheet_name)
+
+    def _import_rows(
+        self,
+        rows: Iterator[Tuple[List[str], Optional[TxRaw]]],
+        total: Optional[int],
+        filename: str,
+        worksheet_name: str,
+    ) -> None:
+        if config.debug:
+            print(f"{Fore.CYAN}importing '{worksheet_name}' rows")
+
+        for row_num, (row, tx_raw) in enumerate(
+            tqdm(
+                rows,
+                total=total,
                 unit=" row",
-                desc=f"{Fore.CYAN}importing '{worksheet.name}' rows{Fore.GREEN}",
+                desc=f"{Fore.CYAN}importing '{worksheet_name}' rows{Fore.GREEN}",
                 disable=bool(config.debug or not sys.stdout.isatty()),
-            ):
-                if row_num == 0:
-                    # Skip headers
-                    continue
-
-                row = [
-                    self.convert_cell_xls(worksheet.cell(row_num, cell_num), workbook)
-                    for cell_num in range(0, worksheet.ncols)
-                ]
+            )
+        ):
+            if row_num == 0:
+                # Skip headers
+                continue
 
-                t_row = TransactionRow(
-                    row[: len(TransactionRow.HEADER)], row_num + 1, filename, worksheet.name
-                )
+            t_row = TransactionRow(
+                row[: len(TransactionRow.HEADER)], row_num + 1, filename, worksheet_name
+            )
+            self._parse_row(t_row, tx_raw)
 
-                try:
-                    t_row.parse()
-                except TransactionParserError as e:
-                    t_row.failure = e
+    def _parse_row(self, t_row: TransactionRow, tx_raw: Optional[TxRaw]) -> None:
+        try:
+            t_row.parse()
+        except TransactionParserError as e:
+            t_row.failure = e
+        else:
+            t_row.tx_raw = tx_raw
 
-                if config.debug or t_row.failure:
-                    tqdm.write(f"{Fore.YELLOW}import: {t_row}")
+        if config.debug or t_row.failure:
+            tqdm.write(f"{Fore.YELLOW}import: {t_row}")
 
-                if t_row.failure:
-                    tqdm.write(f"{ERROR} {t_row.failure}")
+        if t_row.failure:
+            tqdm.write(f"{ERROR} {t_row.failure}")
 
-                self.t_rows.append(t_row)
-                self.update_cnts(t_row)
+        self.t_rows.append(t_row)
+        self.update_cnts(t_row)
 
-        workbook.release_resources()
-        del workbook
+    @staticmethod
+    def convert_row_xlsx(
+        worksheet_row: Sequence[openpyxl.cell.cell.Cell], tx_fonts: Dict[int, Optional[str]]
+    ) -> Tuple[List[str], Optional[TxRaw]]:
+        row = [ImportRecords.convert_cell_xlsx(cell) for cell in worksheet_row]
+        return row, ImportRecords.get_tx_raw_xlsx(worksheet_row, tx_fonts)
 
     @staticmethod
     def convert_cell_xlsx(cell: openpyxl.cell.cell.Cell) -> str:
@@ -140,20 +185,31 @@ class ImportRecords:
             return ""
         return str(cell.value)
 
-    def get_tx_raw_xlsx(self, worksheet_row: List[openpyxl.cell.cell.Cell]) -> Optional["TxRaw"]:
-        tx_hash = tx_src = tx_dest = ""
+    @staticmethod
+    def get_tx_raw_xlsx(
+        worksheet_row: Sequence[openpyxl.cell.cell.Cell], tx_fonts: Dict[int, Optional[str]]
+    ) -> Optional["TxRaw"]:
+        tx_raw = {}
 
         for cell in worksheet_row[len(TransactionRow.HEADER) :]:
-            if cell.value and cell.font.color and cell.font.color.type == "rgb":
-                if cell.font.color.rgb == f"FF{FONT_COLOR_TX_HASH}":
-                    tx_hash = self.get_tx_component(str(cell.value))
-                elif cell.font.color.rgb == f"FF{FONT_COLOR_TX_SRC}":
-                    tx_src = self.get_tx_component(str(cell.value))
-                elif cell.font.color.rgb == f"FF{FONT_COLOR_TX_DEST}":
-                    tx_dest = self.get_tx_component(str(cell.value))
-
-        if any((tx_hash, tx_src, tx_dest)):
-            return TxRaw(tx_hash, tx_src, tx_dest)
+            if cell.value:
+                # Each font's colour is only looked up once, not for every cell which uses it
+                font_id = cell.style_array.fontId
+                if font_id not in tx_fonts:
+                    tx_fonts[font_id] = ImportRecords.get_tx_field(cell.font)
+
+                tx_field = tx_fonts[font_id]
+                if tx_field:
+                    tx_raw[tx_field] = ImportRecords.get_tx_component(str(cell.value))
+
+        if any(tx_raw.values()):
+            return TxRaw(**tx_raw)
+        return None
+
+    @staticmethod
+    def get_tx_field(font: openpyxl.styles.fonts.Font) -> Optional[str]:
+        if font.color and font.color.type == "rgb":
+            return ImportRecords.TX_FONT_COLORS.get(font.color.rgb)
         return None
 
     @staticmethod
@@ -166,9 +222,15 @@ class ImportRecords:
         return cell_str
 
     @staticmethod
-    def convert_cell_xls(cell: xlrd.sheet.Cell, workbook: xlrd.Book) -> str:
+    def convert_row_xls(
+        worksheet_row: Sequence[xlrd.sheet.Cell], datemode: int
+    ) -> Tuple[List[str], Optional[TxRaw]]:
+        return [ImportRecords.convert_cell_xls(cell, datemode) for cell in worksheet_row], None
+
+    @staticmethod
+    def convert_cell_xls(cell: xlrd.sheet.Cell, datemode: int) -> str:
         if cell.ctype == xlrd.XL_CELL_DATE:
-            datetime = xlrd.xldate.xldate_as_datetime(cell.value, workbook.datemode)
+            datetime = xlrd.xldate.xldate_as_datetime(cell.value, datemode)
             if datetime.microsecond:
                 value = f"{datetime:%Y-%m-%dT%H:%M:%S.%f}"
             else:
@@ -217,6 +279,44 @@ class ImportRecords:
             self.t_rows.append(t_row)
             self.update_cnts(t_row)
 
+    def import_binary(self, binary_file: BinaryIO, filename: str) -> None:
+        reader = BinaryRecordReader(binary_file)
+        print(f"{Fore.WHITE}Binary file: {Fore.YELLOW}{filename}")
+
+        if reader.ccy != config.ccy:
+            raise RecordsFormatError(f"Records file values are in {reader.ccy}, not {config.ccy}")
+
+        for worksheet_name, records in reader.worksheets():
+            if config.debug:
+                print(f"{Fore.CYAN}importing '{worksheet_name}' rows")
+
+            # Row numbers are as the worksheet would be, after its header row
+            for row_num, record in enumerate(
+                tqdm(
+                    records,
+                    unit=" row",
+                    desc=f"{Fore.CYAN}importing '{worksheet_name}' rows{Fore.GREEN}",
+                    disable=bool(config.debug or not sys.stdout.isatty()),
+                ),
+                start=2,
+            ):
+                t_row = TypedTransactionRow(
+                    record[: len(TransactionRow.HEADER)], row_num, filename, worksheet_name
+                )
+                self._parse_row(t_row, self.get_tx_raw_binary(record))
+
+    @staticmethod
+    def get_tx_raw_binary(record: BinaryRecord) -> Optional[TxRaw]:
+        tx_raw = TxRaw(
+            ImportRecords.get_tx_component(record.tx_hash),
+            ImportRecords.get_tx_component(record.tx_src),
+            ImportRecords.get_tx_component(record.tx_dest),
+        )
+
+        if tx_raw.tx_hash or tx_raw.tx_src or tx_raw.tx_dest:
+            return tx_raw
+        return None
+
     def update_cnts(self, t_row: "TransactionRow") -> None:
         if t_row.failure is not None:
             self.failure_cnt += 1
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+import contextlib
+import logging
+import re
+import sys
+from typing import Iterator, List, Optional, TextIO, Tuple, Union
+
+from tqdm import tqdm
+
+
+class Logger(logging.Logger):
+    """A standalone logger, its level is always set, and the caller's source location is never
+    output, so there's no need to search the logger hierarchy or walk the stack."""
+
+    def isEnabledFor(self, level: int) -> bool:  # pylint: disable=invalid-name
+        return level >= self.level
+
+    def findCaller(  # pylint: disable=invalid-name
+        self, stack_info: bool = False, stacklevel: int = 1
+    ) -> Tuple[str, int, str, Optional[str]]:
+        return "(unknown file)", 0, "(unknown function)", None
+
+
+logger = Logger("bittytax")
+logger.addHandler(logging.NullHandler())
+logger.setLevel(logging.WARNING)
+
+
+class StreamHandler(logging.StreamHandler):
+    """Leaves flushing to the stream, the same as print, rather than flushing every record."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+
+
+class StdoutHandler(StreamHandler):
+    """Writes to whatever sys.stdout is at the time, as it's wrapped by colorama and tqdm."""
+
+    def __init__(self) -> None:
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self) -> TextIO:
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _stream: TextIO) -> None:
+        pass
+
+
+class PlainFormatter(logging.Formatter):
+    ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self.ANSI_ESCAPE.sub("", super().format(record))
+
+
+class FileHandler(logging.FileHandler):
+    emit = StreamHandler.emit
+
+
+def setup_logging(debug: bool, filename: Optional[str] = None) -> None:
+    for old_handler in list(logger.handlers):
+        logger.removeHandler(old_handler)
+        old_handler.close()
+
+    handler: logging.Handler
+    if filename:
+        handler = FileHandler(filename, "w", encoding="utf-8")
+        handler.setFormatter(PlainFormatter("%(message)s"))
+    else:
+        handler = StdoutHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG if debug else logging.WARNING)
+
+
+def is_debug() -> bool:
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+class CaptureHandler(logging.Handler):
+    """Keeps the records logged, along with anything written to stdout, in the order they were
+    output, so they can be output later, e.g. by the process which started a worker."""
+
+    def __init__(self, output: List[Union[logging.LogRecord, str]]) -> None:
+        super().__init__()
+        self.output = output
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Formatted now, as the arguments might not be picklable
+        record.msg = record.getMessage()
+        record.args = None
+        self.output.append(record)
+
+    def write(self, text: str) -> int:
+        self.output.append(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+@contextlib.contextmanager
+def capture_output() -> Iterator[List[Union[logging.LogRecord, str]]]:
+    output: List[Union[logging.LogRecord, str]] = []
+    handler = CaptureHandler(output)
+    handlers = list(logger.handlers)
+
+    for old_handler in handlers:
+        logger.removeHandler(old_handler)
+    logger.addHandler(handler)
+    try:
+        with contextlib.redirect_stdout(handler):
+            yield output
+    finally:
+        logger.removeHandler(handler)
+        for old_handler in handlers:
+            logger.addHandler(old_handler)
+
+
+def replay_output(output: List[Union[logging.LogRecord, str]]) -> None:
+    for item in output:
+        if isinstance(item, logging.LogRecord):
+            logger.handle(item)
+        else:
+            tqdm.write(item, end="")
@@ -3,7 +3,7 @@
 
 import os
 from decimal import Decimal
-from typing import List, Optional, cast
+from typing import Dict, List, Optional, Tuple, cast
 
 from typing_extensions import NotRequired, TypedDict
 
@@ -41,15 +41,18 @@ class AssetData:
 
     def __init__(self) -> None:
         self.data_sources = {}
+        self.priorities: Dict[AssetSymbol, Optional[Tuple[str, AssetId]]] = {}
 
         if not os.path.exists(CACHE_DIR):
             os.mkdir(CACHE_DIR)
 
         for data_source_class in DataSourceBase.__subclasses__():
             self.data_sources[data_source_class.__name__.upper()] = data_source_class()
+            if config.data_source_offline:
+                self.data_sources[data_source_class.__name__.upper()].add_cached_assets()
 
     def get_assets(
-        self, req_symbol: AssetSymbol, req_data_source: str, search_terms: str
+        self, req_symbol: AssetSymbol, req_data_source: str, search_terms: List[str]
     ) -> List[AsRecord]:
         if not req_data_source or req_data_source == "ALL":
             data_sources = list(self.data_sources.keys())
@@ -58,32 +61,41 @@ class AssetData:
 
         asset_data = []
         for ds in data_sources:
-            if not req_symbol:
-                assets = self.data_sources[ds].get_list()
+            if req_symbol:
+                assets = [
+                    (req_symbol, asset_id)
+                    for asset_id in self.data_sources[ds].get_list().get(req_symbol, [])
+                    if not search_terms
+                    or self.do_search(req_symbol, asset_id["name"], search_terms)
+                ]
             else:
-                assets = {}
-                assets[req_symbol] = self.data_sources[ds].get_list().get(req_symbol, [])
-            for symbol in assets:
-                for asset_id in assets[symbol]:
-                    if search_terms:
-                        match = self.do_search(symbol, asset_id["name"], search_terms)
-                    else:
-                        match = True
-
-                    if match:
-                        asset_data.append(
-                            AsRecord(
-                                symbol=symbol,
-                                name=asset_id["name"],
-                                data_source=self.data_sources[ds].name(),
-                                asset_id=asset_id["asset_id"],
-                                priority=self._is_priority(symbol, asset_id["asset_id"], ds),
-                            )
-                        )
+                assets = [
+                    (symbol, asset_id)
+                    for symbol, asset_ids in self.data_sources[ds].get_list().items()
+                    for asset_id in asset_ids
+                    if not search_terms or self.do_search(symbol, asset_id["name"], search_terms)
+                ]
+
+            for symbol, asset_id in assets:
+                asset_data.append(
+                    AsRecord(
+                        symbol=symbol,
+                        name=asset_id["name"],
+                        data_source=self.data_sources[ds].name(),
+                        asset_id=asset_id["asset_id"],
+                        priority=self._is_priority(symbol, asset_id["asset_id"], ds),
+                    )
+                )
 
         return sorted(asset_data, key=lambda a: a["symbol"].lower())
 
     def _is_priority(self, symbol: AssetSymbol, asset_id: AssetId, data_source: str) -> bool:
+        if symbol not in self.priorities:
+            self.priorities[symbol] = self._get_priority(symbol)
+        return self.priorities[symbol] == (data_source.upper(), asset_id)
+
+    def _get_priority(self, symbol: AssetSymbol) -> Optional[Tuple[str, AssetId]]:
+        # The data source and asset ID which is used to price the symbol
         if symbol in config.data_source_select:
             ds_priority = [ds.split(":")[0] for ds in config.data_source_select[symbol]]
         elif symbol in config.fiat_list:
@@ -94,18 +106,13 @@ class AssetData:
         for ds in ds_priority:
             if ds.upper() in self.data_sources:
                 if symbol in self.data_sources[ds.upper()].assets:
-                    if (
-                        ds.upper() == data_source.upper()
-                        and self.data_sources[ds.upper()].assets[symbol].get("asset_id") == asset_id
-                    ):
-                        return True
-                    return False
+                    return ds.upper(), self.data_sources[ds.upper()].assets[symbol]["asset_id"]
             else:
                 raise UnexpectedDataSourceError(ds, DataSourceBase.datasources_str())
-        return False
+        return None
 
     @staticmethod
-    def do_search(symbol: str, name: str, search_terms: str) -> bool:
+    def do_search(symbol: str, name: str, search_terms: List[str]) -> bool:
         for search_term in search_terms:
             if search_term.upper() not in symbol.upper() + " " + name.upper():
                 return False
@@ -123,7 +130,8 @@ class AssetData:
         all_assets = []
         for ds in data_sources:
             for asset_id in self.data_sources[ds].get_list().get(req_symbol, []):
-                asset_data = cast(AsPriceRecord, asset_id)
+                # A copy, as the asset list is kept by the data source
+                asset_data = cast(AsPriceRecord, dict(asset_id))
                 asset_data["symbol"] = req_symbol
                 asset_data["data_source"] = self.data_sources[ds].name()
                 asset_data["priority"] = self._is_priority(
@@ -156,7 +164,7 @@ class AssetData:
         all_assets = []
         for ds in data_sources:
             for asset_id in self.data_sources[ds].get_list().get(req_symbol, []):
-                asset_data = cast(AsPriceRecord, asset_id)
+                asset_data = cast(AsPriceRecord, dict(asset_id))
                 asset_data["symbol"] = req_symbol
                 asset_data["data_source"] = self.data_sources[ds].name()
                 asset_data["priority"] = self._is_priority(
@@ -171,26 +179,14 @@ class AssetData:
                 date = Date(req_date.date())
                 pair = TradingPair(req_symbol + "/" + asset_data["quote"])
 
-                if not no_cache:
-                    # Check cache first
-                    if (
-                        pair in self.data_sources[ds].prices
-                        and date in self.data_sources[ds].prices[pair]
-                    ):
-                        asset_data["price"] = self.data_sources[ds].prices[pair][date]["price"]
-                        all_assets.append(asset_data)
-                        continue
-
-                self.data_sources[ds].get_historical(
-                    req_symbol, asset_data["quote"], req_date, asset_data["asset_id"]
-                )
+                # Check cache first, offline only the cache can be used
                 if (
-                    pair in self.data_sources[ds].prices
-                    and date in self.data_sources[ds].prices[pair]
-                ):
-                    asset_data["price"] = self.data_sources[ds].prices[pair][date]["price"]
-                else:
-                    asset_data["price"] = None
+                    no_cache or not self.data_sources[ds].is_cached(pair, date)
+                ) and not config.data_source_offline:
+                    self.data_sources[ds].get_historical(
+                        req_symbol, asset_data["quote"], req_date, asset_data["asset_id"]
+                    )
+                asset_data["price"] = self.data_sources[ds].get_cached(pair, date)["price"]
 
                 all_assets.append(asset_data)
         return all_assets
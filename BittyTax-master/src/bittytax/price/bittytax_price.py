@@ -2,11 +2,13 @@
 # (c) Nano Nano Ltd 2019
 
 import argparse
+import csv
+import json
 import platform
 import re
 import sys
 from decimal import Decimal, InvalidOperation
-from typing import List
+from typing import List, Optional, TextIO
 
 import colorama
 import dateutil.parser
@@ -17,19 +19,31 @@ from ..config import config
 from ..constants import ERROR, TZ_UTC, WARNING
 from ..version import __version__
 from .assetdata import AsPriceRecord, AsRecord, AssetData
+from .bulkquery import BqQuery, BqResult, BulkQuery
 from .datasource import DataSourceBase
-from .exceptions import DataSourceError
+from .exceptions import DataSourceError, PriceQueryError, PriceSeedError
+from .seeddata import SeedData
 from .valueasset import ValueAsset
 
 CMD_LATEST = "latest"
 CMD_HISTORY = "historic"
 CMD_LIST = "list"
+CMD_SEED = "seed"
+CMD_BULK = "bulk"
+
+FORMAT_CSV = "csv"
+FORMAT_JSON = "json"
+
+# Asset lists cached within the last day are used by the list command
+ASSET_LIST_MAX_AGE = 24 * 60 * 60
+
+BULK_HEADER = ["asset", "date", "quantity", "price", "value", "currency", "data_source", "name"]
 
 if sys.stdout.encoding != "UTF-8":
     sys.stdout.reconfigure(encoding="utf-8")  # type: ignore[union-attr]
 
 
-def main() -> None:
+def main() -> None:  # pylint: disable=too-many-statements
     colorama.init()
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -67,6 +81,11 @@ def main() -> None:
         type=str.upper,
         help="specify the data source to use, or all",
     )
+    parser_latest.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use prices from the cache, no network access",
+    )
     parser_latest.add_argument("-d", "--debug", action="store_true", help="enable debug logging")
 
     parser_history = subparsers.add_parser(
@@ -105,6 +124,11 @@ def main() -> None:
         action="store_true",
         help="bypass data cache",
     )
+    parser_history.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use prices from the cache, no network access",
+    )
     parser_history.add_argument("-d", "--debug", action="store_true", help="enable debug logging")
 
     parser_list = subparsers.add_parser(
@@ -126,6 +150,13 @@ def main() -> None:
         dest="search_terms",
         help="search assets using SEARCH_TERM(S)",
     )
+    parser_list.add_argument(
+        "-nc",
+        "--nocache",
+        dest="no_cache",
+        action="store_true",
+        help="fetch the asset lists, instead of using those cached within the last day",
+    )
     parser_list.add_argument(
         "-ds",
         choices=datasource_choices(upper=True) + ["ALL"],
@@ -134,10 +165,63 @@ def main() -> None:
         type=str.upper,
         help="specify the data source to use, or all",
     )
+    parser_list.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use prices from the cache, no network access",
+    )
     parser_list.add_argument("-d", "--debug", action="store_true", help="enable debug logging")
 
+    parser_bulk = subparsers.add_parser(
+        CMD_BULK,
+        help="get the historical prices of many assets",
+        description=f"Get the historic prices (in {config.ccy}) for many queries, read as CSV from "
+        "a file or stdin. Each row is an asset, a date (YYYY-MM-DD or DD/MM/YYYY) and optionally "
+        "a quantity. The results are output as CSV, or as JSON (one object per line), in the "
+        "same order as the queries.",
+    )
+    parser_bulk.add_argument(
+        "filename",
+        type=str,
+        nargs="?",
+        help="filename of CSV file of queries, default: stdin",
+    )
+    parser_bulk.add_argument(
+        "-f",
+        "--format",
+        choices=[FORMAT_CSV, FORMAT_JSON],
+        default=FORMAT_CSV,
+        dest="output_format",
+        type=str.lower,
+        help="output format, default: csv",
+    )
+    parser_bulk.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use prices from the cache, no network access",
+    )
+    parser_bulk.add_argument("-d", "--debug", action="store_true", help="enable debug logging")
+
+    parser_seed = subparsers.add_parser(
+        CMD_SEED,
+        help="seed the price cache from a file",
+        description="Seed the price cache with the prices in a CSV or Parquet file. The file has "
+        "the columns: datasource, pair (i.e. ETH/BTC), date and price, and optionally url. "
+        "An empty price means there is no price for that date. Prices already cached for the "
+        "same dates are replaced.",
+    )
+    parser_seed.add_argument(
+        "filename",
+        type=str,
+        nargs="+",
+        help="filename of CSV or Parquet (.parquet) file",
+    )
+    parser_seed.add_argument("-d", "--debug", action="store_true", help="enable debug logging")
+
     args = parser.parse_args()
     config.debug = args.debug
+    if args.command != CMD_SEED and args.offline:
+        config.config["data_source_offline"] = True
 
     if config.debug:
         print(f"{Fore.YELLOW}{parser.prog} v{__version__}")
@@ -216,6 +300,9 @@ def main() -> None:
             else:
                 parser.exit(message=f"{WARNING} Current price for {symbol} is not available\n")
     elif args.command == CMD_LIST:
+        if not args.no_cache:
+            config.asset_list_max_age = ASSET_LIST_MAX_AGE
+
         symbol = args.asset
         try:
             asset_list = AssetData().get_assets(symbol, args.datasource, args.search_terms)
@@ -229,6 +316,102 @@ def main() -> None:
             parser.exit(message="No results found\n")
 
         output_assets(asset_list)
+    elif args.command == CMD_BULK:
+        bulk_query(parser, args.filename, args.output_format)
+    elif args.command == CMD_SEED:
+        seed_cache(parser, args.filename)
+
+
+def bulk_query(
+    parser: argparse.ArgumentParser, filename: Optional[str], output_format: str
+) -> None:
+    try:
+        if filename and filename != "-":
+            with open(filename, newline="", encoding="utf-8-sig") as query_file:
+                queries = read_queries(query_file, filename)
+        else:
+            queries = read_queries(sys.stdin, "<stdin>")
+    except IOError:
+        parser.exit(message=f"{ERROR} File could not be read: {filename}\n")
+    except PriceQueryError as e:
+        parser.exit(message=f"{ERROR} {e}\n")
+
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    if output_format == FORMAT_CSV:
+        writer.writerow(BULK_HEADER)
+
+    try:
+        # Results are output as they are resolved
+        for result in BulkQuery(queries).resolve():
+            if output_format == FORMAT_JSON:
+                sys.stdout.write(json.dumps(dict(zip(BULK_HEADER, bulk_result(result)))) + "\n")
+            else:
+                writer.writerow(["" if v is None else v for v in bulk_result(result)])
+            sys.stdout.flush()
+    except DataSourceError as e:
+        parser.exit(message=f"{ERROR} {e}\n")
+
+
+def read_queries(query_file: TextIO, filename: str) -> List[BqQuery]:
+    queries: List[BqQuery] = []
+    reader = csv.reader(query_file)
+    for row in reader:
+        row = [col.strip() for col in row]
+        if not any(row) or (not queries and row[0].lower() == "asset"):
+            # Blank lines and the header are skipped
+            continue
+
+        if len(row) not in (2, 3):
+            raise PriceQueryError(
+                filename, "Invalid query, use: asset, date[, quantity]", reader.line_num
+            )
+
+        try:
+            queries.append(
+                BqQuery(
+                    asset=AssetSymbol(row[0].upper()),
+                    timestamp=validate_date(row[1]),
+                    quantity=validate_quantity(row[2]) if len(row) == 3 and row[2] else Decimal(1),
+                )
+            )
+        except argparse.ArgumentTypeError as e:
+            raise PriceQueryError(filename, f"Invalid query, {e}", reader.line_num) from e
+    return queries
+
+
+def bulk_result(result: BqResult) -> List[Optional[str]]:
+    return [
+        result["asset"],
+        f"{result['timestamp']:%Y-%m-%d}",
+        f"{result['quantity'].normalize():f}",
+        f"{result['price_ccy'].normalize():f}" if result["price_ccy"] is not None else None,
+        f"{result['value'].normalize():f}" if result["value"] is not None else None,
+        config.ccy,
+        result["data_source"] or None,
+        result["name"] or None,
+    ]
+
+
+def seed_cache(parser: argparse.ArgumentParser, filenames: List[str]) -> None:
+    seed_data = SeedData()
+    for filename in filenames:
+        try:
+            seed_data.read_file(filename)
+        except IOError:
+            parser.exit(message=f"{ERROR} File could not be read: {filename}\n")
+        except PriceSeedError as e:
+            parser.exit(message=f"{ERROR} {e}\n")
+
+    try:
+        seeded = seed_data.write_cache()
+    except DataSourceError as e:
+        parser.exit(message=f"{ERROR} {e}\n")
+
+    for data_source, (price_cnt, pair_cnt) in seeded.items():
+        print(
+            f"{Fore.WHITE}{data_source}: {price_cnt:,} prices seeded "
+            f"({pair_cnt:,} pair{'s' if pair_cnt > 1 else ''})"
+        )
 
 
 def get_latest_btc_price() -> AsPriceRecord:
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from typing_extensions import TypedDict
+
+from ..bt_types import AssetName, AssetSymbol, DataSourceName, Date, Timestamp
+from ..config import config
+from .pricedata import PriceData
+from .valueasset import ValueAsset
+
+
+class BqQuery(TypedDict):  # pylint: disable=too-few-public-methods
+    asset: AssetSymbol
+    timestamp: Timestamp
+    quantity: Decimal
+
+
+class BqResult(BqQuery):  # pylint: disable=too-few-public-methods
+    price_ccy: Optional[Decimal]
+    value: Optional[Decimal]
+    name: AssetName
+    data_source: DataSourceName
+
+
+class BulkQuery:  # pylint: disable=too-few-public-methods
+    """Historical prices for many (asset, date, quantity) queries, resolved by the same price data.
+    The prices needed are fetched up front, and each asset and date is only looked up once."""
+
+    def __init__(self, queries: List[BqQuery]) -> None:
+        self.queries = queries
+
+    def resolve(self) -> Iterator[BqResult]:
+        # Priced as the price tool does, but without its output of each price looked up
+        value_asset = ValueAsset(
+            price_tool=True, price_data=PriceData(ValueAsset.data_sources_required())
+        )
+        value_asset.prefetch_historical_prices(
+            (query["asset"], Date(query["timestamp"].date())) for query in self.queries
+        )
+
+        resolved: Dict[
+            Tuple[AssetSymbol, Date], Tuple[Optional[Decimal], AssetName, DataSourceName]
+        ] = {}
+        for query in self.queries:
+            key = (query["asset"], Date(query["timestamp"].date()))
+            if key not in resolved:
+                if query["asset"] == config.ccy:
+                    resolved[key] = Decimal(1), AssetName(""), DataSourceName("")
+                else:
+                    resolved[key] = value_asset.get_historical_price(
+                        query["asset"], query["timestamp"]
+                    )
+
+            price_ccy, name, data_source = resolved[key]
+            yield BqResult(
+                asset=query["asset"],
+                timestamp=query["timestamp"],
+                quantity=query["quantity"],
+                price_ccy=price_ccy,
+                value=price_ccy * query["quantity"] if price_ccy is not None else None,
+                name=name,
+                data_source=data_source,
+            )
@@ -2,12 +2,15 @@
 # (c) Nano Nano Ltd 2019
 
 import atexit
+import bisect
 import json
 import os
 import platform
+import re
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import dateutil.parser
 import requests
@@ -27,8 +30,9 @@ from ..bt_types import (
 )
 from ..config import config
 from ..constants import CACHE_DIR, TZ_UTC, WARNING
+from ..profiler import profiler
 from ..version import __version__
-from .exceptions import UnexpectedDataSourceAssetIdError
+from .exceptions import DataSourceOfflineError, UnexpectedDataSourceAssetIdError
 
 
 class DsSymbolToAssetData(TypedDict):  # pylint: disable=too-few-public-methods
@@ -46,7 +50,7 @@ class DsPriceData(TypedDict):  # pylint: disable=too-few-public-methods
     url: SourceUrl
 
 
-class DataSourceBase:
+class DataSourceBase:  # pylint: disable=too-many-public-methods
     USER_AGENT = (
         f"BittyTax/{__version__} Python/{platform.python_version()} "
         f"{platform.system()}/{platform.release()}"
@@ -54,11 +58,32 @@ class DataSourceBase:
 
     TIME_OUT = 30
 
+    API_ROOT = ""
+
+    # Latest prices are only cached for the session, and not for long
+    LATEST_TTL = 300
+
+    # Assets per request for get_latest_multi
+    MAX_LATEST_ASSETS = 1
+
+    # The ranges of dates fetched for each pair are cached separately to the prices, so the
+    #  price cache can still be read by older versions
+    FETCHED_SUFFIX = ".fetched.json"
+
+    # Asset lists are cached, so the data source can be initialised offline
+    METADATA_DIR = "meta"
+
     def __init__(self) -> None:
         self.headers = {"User-Agent": self.USER_AGENT}
+        self.api_root = self.get_api_root(self.API_ROOT)
         self.assets: Dict[AssetSymbol, DsSymbolToAssetData] = {}
         self.ids: Dict[AssetId, DsIdToAssetData] = {}
         self.prices = self._load_prices()
+        # Only valid along with the prices they were fetched with
+        self.fetched = self._load_fetched() if self.prices else {}
+        self.latest_prices: Dict[TradingPair, Tuple[Optional[Decimal], float]] = {}
+        # Built on first use, once the data source has been initialised
+        self.asset_list: Optional[Dict[AssetSymbol, List[DsSymbolToAssetData]]] = None
 
         for pair in sorted(self.prices):
             if config.debug:
@@ -69,11 +94,23 @@ class DataSourceBase:
     def name(self) -> DataSourceName:
         return DataSourceName(self.__class__.__name__)
 
+    def get_api_root(self, default: str) -> str:
+        for data_source, api_root in config.data_source_api_root.items():
+            if data_source.upper() == self.name().upper():  # pylint: disable=E1101
+                return api_root.rstrip("/")
+        return default
+
     def get_json(self, url: str) -> Any:
+        if config.data_source_offline:
+            raise DataSourceOfflineError(self.name(), url)
+
         if config.debug:
             print(f"{Fore.YELLOW}price: GET {url} {list(self.headers.keys())}")
 
-        response = requests.get(url, headers=self.headers, timeout=self.TIME_OUT)
+        with profiler.span(f"http {self.name()}"):
+            response = requests.get(url, headers=self.headers, timeout=self.TIME_OUT)
+        profiler.count("http requests")
+        profiler.count("http bytes", len(response.content))
 
         if response.status_code in [401, 402, 403, 429, 502, 503, 504]:
             response.raise_for_status()
@@ -82,6 +119,45 @@ class DataSourceBase:
             return response.json()
         return {}
 
+    def get_metadata(self, path: str, default: Any) -> Any:
+        """Get the asset list (or other metadata) at the path, when online it is cached, and when
+        offline it is read from the cache. If it was never cached the default is returned."""
+
+        filename = os.path.join(
+            CACHE_DIR,
+            self.METADATA_DIR,
+            self.name() + re.sub(r"[^0-9A-Za-z]+", "_", path) + ".json",
+        )
+        if config.data_source_offline or (
+            os.path.exists(filename)
+            and time.time() - os.path.getmtime(filename) < config.asset_list_max_age
+        ):
+            try:
+                with open(filename, "r", encoding="utf-8") as metadata_cache:
+                    return json.load(metadata_cache)
+            except (IOError, ValueError):
+                if config.data_source_offline:
+                    if config.debug:
+                        print(f"{Fore.YELLOW}price: {self.name()} ({path}) metadata not cached")
+                    return default
+
+        json_resp = self.get_json(f"{self.api_root}{path}")
+        if json_resp:
+            if not os.path.exists(os.path.dirname(filename)):
+                os.mkdir(os.path.dirname(filename))
+
+            with open(filename, "w", encoding="utf-8") as metadata_cache:
+                json.dump(json_resp, metadata_cache)
+        return json_resp
+
+    def add_cached_assets(self) -> None:
+        # Offline, without an asset list, any asset in the price cache can still be priced
+        for pair in self.prices:
+            asset = AssetSymbol(pair.split("/")[0])
+            if asset not in self.assets:
+                self.assets[asset] = {"asset_id": AssetId(""), "name": AssetName(asset)}
+        self.asset_list = None
+
     def update_prices(
         self, pair: TradingPair, prices: Dict[Date, DsPriceData], timestamp: Timestamp
     ) -> None:
@@ -92,14 +168,75 @@ class DataSourceBase:
         #  filter any erroneous future dates returned
         prices = {k: v for k, v in prices.items() if k < datetime.now().date()}
 
+        # Every date between the first and last returned has been fetched, any that are missing
+        #  have no price, so they are not looked up again
+        if prices:
+            self._add_fetched(pair, min(prices), max(prices))
+
         # We might not receive data for the date requested, if so set to None to prevent repeat
         #  lookups, assuming date is in the past
         date = Date(timestamp.date())
         if date not in prices and date < datetime.now().date():
             prices[date] = {"price": None, "url": SourceUrl("")}
+            self._add_fetched(pair, date, date)
+
+        self.prices[pair].update(prices)
+
+    def seed_prices(self, pair: TradingPair, prices: Dict[Date, DsPriceData]) -> None:
+        # Seeded prices replace those cached, but are not recorded as fetched, as there may be gaps
+        if pair not in self.prices:
+            self.prices[pair] = {}
 
         self.prices[pair].update(prices)
 
+    def is_cached(self, pair: TradingPair, date: Date) -> bool:
+        if pair in self.prices and date in self.prices[pair]:
+            return True
+
+        ranges = self.fetched.get(pair, [])
+        i = bisect.bisect_right(ranges, (date, Date(date.max)))
+        return i > 0 and ranges[i - 1][1] >= date
+
+    def get_cached(self, pair: TradingPair, date: Date) -> DsPriceData:
+        if pair in self.prices and date in self.prices[pair]:
+            return self.prices[pair][date]
+        return {"price": None, "url": SourceUrl("")}
+
+    def _unfetched_range(self, pair: TradingPair, date: Date) -> Tuple[Optional[Date], Date]:
+        """The range of dates around the date which have not been fetched, the start is None if
+        no earlier dates have been fetched, and the end is no later than yesterday."""
+
+        ranges = self.fetched.get(pair, [])
+        i = bisect.bisect_right(ranges, (date, Date(date.max)))
+        end = Date(datetime.now().date() - timedelta(days=1))
+        if i > 0 and ranges[i - 1][1] >= date:
+            # Already fetched, i.e. it's being fetched again, so the cache is ignored
+            return None, end
+
+        start = Date(ranges[i - 1][1] + timedelta(days=1)) if i > 0 else None
+        if i < len(ranges):
+            end = min(end, Date(ranges[i][0] - timedelta(days=1)))
+        return start, end
+
+    def _add_fetched(self, pair: TradingPair, start: Date, end: Date) -> None:
+        ranges: List[Tuple[Date, Date]] = []
+        for range_start, range_end in sorted(self.fetched.get(pair, []) + [(start, end)]):
+            if ranges and range_start <= ranges[-1][1] + timedelta(days=1):
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], range_end))
+            else:
+                ranges.append((range_start, range_end))
+        self.fetched[pair] = ranges
+
+    def is_latest_cached(self, pair: TradingPair) -> bool:
+        return pair in self.latest_prices and self.latest_prices[pair][1] > time.monotonic()
+
+    def update_latest_prices(
+        self, quote: QuoteSymbol, prices: Dict[AssetSymbol, Optional[Decimal]]
+    ) -> None:
+        expires = time.monotonic() + self.LATEST_TTL
+        for asset, price in prices.items():
+            self.latest_prices[self.pair(asset, quote)] = (price, expires)
+
     def _load_prices(self) -> Dict[TradingPair, Dict[Date, DsPriceData]]:
         filename = os.path.join(CACHE_DIR, self.name() + ".json")
         if not os.path.exists(filename):
@@ -122,6 +259,24 @@ class DataSourceBase:
             print(f"{WARNING} Data cached for {self.name()} could not be loaded")
             return {}
 
+    def _load_fetched(self) -> Dict[TradingPair, List[Tuple[Date, Date]]]:
+        filename = os.path.join(CACHE_DIR, self.name() + self.FETCHED_SUFFIX)
+        if not os.path.exists(filename):
+            return {}
+
+        try:
+            with open(filename, "r", encoding="utf-8") as fetched_cache:
+                json_fetched = json.load(fetched_cache)
+                return {
+                    pair: [
+                        (self.str_to_date(start), self.str_to_date(end)) for start, end in ranges
+                    ]
+                    for pair, ranges in json_fetched.items()
+                    if pair in self.prices
+                }
+        except (IOError, ValueError):
+            return {}
+
     def _cache_prices(self) -> None:
         with open(
             os.path.join(CACHE_DIR, self.name() + ".json"), "w", encoding="utf-8"
@@ -138,6 +293,15 @@ class DataSourceBase:
             }
             json.dump(json_prices, price_cache, indent=4, sort_keys=True)
 
+        with open(
+            os.path.join(CACHE_DIR, self.name() + self.FETCHED_SUFFIX), "w", encoding="utf-8"
+        ) as fetched_cache:
+            json_fetched = {
+                pair: [[f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}"] for start, end in ranges]
+                for pair, ranges in self.fetched.items()
+            }
+            json.dump(json_fetched, fetched_cache, indent=4, sort_keys=True)
+
     def get_config_assets(self) -> None:
         for symbol in config.data_source_select:
             for ds_select in config.data_source_select[symbol]:
@@ -155,19 +319,23 @@ class DataSourceBase:
                     f"{symbol} added as {self.name()} [ID:{asset_id}] "
                     f'({self.ids[asset_id]["name"]})'
                 )
-        else:
+        elif not (config.data_source_offline and not self.ids):
             raise UnexpectedDataSourceAssetIdError(ds_select, symbol)
 
     def get_list(self) -> Dict[AssetSymbol, List[DsSymbolToAssetData]]:
-        asset_list = {k: [v] for k, v in self.assets.items()}
+        if self.asset_list is None:
+            asset_list = {k: [v] for k, v in self.assets.items()}
+            listed = {(k, v["asset_id"], v["name"]) for k, v in self.assets.items()}
 
-        if self.ids:
             for k, v in self.ids.items():
-                asset_data = DsSymbolToAssetData({"asset_id": k, "name": v["name"]})
-                if asset_data not in asset_list[v["symbol"]]:
-                    asset_list[v["symbol"]].append(asset_data)
+                if (v["symbol"], k, v["name"]) not in listed:
+                    listed.add((v["symbol"], k, v["name"]))
+                    asset_list.setdefault(v["symbol"], []).append(
+                        DsSymbolToAssetData({"asset_id": k, "name": v["name"]})
+                    )
+            self.asset_list = asset_list
 
-        return asset_list
+        return self.asset_list
 
     def get_latest(
         self, _asset: AssetSymbol, _quote: QuoteSymbol, _asset_id: AssetId = AssetId("")
@@ -181,6 +349,18 @@ class DataSourceBase:
         _asset_id: AssetId = AssetId(""),
     ) -> None: ...
 
+    def get_latest_multi(
+        self, assets: List[AssetSymbol], quote: QuoteSymbol
+    ) -> Dict[AssetSymbol, Optional[Decimal]]:
+        # Overridden by data sources which can return the prices of many assets in one request
+        return {asset: self.get_latest(asset, quote) for asset in assets}
+
+    def get_historical_range(
+        self, _asset: AssetSymbol, _quote: QuoteSymbol, _start: Date, _end: Date
+    ) -> bool:
+        # Overridden by data sources which can return every day of a range in one request
+        return False
+
     @classmethod
     def datasources_str(cls) -> str:
         return f"{{{','.join([ds.__name__ for ds in cls.__subclasses__()])}}}"
@@ -214,9 +394,11 @@ class DataSourceBase:
 
 
 class BittyTaxAPI(DataSourceBase):
+    API_ROOT = "https://api.bitty.tax/v1"
+
     def __init__(self) -> None:
         super().__init__()
-        json_resp = self.get_json("https://api.bitty.tax/v1/symbols")
+        json_resp = self.get_metadata("/symbols", {"symbols": {}})
         self.assets = {
             k: {"asset_id": AssetId(""), "name": v} for k, v in json_resp["symbols"].items()
         }
@@ -224,7 +406,7 @@ class BittyTaxAPI(DataSourceBase):
     def get_latest(
         self, asset: AssetSymbol, quote: QuoteSymbol, _asset_id: AssetId = AssetId("")
     ) -> Optional[Decimal]:
-        json_resp = self.get_json(f"https://api.bitty.tax/v1/latest?base={asset}&symbols={quote}")
+        json_resp = self.get_json(f"{self.api_root}/latest?base={asset}&symbols={quote}")
         return (
             Decimal(repr(json_resp["rates"][quote]))
             if "rates" in json_resp and quote in json_resp["rates"]
@@ -238,7 +420,7 @@ class BittyTaxAPI(DataSourceBase):
         timestamp: Timestamp,
         _asset_id: AssetId = AssetId(""),
     ) -> None:
-        url = f"https://api.bitty.tax/v1/{timestamp:%Y-%m-%d}?base={asset}&symbols={quote}"
+        url = f"{self.api_root}/{timestamp:%Y-%m-%d}?base={asset}&symbols={quote}"
         json_resp = self.get_json(url)
         pair = self.pair(asset, quote)
         # Date returned in response might not be date requested due to weekends/holidays
@@ -259,6 +441,8 @@ class BittyTaxAPI(DataSourceBase):
 
 
 class Frankfurter(DataSourceBase):
+    API_ROOT = "https://api.frankfurter.app"
+
     def __init__(self) -> None:
         super().__init__()
         currencies = [
@@ -313,7 +497,7 @@ class Frankfurter(DataSourceBase):
     def get_latest(
         self, asset: AssetSymbol, quote: QuoteSymbol, _asset_id: AssetId = AssetId("")
     ) -> Optional[Decimal]:
-        json_resp = self.get_json(f"https://api.frankfurter.app/latest?from={asset}&to={quote}")
+        json_resp = self.get_json(f"{self.api_root}/latest?from={asset}&to={quote}")
         return (
             Decimal(repr(json_resp["rates"][quote]))
             if "rates" in json_resp and quote in json_resp["rates"]
@@ -327,7 +511,7 @@ class Frankfurter(DataSourceBase):
         timestamp: Timestamp,
         _asset_id: AssetId = AssetId(""),
     ) -> None:
-        url = f"https://api.frankfurter.app/{timestamp:%Y-%m-%d}?from={asset}&to={quote}"
+        url = f"{self.api_root}/{timestamp:%Y-%m-%d}?from={asset}&to={quote}"
         json_resp = self.get_json(url)
         pair = self.pair(asset, quote)
         # Date returned in response might not be date requested due to weekends/holidays
@@ -346,8 +530,45 @@ class Frankfurter(DataSourceBase):
             timestamp,
         )
 
+    def get_historical_range(
+        self, asset: AssetSymbol, quote: QuoteSymbol, start: Date, end: Date
+    ) -> bool:
+        # Start a week early, so there's a working day rate to carry forward to the first day
+        url = (
+            f"{self.api_root}/{start - timedelta(days=7):%Y-%m-%d}..{end:%Y-%m-%d}"
+            f"?from={asset}&to={quote}"
+        )
+        json_resp = self.get_json(url)
+        rates = {
+            self.str_to_date(date): Decimal(repr(rate[quote]))
+            for date, rate in json_resp.get("rates", {}).items()
+            if quote in rate
+        }
+
+        # Weekends and holidays have no rate, a single day request returns the previous working
+        #  day's rate for them, so the same is done here
+        prices: Dict[Date, DsPriceData] = {}
+        price = None
+        for days in range((end - start).days + 8):
+            date = Date(start + timedelta(days=days - 7))
+            price = rates.get(date, price)
+            if date >= start:
+                prices[date] = {
+                    "price": price,
+                    "url": SourceUrl(f"{self.api_root}/{date:%Y-%m-%d}?from={asset}&to={quote}"),
+                }
+
+        self.update_prices(
+            self.pair(asset, quote),
+            prices,
+            Timestamp(datetime.combine(start, datetime.min.time(), tzinfo=TZ_UTC)),
+        )
+        return True
+
 
 class CoinDesk(DataSourceBase):
+    API_ROOT = "https://api.coindesk.com/v1/bpi"
+
     def __init__(self) -> None:
         super().__init__()
         self.assets = {AssetSymbol("BTC"): {"asset_id": AssetId(""), "name": AssetName("Bitcoin")}}
@@ -355,7 +576,7 @@ class CoinDesk(DataSourceBase):
     def get_latest(
         self, _asset: AssetSymbol, quote: QuoteSymbol, _asset_id: AssetId = AssetId("")
     ) -> Optional[Decimal]:
-        json_resp = self.get_json("https://api.coindesk.com/v1/bpi/currentprice.json")
+        json_resp = self.get_json(f"{self.api_root}/currentprice.json")
         return (
             Decimal(repr(json_resp["bpi"][quote]["rate_float"]))
             if "bpi" in json_resp and quote in json_resp["bpi"]
@@ -369,12 +590,14 @@ class CoinDesk(DataSourceBase):
         timestamp: Timestamp,
         _asset_id: AssetId = AssetId(""),
     ) -> None:
+        pair = self.pair(asset, quote)
+        _, end = self._unfetched_range(pair, Date(timestamp.date()))
         url = (
-            f"https://api.coindesk.com/v1/bpi/historical/close.json"
-            f"?start={timestamp:%Y-%m-%d}&end={datetime.now():%Y-%m-%d}&currency={quote}"
+            f"{self.api_root}/historical/close.json"
+            f"?start={timestamp:%Y-%m-%d}&end={max(end, timestamp.date()):%Y-%m-%d}"
+            f"&currency={quote}"
         )
         json_resp = self.get_json(url)
-        pair = self.pair(asset, quote)
         if "bpi" in json_resp:
             self.update_prices(
                 pair,
@@ -390,7 +613,10 @@ class CoinDesk(DataSourceBase):
 
 
 class CryptoCompare(DataSourceBase):
+    API_ROOT = "https://min-api.cryptocompare.com"
     MAX_DAYS = 2000
+    # The fsyms parameter is limited to 300 characters
+    MAX_LATEST_ASSETS = 30
 
     def __init__(self) -> None:
         super().__init__()
@@ -398,9 +624,7 @@ class CryptoCompare(DataSourceBase):
         if "cryptocompare_api_key" in config.config:
             self.headers["authorization"] = f"Apikey {config.cryptocompare_api_key}"
 
-        self.api_root = "https://min-api.cryptocompare.com"
-
-        json_resp = self.get_json(f"{self.api_root}/data/all/coinlist")
+        json_resp = self.get_metadata("/data/all/coinlist", {"Response": "Success", "Data": {}})
         if json_resp["Response"] != "Success":
             raise RuntimeError(f"CryptoCompare API failure: {json_resp.get('Message', '')}")
 
@@ -431,6 +655,31 @@ class CryptoCompare(DataSourceBase):
         )
         return Decimal(repr(json_resp[quote])) if quote in json_resp else None
 
+    def get_latest_multi(
+        self, assets: List[AssetSymbol], quote: QuoteSymbol
+    ) -> Dict[AssetSymbol, Optional[Decimal]]:
+        asset_ids: Dict[str, List[AssetSymbol]] = {}
+        for asset in assets:
+            asset_ids.setdefault(self.assets[asset]["asset_id"].upper(), []).append(asset)
+
+        json_resp = self.get_json(
+            f"{self.api_root}/data/pricemulti?extraParams={self.USER_AGENT}"
+            f"&fsyms={','.join(asset_ids)}&tsyms={quote}"
+        )
+        if json_resp.get("Response") == "Error":
+            return {}
+
+        prices = {k.upper(): v for k, v in json_resp.items()}
+        return {
+            asset: (
+                Decimal(repr(prices[asset_id][quote]))
+                if asset_id in prices and quote in prices[asset_id]
+                else None
+            )
+            for asset_id, id_assets in asset_ids.items()
+            for asset in id_assets
+        }
+
     def get_historical(
         self,
         asset: AssetSymbol,
@@ -469,22 +718,24 @@ class CryptoCompare(DataSourceBase):
 
 
 class CoinGecko(DataSourceBase):
+    API_ROOT = "https://api.coingecko.com/api/v3"
+    PRO_API_ROOT = "https://pro-api.coingecko.com/api/v3"
     PRO_KEY = "x-cg-pro-api-key"
     DEMO_KEY = "x-cg-demo-api-key"
+    MAX_LATEST_ASSETS = 250
+    # Public API is limited to 365 days of historical price data
+    PUBLIC_MAX_DAYS = 365
 
     def __init__(self) -> None:
         super().__init__()
 
         if "coingecko_pro_api_key" in config.config:
             self.headers[self.PRO_KEY] = f"{config.coingecko_pro_api_key}"
-            self.api_root = "https://pro-api.coingecko.com/api/v3"
+            self.api_root = self.get_api_root(self.PRO_API_ROOT)
         elif "coingecko_demo_api_key" in config.config:
             self.headers[self.DEMO_KEY] = config.coingecko_demo_api_key
-            self.api_root = "https://api.coingecko.com/api/v3"
-        else:
-            self.api_root = "https://api.coingecko.com/api/v3"
 
-        json_resp = self.get_json(f"{self.api_root}/coins/list?status=active")
+        json_resp = self.get_metadata("/coins/list?status=active", [])
         self.ids = {
             c["id"]: {"symbol": c["symbol"].strip().upper(), "name": c["name"].strip()}
             for c in json_resp
@@ -494,7 +745,7 @@ class CoinGecko(DataSourceBase):
             for c in json_resp
         }
         if self.PRO_KEY in self.headers:
-            json_resp = self.get_json(f"{self.api_root}/coins/list?status=inactive")
+            json_resp = self.get_metadata("/coins/list?status=inactive", [])
             for c in json_resp:
                 self.ids[c["id"]] = {
                     "symbol": c["symbol"].strip().upper(),
@@ -525,6 +776,27 @@ class CoinGecko(DataSourceBase):
             else None
         )
 
+    def get_latest_multi(
+        self, assets: List[AssetSymbol], quote: QuoteSymbol
+    ) -> Dict[AssetSymbol, Optional[Decimal]]:
+        asset_ids: Dict[str, List[AssetSymbol]] = {}
+        for asset in assets:
+            asset_ids.setdefault(self.assets[asset]["asset_id"], []).append(asset)
+
+        json_resp = self.get_json(
+            f"{self.api_root}/simple/price?ids={','.join(asset_ids)}"
+            f"&vs_currencies={quote.lower()}"
+        )
+        return {
+            asset: (
+                Decimal(repr(json_resp[asset_id][quote.lower()]))
+                if asset_id in json_resp and quote.lower() in json_resp[asset_id]
+                else None
+            )
+            for asset_id, id_assets in asset_ids.items()
+            for asset in id_assets
+        }
+
     def get_historical(
         self,
         asset: AssetSymbol,
@@ -535,30 +807,47 @@ class CoinGecko(DataSourceBase):
         if not asset_id:
             asset_id = self.assets[asset]["asset_id"]
 
-        if self.PRO_KEY in self.headers:
-            days = "max"
-        else:
-            # Public API is limited to 365 days of historical price data
-            days = "365"
-
-        url = f"{self.api_root}/coins/{asset_id}/market_chart?vs_currency={quote}&days={days}"
-        json_resp = self.get_json(url)
         pair = self.pair(asset, quote)
+        start, end = self._unfetched_range(pair, Date(timestamp.date()))
+
+        if self.PRO_KEY not in self.headers:
+            earliest = Date(datetime.now().date() - timedelta(days=self.PUBLIC_MAX_DAYS))
+            if end < earliest:
+                # None of the dates still to be fetched can be returned, so just the date
+                #  requested is cached as having no price
+                self.update_prices(pair, {}, timestamp)
+                return
+            start = max(start, earliest) if start else earliest
+
+        # Only the range of dates not yet fetched is requested
+        from_ts = self._utc_seconds(start) if start else 0
+        to_ts = self._utc_seconds(Date(end + timedelta(days=1))) - 1
+        url = (
+            f"{self.api_root}/coins/{asset_id}/market_chart/range?vs_currency={quote}"
+            f"&from={from_ts}&to={to_ts}"
+        )
+        json_resp = self.get_json(url)
         if "prices" in json_resp:
-            self.update_prices(
-                pair,
-                {
-                    Date(datetime.utcfromtimestamp(p[0] / 1000).date()): {
-                        "price": Decimal(repr(p[1])) if p[1] else None,
-                        "url": SourceUrl(url),
-                    }
-                    for p in json_resp["prices"]
-                },
-                timestamp,
-            )
+            prices: Dict[Date, DsPriceData] = {}
+            for p in json_resp["prices"]:
+                # Ranges of less than 90 days are returned hourly, the first price of each day is
+                #  the same time of day (midnight UTC) as the daily prices
+                prices.setdefault(
+                    Date(datetime.utcfromtimestamp(p[0] / 1000).date()),
+                    {"price": Decimal(repr(p[1])) if p[1] else None, "url": SourceUrl(url)},
+                )
+            self.update_prices(pair, prices, timestamp)
+            # The whole range was requested, including any dates before the first price
+            self._add_fetched(pair, start or Date(datetime.utcfromtimestamp(0).date()), end)
+
+    @staticmethod
+    def _utc_seconds(date: Date) -> int:
+        return int(datetime.combine(date, datetime.min.time(), tzinfo=TZ_UTC).timestamp())
 
 
 class CoinPaprika(DataSourceBase):
+    API_ROOT = "https://api.coinpaprika.com/v1"
+    PRO_API_ROOT = "https://api-pro.coinpaprika.com/v1"
     MAX_DAYS = 5000
 
     def __init__(self) -> None:
@@ -566,11 +855,9 @@ class CoinPaprika(DataSourceBase):
 
         if "coinpaprika_api_key" in config.config:
             self.headers["Authorization"] = f"{config.coinpaprika_api_key}"
-            self.api_root = "https://api-pro.coinpaprika.com/v1"
-        else:
-            self.api_root = "https://api.coinpaprika.com/v1"
+            self.api_root = self.get_api_root(self.PRO_API_ROOT)
 
-        json_resp = self.get_json(f"{self.api_root}/coins")
+        json_resp = self.get_metadata("/coins", [])
         self.ids = {
             c["id"]: {"symbol": c["symbol"].strip().upper(), "name": c["name"].strip()}
             for c in json_resp
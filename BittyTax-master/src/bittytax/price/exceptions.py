@@ -28,3 +28,29 @@ class UnexpectedDataSourceAssetIdError(DataSourceError):
             f"Invalid data source asset ID: '{self.data_source}' for '{self.value}' in "
             f"{os.path.join(BITTYTAX_PATH, config.BITTYTAX_CONFIG)}"
         )
+
+
+class DataSourceOfflineError(DataSourceError):
+    def __str__(self) -> str:
+        return f"Offline, {self.data_source} cannot be accessed: {self.value}"
+
+
+class PriceFileError(Exception):
+    def __init__(self, filename: str, msg: str, line_num: int = 0) -> None:
+        super().__init__()
+        self.filename = filename
+        self.msg = msg
+        self.line_num = line_num
+
+    def __str__(self) -> str:
+        if self.line_num:
+            return f"{self.msg}, line {self.line_num}: {self.filename}"
+        return f"{self.msg}: {self.filename}"
+
+
+class PriceSeedError(PriceFileError):
+    pass
+
+
+class PriceQueryError(PriceFileError):
+    pass
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 # (c) Nano Nano Ltd 2019
 
+import atexit
+import itertools
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+import requests
 from colorama import Fore
 
 from ..bt_types import (
@@ -18,24 +25,40 @@ from ..bt_types import (
     TradingPair,
 )
 from ..config import config
-from ..constants import CACHE_DIR
+from ..constants import CACHE_DIR, WARNING
+from ..profiler import profiler
 from .datasource import DataSourceBase
 from .exceptions import UnexpectedDataSourceError
 
 
 class PriceData:
+    # Latest prices are requested concurrently, by a small number of threads so that the data
+    #  source's rate limits are not hit
+    LATEST_WORKERS = 4
+
     def __init__(
         self, data_sources_required: List[DataSourceName], price_tool: bool = False
     ) -> None:
         self.price_tool = price_tool
         self.data_sources = {}
+        self.pair_locks: Dict[Tuple[str, TradingPair], threading.Lock] = {}
+        self.pair_locks_lock = threading.Lock()
+        # Offline, the prices which could not be looked up as they are not cached
+        self.offline_misses: Dict[TradingPair, Set[Date]] = {}
+        self.offline_latest_misses: Set[TradingPair] = set()
 
         if not os.path.exists(CACHE_DIR):
             os.mkdir(CACHE_DIR)
 
         for data_source_class in DataSourceBase.__subclasses__():
             if data_source_class.__name__.upper() in [ds.upper() for ds in data_sources_required]:
-                self.data_sources[data_source_class.__name__.upper()] = data_source_class()
+                ds = data_source_class()
+                if config.data_source_offline:
+                    ds.add_cached_assets()
+                self.data_sources[data_source_class.__name__.upper()] = ds
+
+        if config.data_source_offline:
+            atexit.register(self.report_offline_misses)
 
     @staticmethod
     def data_source_priority(asset: AssetSymbol) -> List[DataSourceName]:
@@ -49,11 +72,21 @@ class PriceData:
         self, data_source: DataSourceName, asset: AssetSymbol, quote: QuoteSymbol
     ) -> Tuple[Optional[Decimal], AssetName]:
         if data_source.upper() in self.data_sources:
-            if asset in self.data_sources[data_source.upper()].assets:
-                return (
-                    self.data_sources[data_source.upper()].get_latest(asset, quote),
-                    self.data_sources[data_source.upper()].assets[asset]["name"],
-                )
+            ds = self.data_sources[data_source.upper()]
+            if asset in ds.assets:
+                pair = TradingPair(asset + "/" + quote)
+                if ds.is_latest_cached(pair):
+                    profiler.count("latest price cache hits")
+                    return ds.latest_prices[pair][0], ds.assets[asset]["name"]
+
+                if config.data_source_offline:
+                    # Latest prices are never cached between runs
+                    self.offline_latest_misses.add(pair)
+                    return None, ds.assets[asset]["name"]
+
+                price = ds.get_latest(asset, quote)
+                ds.update_latest_prices(quote, {asset: price})
+                return price, ds.assets[asset]["name"]
 
             return None, AssetName("")
         raise UnexpectedDataSourceError(data_source, DataSourceBase.datasources_str())
@@ -71,32 +104,36 @@ class PriceData:
                 date = Date(timestamp.date())
                 pair = TradingPair(asset + "/" + quote)
 
+                ds = self.data_sources[data_source.upper()]
+
+                if config.data_source_offline:
+                    # Only cached prices can be used, even if the cache is to be bypassed
+                    return (
+                        ds.get_cached(pair, date)["price"],
+                        ds.assets[asset]["name"],
+                        ds.get_cached(pair, date)["url"],
+                    )
+
                 if not no_cache:
                     # Check cache first
-                    if (
-                        pair in self.data_sources[data_source.upper()].prices
-                        and date in self.data_sources[data_source.upper()].prices[pair]
-                    ):
+                    if ds.is_cached(pair, date):
+                        profiler.count("price cache hits")
                         return (
-                            self.data_sources[data_source.upper()].prices[pair][date]["price"],
-                            self.data_sources[data_source.upper()].assets[asset]["name"],
-                            self.data_sources[data_source.upper()].prices[pair][date]["url"],
+                            ds.get_cached(pair, date)["price"],
+                            ds.assets[asset]["name"],
+                            ds.get_cached(pair, date)["url"],
                         )
 
-                self.data_sources[data_source.upper()].get_historical(asset, quote, timestamp)
-                if (
-                    pair in self.data_sources[data_source.upper()].prices
-                    and date in self.data_sources[data_source.upper()].prices[pair]
-                ):
-                    return (
-                        self.data_sources[data_source.upper()].prices[pair][date]["price"],
-                        self.data_sources[data_source.upper()].assets[asset]["name"],
-                        self.data_sources[data_source.upper()].prices[pair][date]["url"],
-                    )
+                profiler.count("price cache misses")
+                with self._pair_lock(data_source, pair):
+                    # Another thread might have fetched it while this one was waiting
+                    if no_cache or not ds.is_cached(pair, date):
+                        ds.get_historical(asset, quote, timestamp)
+
                 return (
-                    None,
-                    self.data_sources[data_source.upper()].assets[asset]["name"],
-                    SourceUrl(""),
+                    ds.get_cached(pair, date)["price"],
+                    ds.assets[asset]["name"],
+                    ds.get_cached(pair, date)["url"],
                 )
             return None, AssetName(""), SourceUrl("")
         raise UnexpectedDataSourceError(data_source, DataSourceBase.datasources_str())
@@ -143,4 +180,150 @@ class PriceData:
                         f"{Fore.CYAN}via {self.data_sources[data_source.upper()].name()} ({name})"
                     )
                 return price, name, self.data_sources[data_source.upper()].name(), url
+
+        date = Date(timestamp.date())
+        if config.data_source_offline and not self.is_historical_cached(asset, quote, date):
+            self.offline_misses.setdefault(TradingPair(asset + "/" + quote), set()).add(date)
         return None, name, DataSourceName(""), SourceUrl("")
+
+    def is_historical_cached(self, asset: AssetSymbol, quote: QuoteSymbol, date: Date) -> bool:
+        listed = False
+        for data_source in self.data_source_priority(asset):
+            if data_source.upper() not in self.data_sources:
+                return False
+
+            ds = self.data_sources[data_source.upper()]
+            if asset in ds.assets:
+                listed = True
+                pair = TradingPair(asset + "/" + quote)
+                if not ds.is_cached(pair, date):
+                    return False
+                if ds.get_cached(pair, date)["price"] is not None:
+                    return True
+
+        # Not listed by any data source, offline this can be because its asset list was never
+        #  cached, so it can't be known that there's no price
+        return listed
+
+    def prefetch_historical(self, asset: AssetSymbol, quote: QuoteSymbol, dates: Set[Date]) -> None:
+        """Fetch the historical prices for all the dates which are not already cached, a range of
+        days per request, for data sources that support it."""
+
+        if config.data_source_offline:
+            return
+
+        pair = TradingPair(asset + "/" + quote)
+        for data_source in self.data_source_priority(asset):
+            if data_source.upper() not in self.data_sources:
+                raise UnexpectedDataSourceError(data_source, DataSourceBase.datasources_str())
+
+            ds = self.data_sources[data_source.upper()]
+            if asset not in ds.assets:
+                continue
+
+            with self._pair_lock(data_source, pair):
+                for start, end in self._date_ranges(d for d in dates if not ds.is_cached(pair, d)):
+                    if not ds.get_historical_range(asset, quote, start, end):
+                        # Left to be fetched a day at a time as they are looked up
+                        return
+
+            # Any dates without a price fall through to the next data source
+            dates = {d for d in dates if ds.get_cached(pair, d)["price"] is None}
+            if not dates:
+                return
+
+    def prefetch_latest(self, assets: Iterable[AssetSymbol], quote: QuoteSymbol) -> None:
+        """Fetch the latest prices for all the assets which are not already cached, many assets
+        per request for data sources that support it, with the requests made concurrently."""
+
+        if config.data_source_offline:
+            return
+
+        priorities = {asset: iter(self.data_source_priority(asset)) for asset in set(assets)}
+        while priorities:
+            # Each asset is requested from the next data source which might have its price
+            requested: Dict[str, List[AssetSymbol]] = {}
+            for asset, priority in list(priorities.items()):
+                for data_source in priority:
+                    if data_source.upper() not in self.data_sources:
+                        raise UnexpectedDataSourceError(
+                            data_source, DataSourceBase.datasources_str()
+                        )
+
+                    ds = self.data_sources[data_source.upper()]
+                    if asset not in ds.assets:
+                        continue
+
+                    pair = TradingPair(asset + "/" + quote)
+                    if not ds.is_latest_cached(pair):
+                        requested.setdefault(data_source.upper(), []).append(asset)
+                        break
+                    if ds.latest_prices[pair][0] is not None:
+                        del priorities[asset]
+                        break
+                else:
+                    del priorities[asset]
+
+            chunks = [
+                (ds_name, ds_assets[i : i + self.data_sources[ds_name].MAX_LATEST_ASSETS])
+                for ds_name, ds_assets in requested.items()
+                for i in range(0, len(ds_assets), self.data_sources[ds_name].MAX_LATEST_ASSETS)
+            ]
+            with ThreadPoolExecutor(max_workers=self.LATEST_WORKERS) as executor:
+                results = executor.map(
+                    self._get_latest_multi,
+                    [ds_name for ds_name, _ in chunks],
+                    [chunk for _, chunk in chunks],
+                    itertools.repeat(quote),
+                )
+                for (ds_name, chunk), prices in zip(chunks, results):
+                    self.data_sources[ds_name].update_latest_prices(quote, prices)
+                    for asset in chunk:
+                        # Only assets known not to have a price try the next data source, any
+                        #  others not returned are left to be requested as they are looked up
+                        if asset not in prices or prices[asset] is not None:
+                            del priorities[asset]
+
+    def report_offline_misses(self) -> None:
+        if not self.offline_misses and not self.offline_latest_misses:
+            return
+
+        # Output to stderr, as the price tool can output results to stdout
+        sys.stderr.write(f"{WARNING} Offline, these prices are not in the cache:\n")
+        for pair in sorted(self.offline_misses):
+            dates = self.offline_misses[pair]
+            if len(dates) > 1:
+                sys.stderr.write(
+                    f"{Fore.YELLOW}  {pair}: {len(dates)} dates "
+                    f"({min(dates):%Y-%m-%d} to {max(dates):%Y-%m-%d})\n"
+                )
+            else:
+                sys.stderr.write(f"{Fore.YELLOW}  {pair}: {min(dates):%Y-%m-%d}\n")
+        for pair in sorted(self.offline_latest_misses):
+            sys.stderr.write(f"{Fore.YELLOW}  {pair}: latest\n")
+
+    def _get_latest_multi(
+        self, ds_name: str, assets: List[AssetSymbol], quote: QuoteSymbol
+    ) -> Dict[AssetSymbol, Optional[Decimal]]:
+        try:
+            return self.data_sources[ds_name].get_latest_multi(assets, quote)
+        except requests.exceptions.HTTPError:
+            return {}
+
+    def _pair_lock(self, data_source: DataSourceName, pair: TradingPair) -> threading.Lock:
+        # Prices can be looked up by more than one thread, only one of them fetches each pair
+        key = (data_source.upper(), pair)
+        with self.pair_locks_lock:
+            if key not in self.pair_locks:
+                self.pair_locks[key] = threading.Lock()
+            return self.pair_locks[key]
+
+    @staticmethod
+    def _date_ranges(dates: Iterable[Date], max_days: int = 365) -> List[Tuple[Date, Date]]:
+        ranges: List[Tuple[Date, Date]] = []
+        for date in sorted(dates):
+            if ranges and date - ranges[-1][0] <= timedelta(days=max_days):
+                ranges[-1] = (ranges[-1][0], date)
+            else:
+                ranges.append((date, date))
+        return ranges
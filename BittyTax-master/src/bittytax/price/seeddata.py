@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+import csv
+import datetime
+import os
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..bt_types import Date, SourceUrl, TradingPair
+from ..config import config
+from ..constants import CACHE_DIR
+from .datasource import DataSourceBase, DsPriceData
+from .exceptions import PriceSeedError
+
+SEED_COLUMNS = ("datasource", "pair", "date", "price")
+
+
+class SeedData:
+    """Prices from a dump of (datasource, pair, date, price) rows, and optionally the url of the
+    source of each price, used to seed the price cache of each data source."""
+
+    def __init__(self) -> None:
+        self.data_source_names = {ds.__name__.upper(): ds for ds in DataSourceBase.__subclasses__()}
+        self.prices: Dict[str, Dict[TradingPair, Dict[Date, DsPriceData]]] = {}
+
+    def read_file(self, filename: str) -> None:
+        _, file_extension = os.path.splitext(filename)
+        if file_extension.lower() == ".parquet":
+            rows = self._read_parquet(filename)
+        else:
+            rows = self._read_csv(filename)
+
+        for line_num, row in rows:
+            data_source = str(row["datasource"] or "").strip().upper()
+            if data_source not in self.data_source_names:
+                raise PriceSeedError(
+                    filename, f"Invalid data source: '{row['datasource']}'", line_num
+                )
+
+            pair = str(row["pair"] or "").strip().upper()
+            if not re.match(r"^[^/\s]+/[^/\s]+$", pair):
+                raise PriceSeedError(filename, f"Invalid pair: '{row['pair']}'", line_num)
+
+            date = self._to_date(filename, line_num, row["date"])
+            # Only closing prices are cached, so today's (or later) are ignored
+            if date >= datetime.date.today():
+                continue
+
+            self.prices.setdefault(data_source, {}).setdefault(TradingPair(pair), {})[date] = {
+                "price": self._to_decimal(filename, line_num, row["price"]),
+                "url": SourceUrl(str(row.get("url") or "")),
+            }
+
+    def write_cache(self) -> Dict[str, Tuple[int, int]]:
+        # The data sources are not used to fetch prices, so they are initialised offline
+        config.config["data_source_offline"] = True
+
+        if not os.path.exists(CACHE_DIR):
+            os.mkdir(CACHE_DIR)
+
+        seeded: Dict[str, Tuple[int, int]] = {}
+        for data_source, pairs in sorted(self.prices.items()):
+            # The price cache is saved when the data source exits
+            ds = self.data_source_names[data_source]()
+            for pair, prices in pairs.items():
+                ds.seed_prices(pair, prices)
+
+            seeded[ds.name()] = (sum(len(prices) for prices in pairs.values()), len(pairs))
+        return seeded
+
+    @staticmethod
+    def _read_csv(filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        with open(filename, newline="", encoding="utf-8-sig") as csv_file:
+            reader = csv.DictReader(csv_file)
+            SeedData._check_columns(filename, reader.fieldnames or [])
+
+            for row in reader:
+                yield reader.line_num, {k.strip().lower(): v for k, v in row.items() if k}
+
+    @staticmethod
+    def _read_parquet(filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        try:
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise PriceSeedError(filename, "Reading Parquet files requires pyarrow") from e
+
+        columns = {
+            name.strip().lower(): values
+            for name, values in pyarrow.parquet.read_table(filename).to_pydict().items()
+        }
+        SeedData._check_columns(filename, columns)
+
+        for row_num, values in enumerate(zip(*columns.values()), start=1):
+            yield row_num, dict(zip(columns, values))
+
+    @staticmethod
+    def _check_columns(filename: str, columns: Iterable[str]) -> None:
+        column_names = {column.strip().lower() for column in columns}
+        for column in SEED_COLUMNS:
+            if column not in column_names:
+                raise PriceSeedError(filename, f"Missing column: '{column}'")
+
+    @staticmethod
+    def _to_date(filename: str, line_num: int, value: Any) -> Date:
+        if isinstance(value, datetime.datetime):
+            return Date(value.date())
+        if isinstance(value, datetime.date):
+            return Date(value)
+
+        try:
+            return DataSourceBase.str_to_date(str(value))
+        except (ValueError, OverflowError) as e:
+            raise PriceSeedError(filename, f"Invalid date: '{value}'", line_num) from e
+
+    @staticmethod
+    def _to_decimal(filename: str, line_num: int, value: Any) -> Optional[Decimal]:
+        # An empty price is cached as the date having no price
+        if value is None or str(value).strip() == "":
+            return None
+
+        try:
+            return Decimal(str(value).strip())
+        except InvalidOperation as e:
+            raise PriceSeedError(filename, f"Invalid price: '{value}'", line_num) from e
@@ -3,7 +3,7 @@
 
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from colorama import Fore, Style
 from tqdm import tqdm
@@ -34,13 +34,19 @@ class VaPriceReport(TypedDict):  # pylint: disable=too-few-public-methods
 
 
 class ValueAsset:
-    def __init__(self, price_tool: bool = False) -> None:
+    def __init__(self, price_tool: bool = False, price_data: Optional[PriceData] = None) -> None:
         self.price_tool = price_tool
         self.price_report: Dict[Year, Dict[AssetSymbol, Dict[Date, VaPriceReport]]] = {}
+        if price_data is None:
+            price_data = PriceData(self.data_sources_required(), price_tool)
+        self.price_data = price_data
+
+    @staticmethod
+    def data_sources_required() -> List[DataSourceName]:
         data_sources_required = set(config.data_source_fiat + config.data_source_crypto) | {
             x.split(":")[0] for v in config.data_source_select.values() for x in v
         }
-        self.price_data = PriceData(list(data_sources_required), price_tool)
+        return list(data_sources_required)
 
     def get_value(
         self, asset: AssetSymbol, timestamp: Timestamp, quantity: Decimal
@@ -146,6 +152,35 @@ class ValueAsset:
 
         return asset_price_ccy, name, data_source
 
+    def prefetch_latest_prices(self, assets: Iterable[AssetSymbol]) -> None:
+        ccy_assets = set()
+        btc_assets = set()
+        for asset in assets:
+            if asset == "BTC" or asset in config.fiat_list:
+                ccy_assets.add(asset)
+            else:
+                btc_assets.add(asset)
+
+        if btc_assets:
+            ccy_assets.add(AssetSymbol("BTC"))
+            self.price_data.prefetch_latest(btc_assets, QuoteSymbol("BTC"))
+        self.price_data.prefetch_latest(ccy_assets, config.ccy)
+
+    def prefetch_historical_prices(self, asset_dates: Iterable[Tuple[AssetSymbol, Date]]) -> None:
+        dates: Dict[Tuple[AssetSymbol, QuoteSymbol], Set[Date]] = {}
+        for asset, date in asset_dates:
+            if asset == config.ccy:
+                continue
+
+            if asset == "BTC" or asset in config.fiat_list:
+                dates.setdefault((asset, config.ccy), set()).add(date)
+            else:
+                dates.setdefault((asset, QuoteSymbol("BTC")), set()).add(date)
+                dates.setdefault((AssetSymbol("BTC"), config.ccy), set()).add(date)
+
+        for (asset, quote), pair_dates in sorted(dates.items()):
+            self.price_data.prefetch_historical(asset, quote, pair_dates)
+
     def price_report_cache(
         self,
         asset: AssetSymbol,
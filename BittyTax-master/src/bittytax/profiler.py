@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import ContextManager, Dict, Iterator, List, TextIO, Tuple
+
+from colorama import Fore, Style
+from typing_extensions import TypedDict
+
+from .constants import _H1, H1
+
+
+class ProfileSpan(TypedDict):  # pylint: disable=too-few-public-methods
+    name: str
+    path: Tuple[str, ...]
+    start: float
+    end: float
+    blocks: int
+    thread: int
+
+
+class Profiler:
+    """Named timing spans and counters, these cost nothing unless profiling is enabled."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.spans: List[ProfileSpan] = []
+        self.counters: Dict[str, int] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.origin = time.perf_counter()
+
+    def span(self, name: str) -> ContextManager[None]:
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(name)
+
+    @contextlib.contextmanager
+    def _span(self, name: str) -> Iterator[None]:
+        stack: List[str] = self._local.__dict__.setdefault("stack", [])
+        stack.append(name)
+        path = tuple(stack)
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            with self._lock:
+                self.spans.append(
+                    ProfileSpan(
+                        name=name,
+                        path=path,
+                        start=start,
+                        end=end,
+                        blocks=sys.getallocatedblocks() - blocks,
+                        thread=threading.get_ident(),
+                    )
+                )
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def output_report(self, sys_out: TextIO) -> None:
+        totals: Dict[Tuple[str, ...], List[float]] = {}
+        for span in self.spans:
+            calls, seconds, blocks = totals.get(span["path"], [0, 0.0, 0])
+            totals[span["path"]] = [
+                calls + 1,
+                seconds + span["end"] - span["start"],
+                blocks + span["blocks"],
+            ]
+
+        elapsed = time.perf_counter() - self.origin
+        sys_out.write(f"{H1}Profile{_H1}\n")
+        sys_out.write(
+            f"{Fore.CYAN}{'Span':<36} {'Calls':>7} {'Time (ms)':>12} {'%':>6} " f"{'Blocks':>12}\n"
+        )
+        first: Dict[Tuple[str, ...], float] = {}
+        for span in self.spans:
+            first[span["path"]] = min(first.get(span["path"], span["start"]), span["start"])
+
+        # Order rows as a tree, children directly below their parent
+        for path in sorted(
+            totals, key=lambda p: tuple(first.get(p[: n + 1], 0.0) for n in range(len(p)))
+        ):
+            calls, seconds, blocks = totals[path]
+            label = "  " * (len(path) - 1) + path[-1]
+            sys_out.write(
+                f"{Fore.WHITE}{label:<36} {int(calls):>7} {seconds * 1000:>12,.1f} "
+                f"{seconds / elapsed * 100 if elapsed else 0:>6.1f} {int(blocks):>12,}\n"
+            )
+        sys_out.write(
+            f"{Fore.WHITE}{Style.BRIGHT}{'Total':<36} {'':>7} {elapsed * 1000:>12,.1f}"
+            f"{Style.NORMAL}\n"
+        )
+
+        if self.counters:
+            sys_out.write(f"{Fore.CYAN}{'Counter':<36} {'Value':>20}\n")
+            for name in sorted(self.counters):
+                sys_out.write(f"{Fore.WHITE}{name:<36} {self.counters[name]:>20,}\n")
+
+    def write_trace(self, filename: str) -> None:
+        """Chrome trace event format, which can also be opened by speedscope."""
+        pid = os.getpid()
+        threads = {t: n for n, t in enumerate(dict.fromkeys(s["thread"] for s in self.spans))}
+        events = [
+            {
+                "name": span["name"],
+                "cat": "bittytax",
+                "ph": "X",
+                "ts": round((span["start"] - self.origin) * 1e6, 1),
+                "dur": round((span["end"] - span["start"]) * 1e6, 1),
+                "pid": pid,
+                "tid": threads[span["thread"]],
+                "args": {"blocks": span["blocks"]},
+            }
+            for span in sorted(self.spans, key=lambda s: s["start"])
+        ]
+        events.extend(
+            {
+                "name": name,
+                "cat": "bittytax",
+                "ph": "C",
+                "ts": round((time.perf_counter() - self.origin) * 1e6, 1),
+                "pid": pid,
+                "tid": 0,
+                "args": {name: value},
+            }
+            for name, value in sorted(self.counters.items())
+        )
+
+        with open(filename, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+
+profiler = Profiler()
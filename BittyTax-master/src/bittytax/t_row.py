@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 # (c) Nano Nano Ltd 2019
 
+import re
 from dataclasses import dataclass
+from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from enum import Enum
-from typing import Dict, List, NamedTuple, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
 
 import dateutil.parser
 from colorama import Back, Fore
@@ -68,6 +70,11 @@ class TransactionRow:
         "Note",
     ]
 
+    # Python 3.7's fromisoformat only accepts milliseconds or microseconds
+    ISO_TIMESTAMP = re.compile(
+        r"^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{3}|\.\d{6})?)?)(?: UTC)?$"
+    )
+
     TYPE_VALIDATION: Dict[TrType, FieldValidation] = {
         TrType.DEPOSIT: FieldValidation(
             t_type=FieldRequired.MANDATORY,
@@ -493,7 +500,12 @@ class TransactionRow:
 
     def parse_timestamp(self) -> Timestamp:
         try:
-            timestamp = dateutil.parser.parse(self.row_dict["Timestamp"])
+            match = self.ISO_TIMESTAMP.match(self.row_dict["Timestamp"])
+            if match:
+                # Timestamps written by Excel, or the conversion tool, don't need dateutil
+                timestamp = datetime.fromisoformat(match.group(1))
+            else:
+                timestamp = dateutil.parser.parse(self.row_dict["Timestamp"])
         except ValueError as e:
             raise TimestampParserError(
                 self.HEADER.index("Timestamp"), "Timestamp", self.row_dict["Timestamp"]
@@ -506,7 +518,7 @@ class TransactionRow:
         return Timestamp(timestamp)
 
     def validate_quantity(self, quantity_hdr: str, required: FieldRequired) -> Optional[Decimal]:
-        if self.row_dict[quantity_hdr]:
+        if self.row_dict[quantity_hdr] != "":
             if required is FieldRequired.NOT_REQUIRED:
                 raise UnexpectedDataError(
                     self.HEADER.index(quantity_hdr),
@@ -514,15 +526,7 @@ class TransactionRow:
                     self.row_dict[quantity_hdr],
                 )
 
-            try:
-                quantity = Decimal(self.strip_non_digits(self.row_dict[quantity_hdr]))
-            except InvalidOperation as e:
-                raise DataValueError(
-                    self.HEADER.index(quantity_hdr),
-                    quantity_hdr,
-                    self.row_dict[quantity_hdr],
-                ) from e
-
+            quantity = self.get_decimal(quantity_hdr)
             if quantity < 0:
                 raise DataValueError(self.HEADER.index(quantity_hdr), quantity_hdr, quantity)
             return quantity
@@ -547,21 +551,13 @@ class TransactionRow:
         return AssetSymbol("")
 
     def validate_value(self, value_hdr: str, required: FieldRequired) -> Optional[Decimal]:
-        if self.row_dict[value_hdr]:
+        if self.row_dict[value_hdr] != "":
             if required is FieldRequired.NOT_REQUIRED:
                 raise UnexpectedDataError(
                     self.HEADER.index(value_hdr), value_hdr, self.row_dict[value_hdr]
                 )
 
-            try:
-                value = Decimal(self.strip_non_digits(self.row_dict[value_hdr]))
-            except InvalidOperation as e:
-                raise DataValueError(
-                    self.HEADER.index(value_hdr),
-                    value_hdr,
-                    self.row_dict[value_hdr],
-                ) from e
-
+            value = self.get_decimal(value_hdr)
             if value < 0:
                 raise DataValueError(self.HEADER.index(value_hdr), value_hdr, value)
 
@@ -572,6 +568,12 @@ class TransactionRow:
 
         return None
 
+    def get_decimal(self, hdr: str) -> Decimal:
+        try:
+            return Decimal(self.strip_non_digits(self.row_dict[hdr]))
+        except InvalidOperation as e:
+            raise DataValueError(self.HEADER.index(hdr), hdr, self.row_dict[hdr]) from e
+
     @staticmethod
     def strip_non_digits(string: str) -> str:
         return string.strip("£€$").replace(",", "")
@@ -599,3 +601,30 @@ class TransactionRow:
         )
 
         return f"{worksheet_str}row[{self.row_num}] [{row_str}]{tid_str}"
+
+
+class TypedTransactionRow(TransactionRow):
+    """A transaction row whose quantities, values and timestamp are already typed, so they are
+    validated, but not parsed. Missing values are empty strings, as they would be in a text row."""
+
+    def __init__(
+        self,
+        values: Sequence[Union[str, Optional[Decimal], datetime]],
+        row_num: int,
+        filename: Optional[str] = None,
+        worksheet_name: Optional[str] = None,
+    ):
+        row: List[Any] = ["" if value is None else value for value in values]
+        super().__init__(row, row_num, filename, worksheet_name)
+
+    def get_decimal(self, hdr: str) -> Decimal:
+        value: Any = self.row_dict[hdr]
+        if not isinstance(value, Decimal):
+            raise DataValueError(self.HEADER.index(hdr), hdr, value)
+        return value
+
+    def parse_timestamp(self) -> Timestamp:
+        timestamp: Any = self.row_dict["Timestamp"]
+        if not isinstance(timestamp, datetime) or timestamp.tzinfo is None:
+            raise TimestampParserError(self.HEADER.index("Timestamp"), "Timestamp", timestamp)
+        return Timestamp(timestamp)
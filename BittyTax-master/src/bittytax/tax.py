@@ -2,11 +2,15 @@
 # (c) Nano Nano Ltd 2019
 # pylint: disable=bad-option-value, unnecessary-dunder-call
 
+import collections
 import copy
 import datetime
+import logging
 import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, TypeVar, Union
 
 import requests
 from colorama import Fore
@@ -28,12 +32,16 @@ from .bt_types import (
 from .config import config
 from .constants import TAX_RULES_UK_COMPANY, WARNING
 from .holdings import Holdings
+from .log import capture_output, is_debug, logger, replay_output
 from .price.valueasset import ValueAsset
+from .t_record import TransactionRecord
 from .tax_event import TaxEvent, TaxEventCapitalGains, TaxEventIncome, TaxEventMarginTrade
 from .transactions import Buy, Sell
 
 PRECISION = Decimal("0.00")
 
+T = TypeVar("T", Buy, Sell)
+
 
 class TaxReportRecord(TypedDict):  # pylint: disable=too-few-public-methods
     CapitalGains: "CalculateCapitalGains"
@@ -150,8 +158,7 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
         buy_transactions: Dict[Tuple[AssetSymbol, Date], Buy] = {}
         sell_transactions: Dict[Tuple[AssetSymbol, Date], Sell] = {}
 
-        if config.debug:
-            print(f"{Fore.CYAN}pool same day transactions")
+        logger.debug("%spool same day transactions", Fore.CYAN)
 
         for t in tqdm(
             transactions,
@@ -159,24 +166,12 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
             desc=f"{Fore.CYAN}pool same day{Fore.GREEN}",
             disable=bool(config.debug or not sys.stdout.isatty()),
         ):
-            if (
-                isinstance(t, Buy)
-                and t.is_crypto()
-                and not t.is_nft()
-                and t.acquisition
-                and t.t_type not in self.NO_MATCH_TYPES
-            ):
+            if isinstance(t, Buy) and self._is_poolable(t):
                 if (t.asset, t.date()) not in buy_transactions:
                     buy_transactions[(t.asset, t.date())] = t
                 else:
                     buy_transactions[(t.asset, t.date())] += t
-            elif (
-                isinstance(t, Sell)
-                and t.is_crypto()
-                and not t.is_nft()
-                and t.disposal
-                and t.t_type not in self.NO_MATCH_TYPES
-            ):
+            elif isinstance(t, Sell) and self._is_poolable(t):
                 if (t.asset, t.date()) not in sell_transactions:
                     sell_transactions[(t.asset, t.date())] = t
                 else:
@@ -187,15 +182,23 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
         self.buys_ordered = sorted(buy_transactions.values())
         self.sells_ordered = sorted(sell_transactions.values())
 
-        if config.debug:
+        if is_debug():
             for t in sorted(self._all_transactions()):
                 if len(t.pooled) > 1:
-                    print(f"{Fore.GREEN}pool: {t}")
+                    logger.debug("%spool: %s", Fore.GREEN, t)
                     for tp in t.pooled:
-                        print(f"{Fore.BLUE}pool:   ({tp})")
+                        logger.debug("%spool:   (%s)", Fore.BLUE, tp)
 
-        if config.debug:
-            print(f"{Fore.CYAN}pool: total transactions={len(self._all_transactions())}")
+        if is_debug():
+            logger.debug("%spool: total transactions=%s", Fore.CYAN, len(self._all_transactions()))
+
+    def _is_poolable(self, t: Union[Buy, Sell]) -> bool:
+        return bool(
+            (t.acquisition if isinstance(t, Buy) else t.disposal)
+            and t.is_crypto()
+            and not t.is_nft()
+            and t.t_type not in self.NO_MATCH_TYPES
+        )
 
     def match_buyback(self, rule: DisposalType) -> None:
         sell_index = buy_index = 0
@@ -203,8 +206,7 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
         if not self.buys_ordered:
             return
 
-        if config.debug:
-            print(f"{Fore.CYAN}match {rule.value.lower()} transactions")
+        logger.debug("%smatch %s transactions", Fore.CYAN, rule.value.lower())
 
         pbar = tqdm(
             total=len(self.sells_ordered),
@@ -226,43 +228,13 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
                 and s.asset == b.asset
                 and self._rule_match(b.date(), s.date(), rule)
             ):
-                if config.debug:
-                    if b.quantity > s.quantity:
-                        print(f"{Fore.GREEN}match: {s.format_str(quantity_bold=True)}")
-                        print(f"{Fore.GREEN}match: {b}")
-                    elif s.quantity > b.quantity:
-                        print(f"{Fore.GREEN}match: {s}")
-                        print(f"{Fore.GREEN}match: {b.format_str(quantity_bold=True)}")
-                    else:
-                        print(f"{Fore.GREEN}match: {s.format_str(quantity_bold=True)}")
-                        print(f"{Fore.GREEN}match: {b.format_str(quantity_bold=True)}")
-
-                if b.quantity > s.quantity:
-                    b_remainder = b.split_buy(s.quantity)
+                b_remainder, s_remainder = self._match(b, s, rule)
+                if b_remainder:
                     self.buys_ordered.insert(buy_index + 1, b_remainder)
-                    if config.debug:
-                        print(f"{Fore.YELLOW}match:   split: {b.format_str(quantity_bold=True)}")
-                        print(f"{Fore.YELLOW}match:   split: {b_remainder}")
-                elif s.quantity > b.quantity:
-                    s_remainder = s.split_sell(b.quantity)
+                if s_remainder:
                     self.sells_ordered.insert(sell_index + 1, s_remainder)
-                    if config.debug:
-                        print(f"{Fore.YELLOW}match:   split: {s.format_str(quantity_bold=True)}")
-                        print(f"{Fore.YELLOW}match:   split: {s_remainder}")
                     pbar.total += 1
 
-                s.matched = b.matched = True
-                tax_event = TaxEventCapitalGains(
-                    rule,
-                    b,
-                    s,
-                    b.cost,
-                    (b.fee_value or Decimal(0)) + (s.fee_value or Decimal(0)),
-                )
-                self.tax_events[self._which_tax_year(tax_event.date)].append(tax_event)
-                if config.debug:
-                    print(f"{Fore.CYAN}match:   {tax_event}")
-
                 # Find next sell
                 sell_index += 1
                 pbar.update(1)
@@ -276,8 +248,8 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
 
         pbar.close()
 
-        if config.debug:
-            print(f"{Fore.CYAN}match: total transactions={len(self._all_transactions())}")
+        if is_debug():
+            logger.debug("%smatch: total transactions=%s", Fore.CYAN, len(self._all_transactions()))
 
     def match_sell(self, rule: DisposalType) -> None:
         buy_index = sell_index = 0
@@ -285,8 +257,7 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
         if not self.sells_ordered:
             return
 
-        if config.debug:
-            print(f"{Fore.CYAN}match {rule.value.lower()} transactions")
+        logger.debug("%smatch %s transactions", Fore.CYAN, rule.value.lower())
 
         pbar = tqdm(
             total=len(self.buys_ordered),
@@ -308,42 +279,12 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
                 and b.asset == s.asset
                 and self._rule_match(b.date(), s.date(), rule)
             ):
-                if config.debug:
-                    if b.quantity > s.quantity:
-                        print(f"{Fore.GREEN}match: {b}")
-                        print(f"{Fore.GREEN}match: {s.format_str(quantity_bold=True)}")
-                    elif s.quantity > b.quantity:
-                        print(f"{Fore.GREEN}match: {b.format_str(quantity_bold=True)}")
-                        print(f"{Fore.GREEN}match: {s}")
-                    else:
-                        print(f"{Fore.GREEN}match: {b.format_str(quantity_bold=True)}")
-                        print(f"{Fore.GREEN}match: {s.format_str(quantity_bold=True)}")
-
-                if b.quantity > s.quantity:
-                    b_remainder = b.split_buy(s.quantity)
+                b_remainder, s_remainder = self._match(b, s, rule)
+                if b_remainder:
                     self.buys_ordered.insert(buy_index + 1, b_remainder)
-                    if config.debug:
-                        print(f"{Fore.YELLOW}match:   split: {b.format_str(quantity_bold=True)}")
-                        print(f"{Fore.YELLOW}match:   split: {b_remainder}")
                     pbar.total += 1
-                elif s.quantity > b.quantity:
-                    s_remainder = s.split_sell(b.quantity)
+                if s_remainder:
                     self.sells_ordered.insert(sell_index + 1, s_remainder)
-                    if config.debug:
-                        print(f"{Fore.YELLOW}match:   split: {s.format_str(quantity_bold=True)}")
-                        print(f"{Fore.YELLOW}match:   split: {s_remainder}")
-
-                b.matched = s.matched = True
-                tax_event = TaxEventCapitalGains(
-                    rule,
-                    b,
-                    s,
-                    b.cost,
-                    (b.fee_value or Decimal(0)) + (s.fee_value or Decimal(0)),
-                )
-                self.tax_events[self._which_tax_year(tax_event.date)].append(tax_event)
-                if config.debug:
-                    print(f"{Fore.CYAN}match:   {tax_event}")
 
                 # Find next buy
                 buy_index += 1
@@ -358,8 +299,46 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
 
         pbar.close()
 
-        if config.debug:
-            print(f"{Fore.CYAN}match: total transactions={len(self._all_transactions())}")
+        if is_debug():
+            logger.debug("%smatch: total transactions=%s", Fore.CYAN, len(self._all_transactions()))
+
+    def _match(self, b: Buy, s: Sell, rule: DisposalType) -> Tuple[Optional[Buy], Optional[Sell]]:
+        if b.cost is None:
+            raise RuntimeError("Missing cost")
+
+        if is_debug():
+            # The driving transaction of the rule is output first
+            for t in (s, b) if rule is DisposalType.BED_AND_BREAKFAST else (b, s):
+                other = s if t is b else b
+                logger.debug(
+                    "%smatch: %s",
+                    Fore.GREEN,
+                    t.format_str(quantity_bold=True) if t.quantity <= other.quantity else t,
+                )
+
+        b_remainder = s_remainder = None
+        if b.quantity > s.quantity:
+            b_remainder = b.split_buy(s.quantity)
+            if is_debug():
+                logger.debug("%smatch:   split: %s", Fore.YELLOW, b.format_str(quantity_bold=True))
+                logger.debug("%smatch:   split: %s", Fore.YELLOW, b_remainder)
+        elif s.quantity > b.quantity:
+            s_remainder = s.split_sell(b.quantity)
+            if is_debug():
+                logger.debug("%smatch:   split: %s", Fore.YELLOW, s.format_str(quantity_bold=True))
+                logger.debug("%smatch:   split: %s", Fore.YELLOW, s_remainder)
+
+        b.matched = s.matched = True
+        tax_event = TaxEventCapitalGains(
+            rule,
+            b,
+            s,
+            b.cost,
+            (b.fee_value or Decimal(0)) + (s.fee_value or Decimal(0)),
+        )
+        self.tax_events[self._which_tax_year(tax_event.date)].append(tax_event)
+        logger.debug("%smatch:   %s", Fore.CYAN, tax_event)
+        return b_remainder, s_remainder
 
     def _rule_match(self, b_date: Date, s_date: Date, rule: DisposalType) -> bool:
         if rule == DisposalType.SAME_DAY:
@@ -374,8 +353,7 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
         raise RuntimeError("Unexpected rule")
 
     def process_section104(self, skip_integrity_check: bool) -> None:
-        if config.debug:
-            print(f"{Fore.CYAN}process section 104")
+        logger.debug("%sprocess section 104", Fore.CYAN)
 
         for t in tqdm(
             sorted(self._all_transactions()),
@@ -383,31 +361,159 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
             desc=f"{Fore.CYAN}process section 104{Fore.GREEN}",
             disable=bool(config.debug or not sys.stdout.isatty()),
         ):
-            if t.is_crypto() and t.asset not in self.holdings:
-                self.holdings[t.asset] = Holdings(t.asset)
+            self._section104(t, skip_integrity_check)
 
-            if t.matched:
-                if config.debug:
-                    print(f"{Fore.BLUE}section104: //{t} <- matched")
-                continue
+    def _section104(self, t: Union[Buy, Sell], skip_integrity_check: bool) -> None:
+        if t.is_crypto() and t.asset not in self.holdings:
+            self.holdings[t.asset] = Holdings(t.asset)
 
-            if not config.transfers_include and t.t_type in TRANSFER_TYPES:
-                if config.debug:
-                    print(f"{Fore.BLUE}section104: //{t} <- transfer")
-                continue
+        if t.matched:
+            logger.debug("%ssection104: //%s <- matched", Fore.BLUE, t)
+            return
 
-            if not t.is_crypto():
-                if config.debug:
-                    print(f"{Fore.BLUE}section104: //{t} <- fiat")
-                continue
+        if not config.transfers_include and t.t_type in TRANSFER_TYPES:
+            logger.debug("%ssection104: //%s <- transfer", Fore.BLUE, t)
+            return
+
+        if not t.is_crypto():
+            logger.debug("%ssection104: //%s <- fiat", Fore.BLUE, t)
+            return
+
+        logger.debug("%ssection104: %s", Fore.GREEN, t)
+
+        if isinstance(t, Buy):
+            self._add_tokens(t)
+        elif isinstance(t, Sell):
+            self._subtract_tokens(t, skip_integrity_check)
+
+    def process_stream(self, skip_integrity_check: bool, jobs: int = 1) -> None:
+        """Pool, match and process section 104 one asset at a time, instead of all at once.
+        Each asset's transactions are copied as they are pooled, and released once they have
+        passed through section 104, so only the matching window is held in memory."""
+
+        logger.debug("%sprocess stream", Fore.CYAN)
 
-            if config.debug:
-                print(f"{Fore.GREEN}section104: {t}")
+        partitions: Dict[AssetSymbol, List[Union[Buy, Sell]]] = {}
+        for t in self.transactions:
+            partitions.setdefault(t.asset, []).append(t)
 
-            if isinstance(t, Buy):
-                self._add_tokens(t)
-            elif isinstance(t, Sell):
-                self._subtract_tokens(t, skip_integrity_check)
+        with tqdm(
+            total=len(self.transactions),
+            unit="t",
+            desc=f"{Fore.CYAN}process stream{Fore.GREEN}",
+            disable=bool(config.debug or not sys.stdout.isatty()),
+        ) as pbar:
+            if jobs > 1:
+                self._process_partitions(partitions, skip_integrity_check, jobs, pbar)
+                return
+
+            for asset in sorted(partitions):
+                match_window = MatchWindow(self, skip_integrity_check)
+                for t in sorted(partitions.pop(asset)):
+                    match_window.push(copy.deepcopy(t))
+                    pbar.update(1)
+                match_window.flush()
+
+    def _process_partitions(
+        self,
+        partitions: Dict[AssetSymbol, List[Union[Buy, Sell]]],
+        skip_integrity_check: bool,
+        jobs: int,
+        pbar: tqdm,
+    ) -> None:
+        # Each asset is calculated by a worker, its holdings, tax events and output are then
+        #  merged in asset order, so they are the same as calculating each asset in turn
+        assets = sorted(partitions)
+        sizes = {asset: len(partitions[asset]) for asset in assets}
+
+        t_records, splits, waiting_for, waited_on_by = self._split_dependencies(partitions)
+
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(vars(config), logger.level),
+        ) as executor:
+            running: Dict["Future[_PartitionResult]", AssetSymbol] = {}
+
+            def start(asset: AssetSymbol) -> None:
+                sub_tids = {}
+                for tid in splits[asset]:
+                    t_record_tid = t_records[tid].tid
+                    if t_record_tid:
+                        sub_tids[tid] = t_record_tid[1]
+
+                future = executor.submit(
+                    _process_partition,
+                    self.tax_rules,
+                    skip_integrity_check,
+                    _detach(sorted(partitions.pop(asset))),
+                    sub_tids,
+                )
+                running[future] = asset
+
+            for asset in assets:
+                if not waiting_for[asset]:
+                    start(asset)
+
+            results: Dict[AssetSymbol, "_PartitionResult"] = {}
+            merged = 0
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    asset = running.pop(future)
+                    results[asset] = future.result()
+
+                    for tid, sub_tid in results[asset][3].items():
+                        t_record_tid = t_records[tid].tid
+                        if t_record_tid:
+                            t_record_tid[1] = sub_tid
+
+                    for later in waited_on_by[asset]:
+                        waiting_for[later].discard(asset)
+                        if not waiting_for[later]:
+                            start(later)
+
+                while merged < len(assets) and assets[merged] in results:
+                    self._merge_partition(assets[merged], results.pop(assets[merged]))
+                    pbar.update(sizes[assets[merged]])
+                    merged += 1
+
+    def _split_dependencies(self, partitions: Dict[AssetSymbol, List[Union[Buy, Sell]]]) -> Tuple[
+        Dict[int, TransactionRecord],
+        Dict[AssetSymbol, Set[int]],
+        Dict[AssetSymbol, Set[AssetSymbol]],
+        Dict[AssetSymbol, List[AssetSymbol]],
+    ]:
+        # Splits are numbered by their transaction record, so an asset which can split the same
+        #  record as an earlier asset is started once that asset has finished, from its numbering
+        t_records: Dict[int, TransactionRecord] = {}
+        splits: Dict[AssetSymbol, Set[int]] = {}
+        waiting_for: Dict[AssetSymbol, Set[AssetSymbol]] = {}
+        waited_on_by: Dict[AssetSymbol, List[AssetSymbol]] = {asset: [] for asset in partitions}
+        last_split_by: Dict[int, AssetSymbol] = {}
+        for asset in sorted(partitions):
+            splits[asset] = set()
+            for t in partitions[asset]:
+                if t.t_record and t.t_record.tid and self._is_poolable(t):
+                    t_records[t.t_record.tid[0]] = t.t_record
+                    splits[asset].add(t.t_record.tid[0])
+
+            waiting_for[asset] = {
+                last_split_by[tid] for tid in splits[asset] if tid in last_split_by
+            }
+            for earlier in waiting_for[asset]:
+                waited_on_by[earlier].append(asset)
+            last_split_by.update(dict.fromkeys(splits[asset], asset))
+        return t_records, splits, waiting_for, waited_on_by
+
+    def _merge_partition(self, asset: AssetSymbol, result: "_PartitionResult") -> None:
+        holdings, tax_events, output, _ = result
+        replay_output(output)
+        if holdings:
+            self.holdings[asset] = holdings
+
+        for tax_year, events in tax_events.items():
+            self.tax_events.setdefault(tax_year, []).extend(events)
 
     def _add_tokens(self, t: Buy) -> None:
         if not t.acquisition:
@@ -458,15 +564,13 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
             )
 
             self.tax_events[self._which_tax_year(tax_event.date)].append(tax_event)
-            if config.debug:
-                print(f"{Fore.CYAN}section104:   {tax_event}")
+            logger.debug("%ssection104:   %s", Fore.CYAN, tax_event)
 
             if config.transfers_include and not skip_integrity_check:
                 self.holdings[t.asset].check_transfer_mismatch()
 
     def process_income(self) -> None:
-        if config.debug:
-            print(f"{Fore.CYAN}process income")
+        logger.debug("%sprocess income", Fore.CYAN)
 
         for t in tqdm(
             self.transactions,
@@ -479,8 +583,7 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
                 self.tax_events[self._which_tax_year(tax_event.date)].append(tax_event)
 
     def process_margin_trades(self) -> None:
-        if config.debug:
-            print(f"{Fore.CYAN}process margin trades")
+        logger.debug("%sprocess margin trades", Fore.CYAN)
 
         for t in tqdm(
             self.transactions,
@@ -537,8 +640,11 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
         holdings: Dict[AssetSymbol, HoldingsReportAsset] = {}
         totals: HoldingsReportTotal = {"cost": Decimal(0), "value": Decimal(0), "gain": Decimal(0)}
 
-        if config.debug:
-            print(f"{Fore.CYAN}calculating holdings")
+        logger.debug("%scalculating holdings", Fore.CYAN)
+
+        value_asset.prefetch_latest_prices(
+            h.asset for h in self.holdings.values() if h.quantity > 0 or config.show_empty_wallets
+        )
 
         for h in tqdm(
             self.holdings,
@@ -597,6 +703,173 @@ class TaxCalculator:  # pylint: disable=too-many-instance-attributes
         return tax_year
 
 
+@dataclass
+class PoolDay:
+    date: Date
+    buys: List[Buy] = field(default_factory=list)
+    sells: List[Sell] = field(default_factory=list)
+    others: List[Union[Buy, Sell]] = field(default_factory=list)
+    matched: bool = False
+
+
+class MatchWindow:  # pylint: disable=protected-access
+    """Applies the matching rules and section 104 to the transactions of a single asset, which
+    are pushed in timestamp order. A day is held until no later transaction can be matched
+    against it, so the same result is reached as matching the whole history at once."""
+
+    def __init__(self, tax: TaxCalculator, skip_integrity_check: bool) -> None:
+        self.tax = tax
+        self.skip_integrity_check = skip_integrity_check
+        self.days: Deque[PoolDay] = collections.deque()
+
+        if tax.tax_rules in TAX_RULES_UK_COMPANY:
+            self.rule = DisposalType.TEN_DAY
+            self.window = datetime.timedelta(days=10)
+        else:
+            self.rule = DisposalType.BED_AND_BREAKFAST
+            self.window = datetime.timedelta(days=30)
+
+    def push(self, t: Union[Buy, Sell]) -> None:
+        if not self.days or self.days[-1].date != t.date():
+            if self.days:
+                self._match_same_day(self.days[-1])
+            self._advance(t.date())
+            self.days.append(PoolDay(t.date()))
+
+        day = self.days[-1]
+        if isinstance(t, Buy) and self.tax._is_poolable(t):
+            if day.buys:
+                day.buys[0] += t
+            else:
+                day.buys.append(t)
+        elif isinstance(t, Sell) and self.tax._is_poolable(t):
+            if day.sells:
+                day.sells[0] += t
+            else:
+                day.sells.append(t)
+        else:
+            day.others.append(t)
+
+    def flush(self) -> None:
+        if self.days:
+            self._match_same_day(self.days[-1])
+        self._advance(None)
+
+    def _match_same_day(self, day: PoolDay) -> None:
+        if day.buys and day.sells:
+            b_remainder, s_remainder = self.tax._match(
+                day.buys[0], day.sells[0], DisposalType.SAME_DAY
+            )
+            if b_remainder:
+                day.buys.append(b_remainder)
+            if s_remainder:
+                day.sells.append(s_remainder)
+
+    def _advance(self, next_date: Optional[Date]) -> None:
+        # Match each day once every day within its window is complete
+        for day in self.days:
+            if day.matched:
+                continue
+            if next_date is not None and day.date + self.window >= next_date:
+                break
+            self._match_window(day)
+            day.matched = True
+
+        while self.days and self.days[0].matched:
+            day = self.days.popleft()
+            for t in sorted([*day.buys, *day.sells, *day.others]):
+                self.tax._section104(t, self.skip_integrity_check)
+
+    def _match_window(self, day: PoolDay) -> None:
+        for later_day in self.days:
+            if later_day.date <= day.date:
+                continue
+            if later_day.date > day.date + self.window:
+                break
+
+            if self.rule is DisposalType.BED_AND_BREAKFAST:
+                # Disposal is matched with acquisitions in the 30 days after it
+                buys, sells = later_day.buys, day.sells
+            else:
+                # Acquisition is matched with disposals in the 10 days after it
+                buys, sells = day.buys, later_day.sells
+
+            b, s = _unmatched(buys), _unmatched(sells)
+            if b is None or s is None:
+                continue
+
+            b_remainder, s_remainder = self.tax._match(b, s, self.rule)
+            if b_remainder:
+                buys.append(b_remainder)
+            if s_remainder:
+                sells.append(s_remainder)
+
+
+def _unmatched(transactions: List[T]) -> Optional[T]:
+    # Only the last part of a split transaction can be unmatched
+    if transactions and not transactions[-1].matched:
+        return transactions[-1]
+    return None
+
+
+def _init_worker(config_vars: Dict[str, Any], log_level: int) -> None:
+    # Workers might not be forked, so the settings changed by arguments are passed on
+    config.__dict__.update(config_vars)
+    logger.setLevel(log_level)
+
+
+def _detach(transactions: List[Union[Buy, Sell]]) -> List[Union[Buy, Sell]]:
+    # Only the TID of a transaction record is used by a worker, to number the splits of its
+    #  transactions, the record would otherwise be pickled with its row and other transactions
+    t_records: Dict[int, TransactionRecord] = {}
+    detached = []
+    for t in transactions:
+        t = copy.copy(t)
+        if t.t_record and t.t_record.tid:
+            t.t_record = t_records.setdefault(id(t.t_record), _SplitRecord(list(t.t_record.tid)))
+        detached.append(t)
+    return detached
+
+
+class _SplitRecord(TransactionRecord):  # pylint: disable=too-few-public-methods
+    def __init__(self, tid: List[int]) -> None:  # pylint: disable=super-init-not-called
+        self.tid = tid
+
+
+_PartitionResult = Tuple[
+    Optional[Holdings],
+    Dict[Year, List[TaxEvent]],
+    List[Union[logging.LogRecord, str]],
+    Dict[int, int],
+]
+
+
+def _process_partition(
+    tax_rules: str,
+    skip_integrity_check: bool,
+    transactions: List[Union[Buy, Sell]],
+    sub_tids: Dict[int, int],
+) -> _PartitionResult:
+    # Splits are numbered on from the last sub-TID of each record the asset can split, and the
+    #  last sub-TIDs are returned
+    t_records: Dict[int, TransactionRecord] = {}
+    for t in transactions:
+        if t.t_record and t.t_record.tid and t.t_record.tid[0] in sub_tids:
+            t.t_record.tid[1] = sub_tids[t.t_record.tid[0]]
+            t_records[t.t_record.tid[0]] = t.t_record
+
+    tax = TaxCalculator(transactions, tax_rules)
+
+    with capture_output() as output:
+        match_window = MatchWindow(tax, skip_integrity_check)
+        for t in transactions:
+            match_window.push(t)
+        match_window.flush()
+
+    split_tids = {tid: t_record.tid[1] for tid, t_record in t_records.items() if t_record.tid}
+    return tax.holdings.get(transactions[0].asset), tax.tax_events, output, split_tids
+
+
 class CalculateCapitalGains:
     # Rate changes start from 6th April in previous year, i.e. 2022 is for tax year 2021/22
     CG_DATA_INDIVIDUAL: Dict[Year, CapitalGainsIndividual] = {
@@ -903,9 +1176,9 @@ class CalculateMarginTrading:
                     self.contract_totals[(wallet, note)]["losses"] += te.loss
                     self.contract_totals[(wallet, note)]["fees"] += te.fee
 
-                if config.debug:
-                    print(f"{Fore.GREEN}margin: {te.t}")
-                    print(f"{Fore.YELLOW}margin:   {self.totals_str(wallet, note)}")
+                if is_debug():
+                    logger.debug("%smargin: %s", Fore.GREEN, te.t)
+                    logger.debug("%smargin:   %s", Fore.YELLOW, self.totals_str(wallet, note))
 
     def totals_str(self, wallet: Wallet, note: Note) -> str:
         return (
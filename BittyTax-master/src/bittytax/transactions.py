@@ -12,6 +12,7 @@ from tqdm import tqdm
 
 from .bt_types import TRANSFER_TYPES, AssetSymbol, Date, FixedValue, Note, Timestamp, TrType, Wallet
 from .config import config
+from .log import logger
 from .price.valueasset import ValueAsset
 from .t_record import TransactionRecord
 
@@ -23,8 +24,7 @@ class TransactionHistory:
         self.value_asset = value_asset
         self.transactions: List[Union[Buy, Sell]] = []
 
-        if config.debug:
-            print(f"{Fore.CYAN}split transaction records")
+        logger.debug("%ssplit transaction records", Fore.CYAN)
 
         for tr in tqdm(
             transaction_records,
@@ -32,8 +32,7 @@ class TransactionHistory:
             desc=f"{Fore.CYAN}split transaction records{Fore.GREEN}",
             disable=bool(config.debug or not sys.stdout.isatty()),
         ):
-            if config.debug:
-                print(f"{Fore.MAGENTA}split: TR {tr}")
+            logger.debug("%ssplit: TR %s", Fore.MAGENTA, tr)
 
             self.get_all_values(tr)
 
@@ -89,42 +88,35 @@ class TransactionHistory:
                 if tr.buy and (tr.buy.quantity or tr.buy.fee_value):
                     tr.buy.set_tid()
                     self.transactions.append(tr.buy)
-                    if config.debug:
-                        print(f"{Fore.GREEN}split:   {tr.buy}")
+                    logger.debug("%ssplit:   %s", Fore.GREEN, tr.buy)
 
                 if tr.sell and (tr.sell.quantity or tr.sell.fee_value):
                     tr.sell.set_tid()
                     self.transactions.append(tr.sell)
-                    if config.debug:
-                        print(f"{Fore.GREEN}split:   {tr.sell}")
+                    logger.debug("%ssplit:   %s", Fore.GREEN, tr.sell)
 
                 if tr.fee and tr.fee.quantity:
                     tr.fee.set_tid()
                     self.transactions.append(tr.fee)
-                    if config.debug:
-                        print(f"{Fore.GREEN}split:   {tr.fee}")
+                    logger.debug("%ssplit:   %s", Fore.GREEN, tr.fee)
             else:
                 # Special case for LOST, sell and fee must be before buy-back
                 if tr.sell and (tr.sell.quantity or tr.sell.fee_value):
                     tr.sell.set_tid()
                     self.transactions.append(tr.sell)
-                    if config.debug:
-                        print(f"{Fore.GREEN}split:   {tr.sell}")
+                    logger.debug("%ssplit:   %s", Fore.GREEN, tr.sell)
 
                 if tr.fee and tr.fee.quantity:
                     tr.fee.set_tid()
                     self.transactions.append(tr.fee)
-                    if config.debug:
-                        print(f"{Fore.GREEN}split:   {tr.fee}")
+                    logger.debug("%ssplit:   %s", Fore.GREEN, tr.fee)
 
                 if tr.buy and (tr.buy.quantity or tr.buy.fee_value):
                     tr.buy.set_tid()
                     self.transactions.append(tr.buy)
-                    if config.debug:
-                        print(f"{Fore.GREEN}split:   {tr.buy}")
+                    logger.debug("%ssplit:   %s", Fore.GREEN, tr.buy)
 
-        if config.debug:
-            print(f"{Fore.CYAN}split: total transactions={len(self.transactions)}")
+        logger.debug("%ssplit: total transactions=%s", Fore.CYAN, len(self.transactions))
 
     def get_all_values(self, tr: TransactionRecord) -> None:
         if tr.buy and tr.buy.acquisition and tr.buy.cost is None:
@@ -318,6 +310,9 @@ class TransactionBase:  # pylint: disable=too-many-instance-attributes
             if k == "t_record":
                 # Keep reference to the transaction record
                 setattr(result, k, v)
+            elif k == "timestamp":
+                # Immutable, and copying it would also copy the timezone's transition data
+                setattr(result, k, v)
             else:
                 setattr(result, k, copy.deepcopy(v, memo))
         return result
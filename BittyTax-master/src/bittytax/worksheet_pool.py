@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# (c) Nano Nano Ltd 2026
+
+import itertools
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from types import TracebackType
+from typing import Any, Callable, Iterator, List, Optional, Sequence, TextIO, Type, TypeVar
+
+import openpyxl
+import xlrd
+
+T = TypeVar("T")
+
+XLS_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+class WorksheetPool:
+    """The worksheets of an Excel file read by a pool of processes, each of which opens the
+    workbook once. Rows are converted by the worker, so the function which converts them must be
+    picklable. Worksheets are returned in the order they were requested."""
+
+    def __init__(self, filename: str, jobs: int) -> None:
+        self.filename = filename
+        self.executor = ProcessPoolExecutor(max_workers=jobs)
+
+    def __enter__(self) -> "WorksheetPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.executor.shutdown()
+
+    def sheet_names(self) -> List[str]:
+        return self.executor.submit(_sheet_names, self.filename).result()
+
+    def datemode(self) -> int:
+        return self.executor.submit(_datemode, self.filename).result()
+
+    def read(
+        self,
+        sheet_names: Sequence[str],
+        convert_row: Callable[[Sequence[Any]], T],
+        values_only: bool = False,
+    ) -> Iterator[List[T]]:
+        return self.executor.map(
+            _read_worksheet,
+            itertools.repeat(self.filename),
+            sheet_names,
+            itertools.repeat(convert_row),
+            itertools.repeat(values_only),
+        )
+
+
+class _Worker:  # pylint: disable=too-few-public-methods
+    filename = ""
+    workbook: Any = None
+    logfile: Optional[TextIO] = None
+
+
+def _close_workbook() -> None:
+    if isinstance(_Worker.workbook, xlrd.Book):
+        _Worker.workbook.release_resources()
+    elif _Worker.workbook is not None:
+        _Worker.workbook.close()
+
+    if _Worker.logfile:
+        _Worker.logfile.close()
+
+    _Worker.filename = ""
+    _Worker.workbook = None
+    _Worker.logfile = None
+
+
+def _open_workbook(filename: str) -> Any:
+    # Opened by the first task a worker is given, so any error is raised by that task
+    if _Worker.filename != filename:
+        _close_workbook()
+
+        with open(filename, "rb") as df:
+            signature = df.read(len(XLS_SIGNATURE))
+
+        if signature == XLS_SIGNATURE:
+            # Kept open for as long as the workbook is, xlrd can log to it until then
+            _Worker.logfile = open(  # pylint: disable=consider-using-with
+                os.devnull, "w", encoding="utf-8"
+            )
+            _Worker.workbook = xlrd.open_workbook(filename, logfile=_Worker.logfile, on_demand=True)
+        else:
+            warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+            _Worker.workbook = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+        _Worker.filename = filename
+
+    return _Worker.workbook
+
+
+def _sheet_names(filename: str) -> List[str]:
+    workbook = _open_workbook(filename)
+    if isinstance(workbook, xlrd.Book):
+        return list(workbook.sheet_names())
+    return list(workbook.sheetnames)
+
+
+def _datemode(filename: str) -> int:
+    return int(_open_workbook(filename).datemode)
+
+
+def _read_worksheet(
+    filename: str, sheet_name: str, convert_row: Callable[[Sequence[Any]], T], values_only: bool
+) -> List[T]:
+    workbook = _open_workbook(filename)
+    if isinstance(workbook, xlrd.Book):
+        worksheet = workbook.sheet_by_name(sheet_name)
+        rows = [convert_row(row) for row in worksheet.get_rows()]
+        workbook.unload_sheet(sheet_name)
+        return rows
+
+    worksheet = workbook[sheet_name]  # pylint: disable=unsubscriptable-object
+    try:
+        dimensions = worksheet.calculate_dimension()
+    except ValueError:
+        worksheet.reset_dimensions()
+    else:
+        if dimensions == "A1:A1" or dimensions.endswith("1048576"):
+            worksheet.reset_dimensions()
+
+    return [convert_row(row) for row in worksheet.iter_rows(values_only=values_only)]
@@ -0,0 +1,174 @@
+"""Benchmark the LLM chat prompt size and latency, against a local stub LLM endpoint.
+
+Compares sending the whole report with the full conversation on every turn (as the chat used
+to) with sending the report sections retrieved from the report index, and a rolling summary.
+
+    python benchmark_chat.py --years 8 --questions 12
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from report_index import ChatContext, ReportIndex, PAGE_BREAK
+
+ASSETS = ["BTC", "ETH", "SOL", "ADA", "DOT", "LINK", "XRP", "LTC", "MATIC", "ATOM"]
+
+QUESTIONS = [
+    "What was my total capital gain in {year}?",
+    "Which disposals of {asset} made a loss in {year}?",
+    "How much staking income did I receive from {asset}?",
+    "What is my current holding of {asset} and its value?",
+    "Were there any same day or bed and breakfast matches for {asset}?",
+    "What allowable costs were deducted in {year}?",
+    "Summarise my income for {year}.",
+    "Which price data was missing?",
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replies after a delay proportional to the prompt size, like an LLM's prompt processing."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        prompt = json.loads(body)["prompt"]
+        time.sleep(self.server.base_latency + len(prompt) / self.server.chars_per_second)
+        reply = json.dumps({"text": f"Stub answer to a {len(prompt)} char prompt."}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubLLM:
+    """Client for the stub endpoint, with the same generate_content() as the Gemini model."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def generate_content(self, prompt):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"prompt": prompt}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            return StubResponse(json.loads(response.read())["text"])
+
+
+def make_report(years, disposals_per_year):
+    """Synthetic multi-year report text, laid out like the PDF text extracted by the GUI."""
+    pages = []
+    for n, year in enumerate(range(2024 - years + 1, 2025)):
+        lines = ["Capital Gains", f"Tax Year: {year - 1}/{str(year)[2:]}"]
+        for i in range(disposals_per_year):
+            asset = ASSETS[(i + n) % len(ASSETS)]
+            gain = (i * 37 + n * 11) % 2000 - 600
+            lines.append(
+                f"{asset} {(i % 28) + 1:02d}/{(i % 12) + 1:02d}/{year} Sell "
+                f"{(i % 9) + 0.5} {asset} Cost £{1000 + i * 3:,} Proceeds £{1000 + i * 3 + gain:,} "
+                f"Gain £{gain:,} {'Same Day' if i % 17 == 0 else 'Section 104'}"
+            )
+            if len(lines) == 45:
+                pages.append("\n".join(lines))
+                lines = ["Capital Gains", f"Tax Year: {year - 1}/{str(year)[2:]}"]
+        pages.append("\n".join(lines))
+
+        lines = ["Income", f"Tax Year: {year - 1}/{str(year)[2:]}"]
+        for i, asset in enumerate(ASSETS):
+            lines.append(f"Staking {asset} {(i % 28) + 1:02d}/06/{year} Income £{(i + n) * 41:,}")
+        lines += ["Tax Summary", f"Total Gains £{n * 1234:,}", f"Allowable Costs £{n * 321:,}"]
+        pages.append("\n".join(lines))
+
+    lines = ["Current Holdings"]
+    lines += [f"{asset} Quantity {i * 1.25} Value £{i * 999:,}" for i, asset in enumerate(ASSETS)]
+    lines += ["Price Data", "Missing price for SYN1 on 01/01/2020"]
+    pages.append("\n".join(lines))
+    return PAGE_BREAK.join(pages)
+
+
+def legacy_prompt(report_text, messages):
+    """The prompt as it was built before the report index: everything, every turn."""
+    history = [{"role": "system", "content": f"Here is the tax report context:\n{report_text}\n"}]
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in history + messages)
+
+
+def run_chat(llm, questions, build_prompt):
+    messages = []
+    sizes = []
+    latencies = []
+    for question in questions:
+        messages.append({"role": "user", "content": question})
+        prompt = build_prompt(messages)
+        start = time.perf_counter()
+        response = llm.generate_content(prompt)
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(prompt))
+        messages.append({"role": "assistant", "content": response.text})
+    return sizes, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--disposals", type=int, default=400, help="disposals per year")
+    parser.add_argument("--questions", type=int, default=12)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--base-latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--chars-per-second", type=float, default=2_000_000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.base_latency = args.base_latency
+    server.chars_per_second = args.chars_per_second
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm = StubLLM(f"http://127.0.0.1:{server.server_address[1]}/generate")
+
+    report_text = make_report(args.years, args.disposals)
+    questions = [
+        QUESTIONS[i % len(QUESTIONS)].format(
+            year=2024 - i % args.years, asset=ASSETS[i % len(ASSETS)]
+        )
+        for i in range(args.questions)
+    ]
+    print(f"Report: {len(report_text):,} chars, {report_text.count(PAGE_BREAK) + 1} pages")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        report_index = ReportIndex.load_or_build(report_text, index_dir)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        ReportIndex.load_or_build(report_text, index_dir)
+        loaded = time.perf_counter() - start
+    print(f"Index: {len(report_index.chunks)} sections, built {built:.3f}s, loaded {loaded:.3f}s")
+
+    context = ChatContext(report_index, top_k=args.top_k)
+    runs = {
+        "full report": run_chat(llm, questions, lambda msgs: legacy_prompt(report_text, msgs)),
+        "retrieval": run_chat(llm, questions, context.build_prompt),
+    }
+
+    print(f"{'mode':<12} {'avg prompt':>12} {'max prompt':>12} {'p50 (s)':>9} {'total (s)':>10}")
+    for mode, (sizes, latencies) in runs.items():
+        print(
+            f"{mode:<12} {statistics.mean(sizes):>12,.0f} {max(sizes):>12,} "
+            f"{statistics.median(latencies):>9.3f} {sum(latencies):>10.3f}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
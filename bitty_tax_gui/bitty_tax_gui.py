@@ -1,8 +1,14 @@
+import time
+START_TIME = time.perf_counter()
+
 import dearpygui.dearpygui as dpg
 from pathlib import Path
 import threading
 import queue
 from datetime import datetime
+from array import array
+import argparse
+import multiprocessing
 import json
 import sys
 import logging
@@ -10,11 +16,15 @@ import subprocess
 import tempfile
 import os
 import pytz
-from PIL import Image
-import numpy as np
-from dotenv import load_dotenv
-import google.generativeai as genai
-from openai import OpenAI
+from report_index import ChatContext, ReportIndex, PAGE_BREAK
+from record_grid import RECORDS, AUDIT_LOG, CAPITAL_GAINS, MAX_COLUMNS, load_tables
+
+# Heavy modules (PIL, numpy, the AI client libraries and PyMuPDF) are imported when first used,
+# so the window isn't held up by them
+LOGO_SIZE = 64
+LOGO_CACHE = "logo.rgba"
+# Rows of the records table, only this many rows of widgets are ever created
+GRID_PAGE_SIZE = 40
 
 class BittyTaxGUI:
     def __init__(self):
@@ -24,8 +34,15 @@ class BittyTaxGUI:
         self.current_file = None
         # Initialize LLM Chat feature
         self.ai_service = 'gemini'  # Set to 'gemini' to use Google Gemini instead
-        self.ai_client = self._setup_ai_client()
+        self.ai_client = None  # Set up when the first message is sent
         self.chat_history = []
+        # Report sections are retrieved per question, rather than sending the whole report
+        self.chat_context = ChatContext()
+        # Records viewer tables, loaded from the selected file
+        self.grid_tables = {}
+        self.grid_errors = {}
+        self.grid_start = 0
+        self.grid_loading = False
         # Tax years range (2009-2025)
         self.tax_years = [year for year in range(2025, 2008, -1)]
 
@@ -70,6 +87,7 @@ class BittyTaxGUI:
         self.setup_theme()
         self.setup_file_dialog()
         self.create_main_window()
+        self.setup_grid_handlers()
 
         dpg.set_primary_window("Primary Window", True)
         dpg.setup_dearpygui()
@@ -106,27 +124,21 @@ class BittyTaxGUI:
             assets_dir.mkdir(exist_ok=True)
 
             logo_path = assets_dir / "logo.png"
-            icon_small = assets_dir / "logo_small.ico"
-            icon_large = assets_dir / "logo_large.ico"
+            cache_path = assets_dir / LOGO_CACHE
 
             if not logo_path.exists():
                 self.logger.warning(f"Logo file missing: {logo_path}")
                 return
 
-            # Load and convert main logo
-            image = Image.open(logo_path)
-            image = image.convert('RGBA')  # Ensure RGBA format
-            image = image.resize((64, 64))
-            image_data = np.array(image)
-
-            # Convert image data to float values (0-1 range)
-            image_data = image_data.astype(np.float32) / 255.0
+            image_data = self.load_logo_cache(logo_path, cache_path)
+            if image_data is None:
+                image_data = self.convert_logo(logo_path, cache_path)
 
             with dpg.texture_registry():
                 dpg.add_static_texture(
-                    width=64,
-                    height=64,
-                    default_value=image_data.ravel(),
+                    width=LOGO_SIZE,
+                    height=LOGO_SIZE,
+                    default_value=image_data,
                     tag="logo_texture"
                 )
 
@@ -135,6 +147,33 @@ class BittyTaxGUI:
         except Exception as e:
             self.logger.error(f"Error loading logo: {str(e)}")
 
+    def load_logo_cache(self, logo_path, cache_path):
+        """Load the logo texture from the cache, if it's been converted from the current logo."""
+        if not cache_path.exists() or cache_path.stat().st_mtime < logo_path.stat().st_mtime:
+            return None
+
+        image_data = array('f')
+        image_data.frombytes(cache_path.read_bytes())
+        if len(image_data) != LOGO_SIZE * LOGO_SIZE * 4:
+            return None
+        return image_data
+
+    def convert_logo(self, logo_path, cache_path):
+        """Convert the logo to float RGBA values (0-1 range) and cache them as raw bytes."""
+        from PIL import Image
+        import numpy as np
+
+        image = Image.open(logo_path)
+        image = image.convert('RGBA')  # Ensure RGBA format
+        image = image.resize((LOGO_SIZE, LOGO_SIZE))
+        image_data = np.array(image).astype(np.float32).ravel() / 255.0
+
+        try:
+            cache_path.write_bytes(image_data.tobytes())
+        except OSError as e:
+            self.logger.warning(f"Unable to cache logo: {str(e)}")
+        return image_data
+
     def setup_theme(self):
         with dpg.theme() as self.main_theme:
             with dpg.theme_component(dpg.mvAll):
@@ -220,6 +259,7 @@ class BittyTaxGUI:
                 self.create_import_tab()
                 self.create_tax_tab()
                 self.create_audit_tab()
+                self.create_records_tab()
                 self.create_international_tab()
                 self.create_settings_tab()
                 self.create_llm_chat_tab()
@@ -348,57 +388,151 @@ class BittyTaxGUI:
                 dpg.add_separator()
                 self.audit_log_window = dpg.add_text("", wrap=400)
 
-    def create_international_tab(self):
-        with dpg.tab(label="International Settings"):
+    def create_records_tab(self):
+        with dpg.tab(label="Records"):
             with dpg.group():
-                dpg.add_text("International Configuration", color=(41, 120, 182))
-
-                # Currency Selection
-                self.local_currency = dpg.add_combo(
-                    label="Local Currency",
-                    items=self.currencies,
-                    default_value="GBP",
-                    width=200,
-                    tag="local_currency"
-                )
-
-                # Timezone Selection
-                self.local_timezone = dpg.add_combo(
-                    label="Local Timezone",
-                    items=self.timezones,
-                    default_value="Europe/London",
-                    width=200,
-                    tag="local_timezone"
-                )
-
-                # Date Format
-                self.date_format = dpg.add_checkbox(
-                    label="Date is Day First (DD/MM/YYYY)",
-                    default_value=True,
-                    tag="date_is_day_first"
-                )
-
+                dpg.add_text("Records Viewer", color=(41, 120, 182))
+                with dpg.group(horizontal=True):
+                    dpg.add_button(
+                        label="Load Records",
+                        callback=self.load_grid,
+                        width=120
+                    )
+                    dpg.add_combo(
+                        label="View",
+                        items=[RECORDS, AUDIT_LOG, CAPITAL_GAINS],
+                        default_value=RECORDS,
+                        width=200,
+                        tag="grid_view",
+                        callback=self.change_grid_view
+                    )
+                    dpg.add_input_text(
+                        label="Filter",
+                        width=300,
+                        tag="grid_filter",
+                        hint="Words to match, press Enter",
+                        on_enter=True,
+                        callback=self.filter_grid
+                    )
                 dpg.add_separator()
 
-                # Config Preview
-                dpg.add_text("Config Preview:", color=(41, 120, 182))
-                self.config_preview = dpg.add_text(
-                    "",
-                    wrap=400,
-                    tag="config_preview"
-                )
+                # A fixed page of cells, the rows shown in them change as the table is scrolled
+                with dpg.table(
+                    tag="grid_table",
+                    header_row=True,
+                    resizable=True,
+                    row_background=True,
+                    borders_innerV=True,
+                    borders_outerH=True,
+                    policy=dpg.mvTable_SizingStretchProp
+                ):
+                    for col in range(MAX_COLUMNS):
+                        dpg.add_table_column(label="", tag=f"grid_col_{col}")
+                    self.grid_cells = []
+                    for _ in range(GRID_PAGE_SIZE):
+                        with dpg.table_row():
+                            self.grid_cells.append([dpg.add_text("") for _ in range(MAX_COLUMNS)])
 
                 with dpg.group(horizontal=True):
+                    dpg.add_button(label="<<", callback=lambda: self.scroll_grid_to(0))
                     dpg.add_button(
-                        label="Save Config",
-                        callback=self.save_international_config,
-                        width=120
+                        label="<",
+                        callback=lambda: self.scroll_grid_to(self.grid_start - GRID_PAGE_SIZE)
                     )
                     dpg.add_button(
-                        label="Load Config",
-                        callback=self.load_international_config,
-                        width=120
+                        label=">",
+                        callback=lambda: self.scroll_grid_to(self.grid_start + GRID_PAGE_SIZE)
+                    )
+                    dpg.add_button(label=">>", callback=lambda: self.scroll_grid_to(sys.maxsize))
+                    dpg.add_slider_int(
+                        label="Row",
+                        width=400,
+                        min_value=1,
+                        max_value=1,
+                        tag="grid_scroll",
+                        callback=lambda sender, app_data: self.scroll_grid_to(app_data - 1)
                     )
+                    dpg.add_text("", tag="grid_status")
+        self.change_grid_view()
+
+    def setup_grid_handlers(self):
+        with dpg.handler_registry():
+            dpg.add_mouse_wheel_handler(callback=self.grid_mouse_wheel)
+
+    def grid_mouse_wheel(self, sender, app_data):
+        if dpg.is_item_hovered("grid_table"):
+            self.scroll_grid_to(self.grid_start - int(app_data) * 3)
+
+    def load_grid(self):
+        if not self.current_file:
+            dpg.set_value("grid_status", "Please select a file first")
+            return
+
+        if self.grid_loading:
+            self.logger.warning("Records are already loading")
+            return
+
+        self.grid_loading = True
+        tax_rules = dpg.get_value(self.tax_rules_combo)
+        self.logger.info(f"Loading records viewer: {self.current_file}")
+        dpg.set_value("grid_status", f"Loading {self.current_file}...")
+
+        def load_worker():
+            try:
+                # Tables are built by BittyTax, and cached by column for next time
+                self.grid_tables, self.grid_errors = load_tables(
+                    self.current_file, tax_rules, Path("reports") / "grid_cache"
+                )
+                self.logger.info("Records viewer loaded")
+                self.change_grid_view()
+            except Exception as e:
+                error_msg = f"Error loading records: {str(e)}"
+                self.logger.error(error_msg)
+                dpg.set_value("grid_status", error_msg)
+            finally:
+                self.grid_loading = False
+
+        threading.Thread(target=load_worker, daemon=True).start()
+
+    def change_grid_view(self):
+        table = self.grid_tables.get(dpg.get_value("grid_view"))
+        for col in range(MAX_COLUMNS):
+            if table and col < len(table.columns):
+                dpg.configure_item(f"grid_col_{col}", label=table.columns[col], show=True)
+            else:
+                dpg.configure_item(f"grid_col_{col}", show=table is None and col == 0)
+        self.filter_grid()
+
+    def filter_grid(self):
+        table = self.grid_tables.get(dpg.get_value("grid_view"))
+        if table and table.filter_text != dpg.get_value("grid_filter"):
+            table.apply_filter(dpg.get_value("grid_filter"))
+        self.scroll_grid_to(0)
+
+    def scroll_grid_to(self, start):
+        table = self.grid_tables.get(dpg.get_value("grid_view"))
+        num_rows = len(table.view) if table else 0
+        self.grid_start = max(0, min(start, num_rows - GRID_PAGE_SIZE))
+
+        rows = table.window(self.grid_start, GRID_PAGE_SIZE) if table else []
+        for row_num, cells in enumerate(self.grid_cells):
+            values = rows[row_num] if row_num < len(rows) else []
+            for col, cell in enumerate(cells):
+                dpg.set_value(cell, values[col] if col < len(values) else "")
+
+        dpg.configure_item("grid_scroll", max_value=max(1, num_rows - GRID_PAGE_SIZE + 1))
+        dpg.set_value("grid_scroll", self.grid_start + 1)
+
+        if table is None:
+            status = "No records loaded"
+        else:
+            first_row = self.grid_start + 1 if rows else 0
+            status = f"Rows {first_row:,}-{self.grid_start + len(rows):,} of {num_rows:,}"
+            if num_rows != table.num_rows:
+                status += f" (filtered from {table.num_rows:,})"
+            if dpg.get_value("grid_view") in self.grid_errors:
+                status += f" - {self.grid_errors[dpg.get_value('grid_view')]}"
+        dpg.set_value("grid_status", status)
 
     def save_international_config(self):
         try:
@@ -645,9 +779,7 @@ class BittyTaxGUI:
                     # Select the latest PDF based on modification time
                     latest_pdf = max(pdf_files, key=lambda f: f.stat().st_mtime)
                     with fitz.open(str(latest_pdf)) as pdf_doc:
-                        extracted_text = ""
-                        for page in pdf_doc:
-                            extracted_text += page.get_text("text") + "\n"
+                        extracted_text = PAGE_BREAK.join(page.get_text("text") for page in pdf_doc)
 
                     # Load the extracted text into LLM chat context
                     self.load_report_to_chat(extracted_text)
@@ -771,12 +903,14 @@ class BittyTaxGUI:
                 dpg.add_text("", tag="settings_status", wrap=400)
     def _setup_ai_client(self):
         """Initialize the AI client using the API key from the .env file."""
+        from dotenv import load_dotenv
         load_dotenv()
         if self.ai_service == 'openai':
             import openai  # Ensures the proper module is used
             openai.api_key = os.getenv('OPENAI_API_KEY')
             return openai  # Return the openai module to be used later
         elif self.ai_service == 'gemini':
+            import google.generativeai as genai
             genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
             return genai.GenerativeModel('gemini-2.0-pro-exp-02-05')
         else:
@@ -844,12 +978,16 @@ class BittyTaxGUI:
 
     def query_llm(self, messages):
         """Send the conversation history to Gemini and get a response."""
+        if self.ai_client is None:
+            self.ai_client = self._setup_ai_client()
+
         if self.ai_service == 'gemini':
-            # Build a prompt from the conversation history
-            prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
+            # Build a prompt from the relevant report sections and the conversation so far
+            prompt = self.chat_context.build_prompt(messages)
 
             # Log the prompt for debugging
-            self.logger.info(f"Prompt sent to Gemini: {prompt}")
+            self.logger.info(f"Prompt sent to Gemini: {len(prompt)} chars")
+            self.logger.debug(f"Prompt sent to Gemini: {prompt}")
 
             # Call generate_content with the prompt as a positional argument
             response = self.ai_client.generate_content(prompt)
@@ -862,17 +1000,13 @@ class BittyTaxGUI:
             raise ValueError("Invalid AI service")
 
 
-    def load_report_to_chat(self, report_text: str):
-        """Automatically load a report into the chat context for discussion."""
-        self.report_text = report_text
-        introduction = f"Here is the report context:\n{report_text}\n"
-        self.chat_history.append({"role": "system", "content": introduction})
-        self.update_chat_log()
     def load_report_to_chat(self, report_text: str):
         """Automatically load a tax report into the chat context."""
         self.report_text = report_text
-        introduction = f"Here is the tax report context:\n{report_text}\n"
-        # Add the report as a system message in the chat history
+        # Index the report, so only the sections relevant to each question are sent to the LLM
+        report_index = ReportIndex.load_or_build(report_text, Path("reports") / "chat_index")
+        self.chat_context.report_index = report_index
+        introduction = f"Tax report loaded ({len(report_index.chunks)} sections indexed)"
         self.chat_history.append({"role": "system", "content": introduction})
         self.update_chat_log()
 
@@ -902,8 +1036,40 @@ class BittyTaxGUI:
             dpg.set_value("settings_status", error_message)
 
 def main():
+    parser = argparse.ArgumentParser(description="BittyTax Manager")
+    parser.add_argument(
+        "--startup-time",
+        nargs="?",
+        type=float,
+        const=0.0,
+        metavar="BUDGET",
+        help="exit after the first frame, printing the startup time, and fail if it's over "
+             "BUDGET seconds"
+    )
+    args = parser.parse_args()
+
+    imported = time.perf_counter()
     app = BittyTaxGUI()
+    initialised = time.perf_counter()
+    dpg.render_dearpygui_frame()
+    first_frame = time.perf_counter()
+
+    startup_time = (f"Startup time: {first_frame - START_TIME:.3f}s "
+                    f"(imports {imported - START_TIME:.3f}s, "
+                    f"init {initialised - imported:.3f}s, "
+                    f"first frame {first_frame - initialised:.3f}s)")
+    app.logger.info(startup_time)
+
+    if args.startup_time is not None:
+        print(startup_time)
+        dpg.destroy_context()
+        if args.startup_time and first_frame - START_TIME > args.startup_time:
+            sys.exit(f"Startup time is over budget of {args.startup_time:.3f}s")
+        return
+
     app.update_ui()
 
 if __name__ == "__main__":
+    # The records viewer builds its tables in a new process, which needs this once frozen
+    multiprocessing.freeze_support()
     main()
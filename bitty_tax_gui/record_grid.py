@@ -0,0 +1,237 @@
+import hashlib
+import json
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+CACHE_VERSION = 1
+BITTYTAX_CONFIG = Path.home() / ".bittytax" / "bittytax.conf"
+
+RECORDS = "Imported Records"
+AUDIT_LOG = "Audit Log"
+CAPITAL_GAINS = "Capital Gains"
+
+RECORD_COLUMNS = [
+    "Type", "Buy Quantity", "Buy Asset", "Buy Value", "Sell Quantity", "Sell Asset",
+    "Sell Value", "Fee Quantity", "Fee Asset", "Fee Value", "Wallet", "Timestamp", "Note",
+]
+AUDIT_COLUMNS = [
+    "Asset", "Wallet", "Balance", "Change", "Fee", "Total", "Type", "Timestamp", "Note",
+]
+CAPITAL_GAINS_COLUMNS = [
+    "Tax Year", "Asset", "Date", "Disposal Type", "Quantity", "Cost", "Fees", "Proceeds", "Gain",
+]
+
+MAX_COLUMNS = max(len(RECORD_COLUMNS), len(AUDIT_COLUMNS), len(CAPITAL_GAINS_COLUMNS))
+
+
+class TableData:
+    """Rows of a table stored by column, and viewed through a filter.
+
+    Rows are only ever turned into widgets a window at a time, so the size of the table doesn't
+    affect how quickly it can be scrolled through.
+    """
+
+    def __init__(self, columns, data):
+        self.columns = columns
+        self.data = data
+        self.num_rows = len(data[0]) if data else 0
+        self.view = range(self.num_rows)
+        self.filter_text = ""
+        self.row_text = None
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        return cls(columns, [list(column) for column in zip(*rows)] if rows else [])
+
+    def apply_filter(self, filter_text):
+        """Only show the rows which contain all the words of the filter, in any column."""
+        previous_terms = self.filter_text.lower().split()
+        self.filter_text = filter_text
+        terms = filter_text.lower().split()
+        if not terms:
+            self.view = range(self.num_rows)
+            return
+
+        if self.row_text is None:
+            # Built on the first filter, then reused for every filter after it
+            self.row_text = ["\t".join(row).lower() for row in zip(*self.data)]
+
+        # A filter which narrows down the last one (i.e. typing more) only searches its rows
+        if previous_terms and all(any(old in new for new in terms) for old in previous_terms):
+            view = self.view
+        else:
+            view = range(self.num_rows)
+
+        row_text = self.row_text
+        for term in terms:
+            view = [row_num for row_num in view if term in row_text[row_num]]
+        self.view = array("L", view)
+
+    def window(self, start, count):
+        """Return the rows of the filtered view from start, up to count rows."""
+        return [
+            [column[row_num] for column in self.data]
+            for row_num in self.view[start:start + count]
+        ]
+
+
+def format_quantity(quantity):
+    return f"{quantity.normalize():0,f}" if quantity is not None else ""
+
+
+def format_value(value):
+    return f"{value:0,.2f}" if value is not None else ""
+
+
+def format_timestamp(timestamp):
+    # Shown in the local timezone of the BittyTax config, as in its reports
+    from bittytax.t_record import TZ_LOCAL
+
+    return f"{timestamp.astimezone(TZ_LOCAL):%Y-%m-%d %H:%M:%S %Z}"
+
+
+def record_rows(transaction_records):
+    for tr in transaction_records:
+        row = [tr.t_type.value]
+        row += [format_quantity(tr.buy.quantity), tr.buy.asset, format_value(tr.buy.cost)] \
+            if tr.buy else ["", "", ""]
+        row += [format_quantity(tr.sell.quantity), tr.sell.asset, format_value(tr.sell.proceeds)] \
+            if tr.sell else ["", "", ""]
+        row += [format_quantity(tr.fee.quantity), tr.fee.asset, format_value(tr.fee.proceeds)] \
+            if tr.fee else ["", "", ""]
+        row += [tr.wallet, format_timestamp(tr.timestamp), tr.note]
+        yield row
+
+
+def audit_rows(audit_log):
+    for asset in sorted(audit_log):
+        for entry in audit_log[asset]:
+            yield [
+                asset,
+                entry.wallet,
+                format_quantity(entry.balance),
+                format_quantity(entry.change),
+                format_quantity(entry.fee),
+                format_quantity(entry.total),
+                f"{entry.t_record.t_type.value} ({entry.tr_part.value})",
+                format_timestamp(entry.t_record.timestamp),
+                entry.t_record.note,
+            ]
+
+
+def capital_gains_rows(tax_events):
+    from bittytax.tax_event import TaxEventCapitalGains
+
+    for tax_year in sorted(tax_events):
+        for te in sorted(tax_events[tax_year]):
+            if isinstance(te, TaxEventCapitalGains):
+                yield [
+                    f"{tax_year - 1}/{str(tax_year)[2:]}",
+                    te.asset,
+                    f"{te.date:%Y-%m-%d}",
+                    te.format_disposal(),
+                    format_quantity(te.quantity),
+                    format_value(te.cost),
+                    format_value(te.fees),
+                    format_value(te.proceeds),
+                    format_value(te.gain),
+                ]
+
+
+def build_tables(filename, tax_rules):
+    """Import, audit and match the disposals of a book using BittyTax itself."""
+    from bittytax.audit import AuditRecords
+    from bittytax.bittytax import _do_import, _do_tax
+    from bittytax.config import config
+    from bittytax.constants import TAX_RULES_UK_COMPANY
+    from bittytax.price.exceptions import DataSourceError
+    from requests.exceptions import RequestException
+
+    tables = {}
+    errors = {}
+    transaction_records = _do_import(filename)
+    tables[RECORDS] = TableData.from_rows(RECORD_COLUMNS, list(record_rows(transaction_records)))
+
+    audit = AuditRecords(transaction_records)
+    tables[AUDIT_LOG] = TableData.from_rows(AUDIT_COLUMNS, list(audit_rows(audit.audit_log)))
+
+    if tax_rules in TAX_RULES_UK_COMPANY:
+        config.start_of_year_month = TAX_RULES_UK_COMPANY.index(tax_rules) + 1
+        config.start_of_year_day = 1
+    try:
+        tax, _ = _do_tax(transaction_records, tax_rules, skip_integrity_check=True)
+        rows = list(capital_gains_rows(tax.tax_events))
+    except (DataSourceError, RequestException) as e:
+        # The records and audit log are still shown if the prices can't be fetched
+        rows = []
+        errors[CAPITAL_GAINS] = str(e)
+    tables[CAPITAL_GAINS] = TableData.from_rows(CAPITAL_GAINS_COLUMNS, rows)
+    return tables, errors
+
+
+def cache_tables(filename, tax_rules, cache_file):
+    """Build the tables of a book and write them to the columnar cache."""
+    tables, errors = build_tables(filename, tax_rules)
+    Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_file, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": CACHE_VERSION,
+                "tables": {
+                    name: {"columns": table.columns, "data": table.data}
+                    for name, table in tables.items()
+                },
+                "errors": errors,
+            },
+            f,
+        )
+
+
+def read_cache(cache_file):
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("version") == CACHE_VERSION:
+            tables = {
+                name: TableData(table["columns"], table["data"])
+                for name, table in cached["tables"].items()
+            }
+            return tables, cached["errors"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def load_tables(filename, tax_rules, cache_dir):
+    """Load the tables of a book from the columnar cache, building them if the book or the
+    BittyTax config (currency, timezone, data sources, etc.) has changed."""
+    stat = os.stat(filename)
+    try:
+        config_digest = hashlib.sha1(BITTYTAX_CONFIG.read_bytes()).hexdigest()
+    except OSError:
+        config_digest = ""
+    key = (
+        f"{os.path.abspath(filename)}|{stat.st_mtime_ns}|{stat.st_size}|{tax_rules}"
+        f"|{config_digest}"
+    )
+    cache_file = Path(cache_dir) / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    cached = read_cache(cache_file)
+    if cached is None:
+        # BittyTax reads its config once, when it's first imported, so the tables are built in a
+        #  new process, which uses the config as it is now
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            executor.submit(cache_tables, filename, tax_rules, str(cache_file)).result()
+
+        cached = read_cache(cache_file)
+        if cached is None:
+            raise OSError(f"Records cache could not be read: {cache_file}")
+        if cached[1]:
+            # Built again next time, the prices may be available by then
+            cache_file.unlink()
+    return cached
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+PAGE_BREAK = "\f"
+STOP_WORDS = {
+    "a", "an", "and", "any", "are", "as", "at", "be", "by", "can", "did", "do", "for", "from",
+    "has", "have", "how", "i", "in", "is", "it", "me", "much", "my", "of", "on", "or", "the",
+    "there", "this", "to", "was", "were", "what", "when", "which", "who", "why", "with", "you",
+}
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def is_heading(line):
+    """Section titles in the report are short lines of words without any figures."""
+    return 0 < len(line) <= 40 and not any(c.isdigit() for c in line) and line[0].isupper()
+
+
+def chunk_report(report_text, max_chars=1200):
+    """Split the report text into sections, pages are separated by form feeds.
+
+    Each chunk is labelled with its page and the last heading seen, so a chunk from the middle
+    of a long table still says which part of the report it came from.
+    """
+    chunks = []
+    heading = ""
+    for page_num, page in enumerate(report_text.split(PAGE_BREAK), start=1):
+        lines = []
+        size = 0
+        for line in page.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+
+            if lines and (is_heading(line) or size + len(line) > max_chars):
+                chunks.append({"page": page_num, "heading": heading, "text": "\n".join(lines)})
+                lines = []
+                size = 0
+
+            if is_heading(line):
+                heading = line
+            lines.append(line)
+            size += len(line) + 1
+
+        if lines:
+            chunks.append({"page": page_num, "heading": heading, "text": "\n".join(lines)})
+    return chunks
+
+
+class ReportIndex:
+    """BM25 keyword index over the sections of a tax report, saved to disk per report."""
+
+    VERSION = 1
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, chunks, postings, lengths):
+        self.chunks = chunks
+        self.postings = postings
+        self.lengths = lengths
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+
+    @classmethod
+    def build(cls, report_text):
+        chunks = chunk_report(report_text)
+        postings = {}
+        lengths = []
+        for chunk_id, chunk in enumerate(chunks):
+            tokens = tokenize(f"{chunk['heading']} {chunk['text']}")
+            lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                postings.setdefault(term, []).append([chunk_id, freq])
+        return cls(chunks, postings, lengths)
+
+    @classmethod
+    def load_or_build(cls, report_text, index_dir):
+        """Load the index of this report if it's been built before, otherwise build and save it."""
+        digest = hashlib.sha1(report_text.encode("utf-8")).hexdigest()
+        index_file = Path(index_dir) / f"{digest}.json"
+
+        if index_file.exists():
+            try:
+                with open(index_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == cls.VERSION:
+                    return cls(data["chunks"], data["postings"], data["lengths"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        index = cls.build(report_text)
+        try:
+            index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(index_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": cls.VERSION,
+                        "chunks": index.chunks,
+                        "postings": index.postings,
+                        "lengths": index.lengths,
+                    },
+                    f,
+                )
+        except OSError:
+            pass
+        return index
+
+    def search(self, query, top_k=5):
+        """Return the top_k chunks for the query, best match first."""
+        scores = {}
+        num_chunks = len(self.chunks)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (num_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, freq in postings:
+                norm = self.K1 * (1 - self.B + self.B * self.lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * freq * (self.K1 + 1) / (
+                    freq + norm
+                )
+
+        best = sorted(scores, key=lambda chunk_id: (-scores[chunk_id], chunk_id))[:top_k]
+        return [self.chunks[chunk_id] for chunk_id in best]
+
+
+class ChatContext:
+    """Builds the prompt for each chat turn.
+
+    Only the report sections relevant to the question are sent, along with the most recent
+    turns verbatim and a short rolling summary of the turns before them.
+    """
+
+    def __init__(self, report_index=None, top_k=5, recent_turns=4, summary_chars=1500):
+        self.report_index = report_index
+        self.top_k = top_k
+        self.recent_turns = recent_turns
+        self.summary_chars = summary_chars
+
+    def build_prompt(self, messages):
+        turns = [msg for msg in messages if msg.get("role") != "system"]
+        if not turns:
+            return ""
+
+        question = turns[-1]["content"]
+        earlier = turns[:-1]
+        recent = earlier[-self.recent_turns :] if self.recent_turns else []
+        older = earlier[: len(earlier) - len(recent)]
+
+        parts = []
+        if self.report_index:
+            # The previous question is included, so follow-ups still find the right sections
+            previous = [msg["content"] for msg in earlier if msg.get("role") == "user"][-1:]
+            sections = self.report_index.search(" ".join(previous + [question]), self.top_k)
+            if sections:
+                context = "\n\n".join(
+                    f"[Page {s['page']}{' - ' + s['heading'] if s['heading'] else ''}]\n{s['text']}"
+                    for s in sections
+                )
+                parts.append(f"system: Relevant sections of the tax report:\n{context}")
+
+        summary = self.summarize(older)
+        if summary:
+            parts.append(f"system: Summary of the earlier conversation:\n{summary}")
+
+        parts.extend(f"{msg['role']}: {msg['content']}" for msg in recent)
+        parts.append(f"{turns[-1]['role']}: {question}")
+        return "\n".join(parts)
+
+    def summarize(self, messages):
+        """Keep the first sentence of each earlier turn, newest first until the limit is reached."""
+        lines = []
+        size = 0
+        for msg in reversed(messages):
+            first = re.split(r"(?<=[.?!])\s", msg["content"].strip(), maxsplit=1)[0]
+            line = f"- {msg['role']}: {first[:200]}"
+            if size + len(line) > self.summary_chars:
+                break
+            lines.append(line)
+            size += len(line) + 1
+        return "\n".join(reversed(lines))